@@ -0,0 +1,324 @@
+"""
+Vectorized batch engine for the Aggravation board game.
+
+Holds N games as NumPy arrays and plays one die roll in all of them with a
+handful of array operations, for balance tuning runs that need far more
+turns than AggravationGame objects can play one at a time. Rules and
+tie-breaks follow game_engine.AggravationGame.step() exactly, so a batch
+game fed the same dice and choices ends in the same state.
+
+Requires NumPy.
+"""
+
+import numpy as np
+
+from game_engine import (
+    AggravationGame, NODE_COORDS, NUM_NODES, OFF_BOARD, PLAYER_STARTS,
+    PLAYER_STARTING_HOMES, PLAYER_START_INDEX, PLAYER_FINAL_HOME_INDICES,
+    advance
+)
+
+# Action code for "no legal move"; other actions match AggravationGame.step()
+PASS = -2
+
+
+def _build_step_table() -> np.ndarray:
+    """
+    Precompute every player's destination table from the track model.
+    
+    Tables get one extra trailing row/column so an OFF_BOARD (-1) node
+    indexes a dummy entry instead of needing a separate mask.
+    
+    Returns:
+        Array [player - 1, node, steps] of the destination node after
+        0-6 steps, OFF_BOARD where the move overshoots the final home
+    """
+    table = np.full((4, NUM_NODES + 1, 7), OFF_BOARD, dtype=np.int16)
+    for player in PLAYER_STARTS:
+        for node in range(NUM_NODES):
+            for steps in range(7):
+                dest = advance(player, node, steps)
+                if dest is not None:
+                    table[player - 1, node, steps] = dest
+    return table
+
+
+STEP_TABLE = _build_step_table()
+
+
+def _build_final_table() -> np.ndarray:
+    """
+    Precompute which nodes are each player's final home spots.
+    
+    Returns:
+        Array [player - 1, node], True where node is one of the player's
+        final home spots
+    """
+    table = np.zeros((4, NUM_NODES + 1), dtype=bool)
+    for player, nodes in PLAYER_FINAL_HOME_INDICES.items():
+        table[player - 1, list(nodes)] = True
+    return table
+
+
+IS_FINAL = _build_final_table()
+_IS_FINAL_FLAT = IS_FINAL.reshape(-1)
+
+START_NODE = np.array([PLAYER_START_INDEX[player] for player in PLAYER_STARTS], dtype=np.int16)
+
+
+def _build_path_tables():
+    """
+    Flatten the step table into 1-D lookups for np.take, which is much
+    faster than multi-dimensional fancy indexing.
+    
+    Every node is one bit of a 128-bit set held as (lo, hi) uint64 words.
+    The path mask for (player, node, roll) has a bit for every node passed
+    or landed on, so a move is blocked when its path mask shares a bit
+    with the player's blocker set.
+    
+    Returns:
+        (node_lo, node_hi, path_lo, path_hi, dest) where the path tables
+        and dest are indexed by ((player - 1) * (NUM_NODES + 1) + node) * 7 + roll
+    """
+    width = NUM_NODES + 1
+    node_lo = np.zeros(width, dtype=np.uint64)
+    node_hi = np.zeros(width, dtype=np.uint64)
+    for node in range(NUM_NODES):
+        (node_lo if node < 64 else node_hi)[node] = np.uint64(1) << np.uint64(node % 64)
+    
+    steps = STEP_TABLE.reshape(-1, 7)
+    path_lo = np.zeros(steps.shape, dtype=np.uint64)
+    path_hi = np.zeros(steps.shape, dtype=np.uint64)
+    for row in range(len(steps)):
+        for roll in range(1, 7):
+            dest = steps[row, roll]
+            path_lo[row, roll] = path_lo[row, roll - 1] | (node_lo[dest] if dest >= 0 else 0)
+            path_hi[row, roll] = path_hi[row, roll - 1] | (node_hi[dest] if dest >= 0 else 0)
+    return node_lo, node_hi, path_lo.ravel(), path_hi.ravel(), steps.ravel().astype(np.intp)
+
+
+_NODE_LO, _NODE_HI, _PATH_LO, _PATH_HI, _DEST = _build_path_tables()
+
+
+class AggravationBatch:
+    """
+    N independent games stored as arrays, indexed [game, player - 1, marble].
+    
+    Node codes match game_engine (OFF_BOARD for marbles in the waiting home).
+    Finished games stay frozen while the rest keep playing.
+    """
+    
+    def __init__(self, n: int, num_players: int = 4):
+        """
+        Create N games in the starting position.
+        
+        Args:
+            n: Number of games
+            num_players: Number of players in every game (1-4)
+        """
+        self.n = n
+        self.num_players = num_players
+        self.marbles = np.full((n, 4, 4), OFF_BOARD, dtype=np.int16)
+        self.end_home = np.full((n, 4, 4), OFF_BOARD, dtype=np.int16)
+        self.end = np.full((n, 4), OFF_BOARD, dtype=np.int16)
+        self.home = np.full((n, 4), 4, dtype=np.int8)
+        self.start_occupied = np.zeros((n, 4), dtype=bool)
+        self.current_player = np.ones(n, dtype=np.int8)
+        self.winner = np.zeros(n, dtype=np.int8)  # 0 while the game is running
+        self.num_rolls = np.zeros(n, dtype=np.int32)
+        self._games = np.arange(n)
+        # Marble slots (player - 1) * 4 + marble that take part in captures
+        self._active_slots = np.arange(16) < num_players * 4
+    
+    @property
+    def game_over(self) -> np.ndarray:
+        return self.winner != 0
+    
+    def legal_moves(self, rolls: np.ndarray) -> np.ndarray:
+        """
+        Compute the current player's legal moves in every game.
+        
+        Args:
+            rolls: (N,) dice rolls
+        
+        Returns:
+            (N, 5) bool mask; column 0 is moving a marble out of home (-1),
+            columns 1-4 are marbles 0-3. All False for finished games.
+        """
+        rolls = rolls.astype(np.intp)
+        player = self.current_player.astype(np.intp) - 1
+        row = self._games * 4 + player
+        own = self.marbles.reshape(-1, 4).take(row, axis=0).astype(np.intp)
+        
+        # Nodes this player may not pass or land on: own marbles and final home records
+        blockers = np.concatenate((own, self.end_home.reshape(-1, 4).take(row, axis=0)), axis=1)
+        lo = _NODE_LO.take(blockers)
+        hi = _NODE_HI.take(blockers)
+        blocked_lo, blocked_hi = lo[:, 0], hi[:, 0]
+        for k in range(1, 8):
+            blocked_lo = blocked_lo | lo[:, k]
+            blocked_hi = blocked_hi | hi[:, k]
+        
+        key = own * 7 + (player * (NUM_NODES + 1) * 7 + rolls)[:, None]
+        blocked = (_PATH_LO.take(key) & blocked_lo[:, None]) | (_PATH_HI.take(key) & blocked_hi[:, None])
+        
+        legal = np.empty((self.n, 5), dtype=bool)
+        legal[:, 0] = ((rolls == 1) | (rolls == 6)) & (self.home.reshape(-1).take(row) > 0) \
+            & ~self.start_occupied.reshape(-1).take(row)
+        legal[:, 1:] = (_DEST.take(key) != OFF_BOARD) & (blocked == 0)
+        legal[self.winner != 0] = False
+        return legal
+    
+    def step(self, rolls: np.ndarray, actions: np.ndarray, legal: np.ndarray = None):
+        """
+        Play one die roll in every running game.
+        
+        Same rules as AggravationGame.step(): moves capture an opponent on the
+        destination, a win ends the game, and the turn passes on unless the
+        roll was a 6.
+        
+        Args:
+            rolls: (N,) dice rolls
+            actions: (N,) marble index (0-3), -1 to move out of home, or PASS
+            legal: Mask from legal_moves(rolls), if already computed
+        
+        Raises:
+            ValueError: If any running game's action is not legal
+        """
+        if legal is None:
+            legal = self.legal_moves(rolls)
+        running = self.winner == 0
+        moving = running & (actions != PASS)
+        chosen = legal.reshape(-1).take(self._games * 5 + np.clip(actions, -1, 3) + 1)
+        ok = np.where(moving, chosen, ~legal.any(axis=1))
+        if not ok[running].all():
+            bad = int(np.flatnonzero(running & ~ok)[0])
+            raise ValueError(f"Illegal action {int(actions[bad])} with a {int(rolls[bad])} in game {bad}")
+        
+        # Work on flat views: index (game * 4 + player - 1) * 4 + marble
+        marbles = self.marbles.reshape(-1)
+        end_home = self.end_home.reshape(-1)
+        home = self.home.reshape(-1)
+        start_occupied = self.start_occupied.reshape(-1)
+        width = NUM_NODES + 1
+        
+        games = np.flatnonzero(moving)
+        player = self.current_player.take(games).astype(np.intp) - 1
+        row = games * 4 + player
+        action = actions.take(games).astype(np.intp)
+        own = self.marbles.reshape(-1, 4).take(row, axis=0)
+        
+        # A marble leaving home takes the highest-numbered free slot
+        leaving = action == -1
+        home_slot = 3 - np.argmax(own[:, ::-1] == OFF_BOARD, axis=1)
+        slot = row * 4 + np.where(leaving, home_slot, action)
+        from_node = marbles.take(slot).astype(np.intp)
+        start = START_NODE.take(player)
+        dest = _DEST.take((player * width + from_node) * 7 + rolls.take(games))
+        to_node = np.where(leaving, start, dest)
+        
+        # Aggravate the first marble (in slot order) sitting on the destination
+        on_dest = (self.marbles.reshape(-1, 16).take(games, axis=0) == to_node[:, None]) & self._active_slots
+        first = np.argmax(on_dest, axis=1)
+        final = _IS_FINAL_FLAT.take(player * width + to_node)
+        captures = on_dest.any(axis=1) & (first // 4 != player) & ~final
+        if captures.any():
+            victim_row = games[captures] * 4 + first[captures] // 4
+            start_occupied[victim_row] &= to_node[captures] != START_NODE.take(first[captures] // 4)
+            marbles[games[captures] * 16 + first[captures]] = OFF_BOARD
+            home[victim_row] = np.minimum(home[victim_row] + 1, 4)
+        
+        home[row[leaving]] -= 1
+        marbles[slot] = to_node
+        self.end.reshape(-1)[row] = to_node
+        
+        # Final home records: a marble already there updates its own record
+        if final.any():
+            frow = row[final]
+            from_final = from_node[final]
+            record_of = np.where(_IS_FINAL_FLAT.take(player[final] * width + from_final), from_final, OFF_BOARD)
+            matches = self.end_home.reshape(-1, 4).take(frow, axis=0) == record_of[:, None]
+            found = matches.any(axis=1)
+            record = frow * 4 + np.argmax(matches, axis=1)
+            end_home[record[found]] = to_node[final][found]
+        
+        start_occupied[row] = np.where(to_node == start, True,
+                                       np.where(from_node == start, False, start_occupied.take(row)))
+        
+        own = self.marbles.reshape(-1, 4).take(row, axis=0).astype(np.intp)
+        won = _IS_FINAL_FLAT.take((player * width)[:, None] + own).all(axis=1)
+        self.winner[games[won]] = player[won] + 1
+        
+        # Everyone who didn't just win passes the turn on unless they rolled a 6
+        self.num_rolls += running
+        advance_turn = running & (self.winner == 0) & (rolls != 6)
+        self.current_player[advance_turn] = self.current_player[advance_turn] % self.num_players + 1
+    
+    def play(self, policy=None, seed=None, max_rolls: int = 2000) -> int:
+        """
+        Play all games until they finish or hit the roll limit.
+        
+        Args:
+            policy: Called as policy(batch, rolls, legal, rng) and returns an
+                    (N,) action array; defaults to random_legal
+            seed: Seed for numpy.random.default_rng (or a Generator)
+            max_rolls: Maximum number of rolls per game
+        
+        Returns:
+            Number of games still running
+        """
+        if policy is None:
+            policy = random_legal
+        rng = np.random.default_rng(seed)
+        for _ in range(max_rolls):
+            if (self.winner != 0).all():
+                break
+            rolls = rng.integers(1, 7, size=self.n, dtype=np.int8)
+            legal = self.legal_moves(rolls)
+            self.step(rolls, policy(self, rolls, legal, rng), legal)
+        return int((self.winner == 0).sum())
+    
+    def to_game(self, i: int) -> AggravationGame:
+        """
+        Copy one game of the batch into an AggravationGame.
+        
+        Args:
+            i: Game index
+        
+        Returns:
+            AggravationGame in the same position
+        """
+        def decode(node):
+            return NODE_COORDS[node] if node >= 0 else (None, None)
+        
+        game = AggravationGame(num_players=self.num_players)
+        for player in PLAYER_STARTS:
+            p = player - 1
+            setattr(game, f'p{player}_marbles', [decode(node) for node in self.marbles[i, p]])
+            setattr(game, f'p{player}_home', PLAYER_STARTING_HOMES[player][:self.home[i, p]])
+            setattr(game, f'p{player}_end', decode(self.end[i, p]))
+            setattr(game, f'p{player}_end_home', [decode(node) for node in self.end_home[i, p]])
+            setattr(game, f'p{player}_start_occupied', bool(self.start_occupied[i, p]))
+        game.current_player = int(self.current_player[i])
+        game.winner = int(self.winner[i]) or None
+        game.game_over = bool(self.winner[i])
+        return game
+
+
+def first_legal(batch: AggravationBatch, rolls, legal: np.ndarray, rng=None) -> np.ndarray:
+    """Pick the first legal move, in get_valid_moves() order (-1, then 0-3)."""
+    return np.where(legal.any(axis=1), np.argmax(legal, axis=1) - 1, PASS)
+
+
+def random_legal(batch: AggravationBatch, rolls, legal: np.ndarray, rng) -> np.ndarray:
+    """
+    Pick a legal move uniformly at random.
+    
+    Move k of the legal moves (in get_valid_moves() order) is chosen with
+    k = floor(u * count) for one uniform draw u per game, so the choice
+    can be replayed against AggravationGame.
+    """
+    counts = legal.sum(axis=1)
+    k = (rng.random(len(counts)) * counts).astype(np.intp)
+    choice = np.argmax(np.cumsum(legal, axis=1) > k[:, None], axis=1) - 1
+    return np.where(counts > 0, choice, PASS)
@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for the Aggravation engine (not collected by pytest).
+"""
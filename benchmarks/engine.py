@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the game engine hot paths, with regression tracking.
+
+Each benchmark times one engine call on a fixed mid-game position (or a
+full simulated game, for games_per_second) in several batches and
+reports the median batch as nanoseconds per call, with the fastest
+batch and the batches' spread as its noise. Results are written as JSON
+and compared against a stored baseline; the run fails when a benchmark's
+median is slower than its baseline by more than the threshold plus the
+noise of either run, and its fastest batch is slower by more than the
+threshold too.
+
+Save and load benchmarks write to a temporary save directory, never the
+player's own saves.
+
+Usage (from the repository root):
+    python3 -m benchmarks.engine [--output PATH] [--baseline PATH]
+                                 [--threshold PCT] [--save-baseline]
+                                 [--repeat N] [--only NAME,...]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import game_engine
+from game_engine import AggravationGame, NODE_COORDS, TRACK
+from headless_simulation import simulate_single_game
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+DEFAULT_THRESHOLD = 20.0
+DEFAULT_REPEAT = 7
+
+# Shortest batch of calls timed at once, in seconds
+MIN_BATCH_TIME = 0.05
+
+
+def midgame_position(seed: int = 7, rolls: int = 120) -> AggravationGame:
+    """
+    A reproducible mid-game position, reached by random play.
+    
+    Args:
+        seed: Seed for the dice and moves
+        rolls: Number of rolls to play
+    
+    Returns:
+        Game with marbles spread over the board
+    """
+    rng = random.Random(seed)
+    game = AggravationGame(rng=rng)
+    for _ in range(rolls):
+        dice_roll = game.roll_dice()
+        valid_moves = game.get_valid_moves(game.current_player, dice_roll)
+        game.step(rng.choice(valid_moves) if valid_moves else None, dice_roll)
+    return game
+
+
+def _movable(game: AggravationGame) -> Tuple[int, int, int]:
+    """A (player, marble_idx, dice_roll) that is a legal board move in game."""
+    for player in range(1, game.num_players + 1):
+        for dice_roll in range(1, 7):
+            for marble_idx in game.get_valid_moves(player, dice_roll):
+                if marble_idx >= 0:
+                    return player, marble_idx, dice_roll
+    raise ValueError("Position has no board move to benchmark")
+
+
+def _bench_get_next_position(game):
+    coords = TRACK
+    count = len(coords)
+    index = [0]
+    
+    def run():
+        i = index[0] = (index[0] + 1) % count
+        game.get_next_position(*coords[i])
+    return run
+
+
+def _bench_is_valid_move(game):
+    player, marble_idx, dice_roll = _movable(game)
+    return lambda: game.is_valid_move(player, marble_idx, dice_roll)
+
+
+def _bench_get_valid_moves(game):
+    player = game.current_player
+    return lambda: game.get_valid_moves(player, 6)
+
+
+def _bench_execute_move(game):
+    # Each call restores the position first (a copy_from of ~50 bytes)
+    player, marble_idx, dice_roll = _movable(game)
+    work = game.clone()
+    
+    def run():
+        work.copy_from(game)
+        work.execute_move(player, marble_idx, dice_roll)
+    return run
+
+
+def _bench_find_marble_at_position(game):
+    positions = [NODE_COORDS[node] for node in range(len(NODE_COORDS))]
+    count = len(positions)
+    index = [0]
+    
+    def run():
+        i = index[0] = (index[0] + 1) % count
+        game.find_marble_at_position(positions[i])
+    return run
+
+
+def _bench_to_dict(game):
+    return lambda: game.to_dict("Benchmark")
+
+
+def _bench_from_dict(game):
+    data = game.to_dict("Benchmark")
+    return lambda: AggravationGame.from_dict(data)
+
+
+@contextmanager
+def temporary_save_directory() -> Iterator[Path]:
+    """
+    Point the engine's save directory at a temporary one for the duration.
+    
+    load_from_file only reads from the save directory, so the save and
+    load benchmarks need one; this keeps them out of ~/.aggravation/saves.
+    
+    Yields:
+        Path of the temporary save directory
+    """
+    original = game_engine.get_save_directory
+    with tempfile.TemporaryDirectory(prefix='aggravation-bench-') as directory:
+        save_dir = Path(directory)
+        game_engine.get_save_directory = lambda: save_dir
+        try:
+            yield save_dir
+        finally:
+            game_engine.get_save_directory = original
+
+
+def _save_path() -> str:
+    """Scratch save file in the (temporary) save directory."""
+    return str(game_engine.get_save_directory() / 'benchmark.json')
+
+
+def _bench_save_to_file(game):
+    path = _save_path()
+    return lambda: game.save_to_file(path, "Benchmark")
+
+
+def _bench_load_from_file(game):
+    path = _save_path()
+    game.save_to_file(path, "Benchmark")
+    return lambda: AggravationGame.load_from_file(path)
+
+
+def _bench_full_game(game):
+    seed = [0]
+    
+    def run():
+        seed[0] += 1
+        simulate_single_game(rng=random.Random(seed[0]))
+    return run
+
+
+# Benchmarks by name: each builds a zero-argument call from the mid-game position
+BENCHMARKS: Dict[str, Callable[[AggravationGame], Callable[[], None]]] = {
+    'get_next_position': _bench_get_next_position,
+    'is_valid_move': _bench_is_valid_move,
+    'get_valid_moves': _bench_get_valid_moves,
+    'execute_move': _bench_execute_move,
+    'find_marble_at_position': _bench_find_marble_at_position,
+    'to_dict': _bench_to_dict,
+    'from_dict': _bench_from_dict,
+    'save_to_file': _bench_save_to_file,
+    'load_from_file': _bench_load_from_file,
+    'full_game': _bench_full_game,
+}
+
+
+def time_call(call: Callable[[], None], repeat: int = DEFAULT_REPEAT) -> List[float]:
+    """
+    Time a call, calibrating the batch size first.
+    
+    Args:
+        call: Zero-argument function to time
+        repeat: Number of timed batches
+    
+    Returns:
+        Seconds per call in each batch
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_BATCH_TIME:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(MIN_BATCH_TIME / elapsed) + 1))
+    batches = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        batches.append((time.perf_counter() - start) / number)
+    return batches
+
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """
+    Run benchmarks on the mid-game position.
+    
+    Args:
+        names: Benchmarks to run (default: all of BENCHMARKS)
+        repeat: Timed batches per benchmark
+    
+    Returns:
+        Results dict: machine info and, per benchmark, ns_per_op (median
+        batch), ops_per_sec (games per second for full_game), best_ns
+        (fastest batch) and noise_pct (half the spread between the
+        fastest and slowest batch, as a percentage of the median)
+    """
+    game = midgame_position()
+    results = {}
+    with temporary_save_directory():
+        for name in names or BENCHMARKS:
+            batches = time_call(BENCHMARKS[name](game.clone()), repeat)
+            seconds = statistics.median(batches)
+            results[name] = {
+                'ns_per_op': seconds * 1e9,
+                'ops_per_sec': 1 / seconds,
+                'best_ns': min(batches) * 1e9,
+                'noise_pct': (max(batches) - min(batches)) / seconds * 50,
+            }
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'benchmarks': results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare results against a baseline.
+    
+    A benchmark regresses when its median is slower by more than the
+    threshold plus the larger noise_pct of the two runs, and its fastest
+    batch (which noise only ever slows down) is slower by more than the
+    threshold, so one noisy run doesn't fail the gate.
+    
+    Args:
+        results: Output of run_benchmarks()
+        baseline: Earlier output of run_benchmarks()
+        threshold: Percentage slowdown that counts as a regression
+    
+    Returns:
+        One entry per benchmark in both: name, baseline and current
+        ns_per_op, change in percent (positive is slower), the noise
+        margin allowed in percent and regressed
+    """
+    rows = []
+    for name, current in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before is None:
+            continue
+        change = (current['ns_per_op'] - before['ns_per_op']) / before['ns_per_op'] * 100
+        noise = max(current.get('noise_pct', 0.0), before.get('noise_pct', 0.0))
+        # Baselines recorded before best_ns existed kept the fastest batch as ns_per_op
+        before_best = before.get('best_ns', before['ns_per_op'])
+        best_change = (current.get('best_ns', current['ns_per_op']) - before_best) / before_best * 100
+        rows.append({
+            'name': name,
+            'baseline_ns': before['ns_per_op'],
+            'current_ns': current['ns_per_op'],
+            'change_pct': change,
+            'noise_pct': noise,
+            'regressed': change > threshold + noise and best_change > threshold,
+        })
+    return rows
+
+
+def print_results(results: Dict, rows: List[Dict]):
+    """Print a table of the results and their change against the baseline."""
+    changes = {row['name']: row for row in rows}
+    print(f"{'benchmark':<26}{'ns/op':>14}{'ops/sec':>14}{'noise':>10}{'vs baseline':>14}")
+    for name, result in results['benchmarks'].items():
+        row = changes.get(name)
+        change = ''
+        if row is not None:
+            change = f"{row['change_pct']:+.1f}%" + (' !' if row['regressed'] else '')
+        noise = f"+/-{result.get('noise_pct', 0.0):.1f}%"
+        print(f"{name:<26}{result['ns_per_op']:>14.0f}{result['ops_per_sec']:>14.1f}{noise:>10}{change:>14}")
+
+
+def main():
+    """Main entry point: run, report, compare and optionally save a baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark the Aggravation engine hot paths.")
+    parser.add_argument('--output', metavar='PATH', default=None,
+                        help="write the results as JSON to PATH")
+    parser.add_argument('--baseline', metavar='PATH', default=str(BASELINE_PATH),
+                        help=f"baseline JSON to compare against (default: {BASELINE_PATH.name})")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"fail when a benchmark is this many percent slower, plus its noise "
+                             f"(default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="write the results to the baseline file instead of comparing")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"timed batches per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument('--only', default=None,
+                        help=f"comma-separated benchmarks to run, from: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+    
+    names = args.only.split(',') if args.only else None
+    if names and any(name not in BENCHMARKS for name in names):
+        parser.error(f"--only takes names from: {', '.join(BENCHMARKS)}")
+    
+    results = run_benchmarks(names, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print_results(results, [])
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+    
+    rows = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            rows = compare(results, json.load(f), args.threshold)
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one\n")
+    print_results(results, rows)
+    
+    regressed = [row['name'] for row in rows if row['regressed']]
+    if regressed:
+        print(f"\nRegressed by more than {args.threshold}% plus noise: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
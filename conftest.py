@@ -0,0 +1,30 @@
+"""
+Shared helpers for the engine and player tests.
+"""
+
+import random
+from game_engine import AggravationGame
+
+
+def random_positions(count, seed, rules=None):
+    """Yield (game, dice_roll, valid_moves) from randomly played games."""
+    rng = random.Random(seed)
+    game = AggravationGame(rules=rules)
+    while count > 0:
+        if game.game_over:
+            game = AggravationGame(rules=rules)
+        dice_roll = rng.randint(1, 6)
+        valid_moves = game.get_actions(game.current_player, dice_roll)
+        if valid_moves:
+            yield game, dice_roll, valid_moves
+            count -= 1
+            game.step(rng.choice(valid_moves), dice_roll)
+        else:
+            game.step(None, dice_roll)
+
+
+def with_rules(game, rules):
+    """Copy of game's position played under other rules."""
+    data = game.to_dict()
+    data['game_state']['rules'] = rules.to_dict()
+    return AggravationGame.from_dict(data)
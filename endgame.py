@@ -0,0 +1,430 @@
+"""
+Exact endgame win probabilities for two-player Aggravation.
+
+Once each player has only a few marbles left outside the final home, the
+positions that remain can be solved outright. A player with k free
+marbles has the other 4 - k packed into the deepest final home spots,
+where they can never move again; the free marbles are waiting in home,
+somewhere on the player's path or in the k shallowest final home spots.
+solve() enumerates every such position for both players (up to
+`outside` free marbles each) and either player to roll, and iterates the
+expectimax equations (the mean over the six rolls of the mover's best
+move, rolling again after a 6) until no value moves by more than the
+tolerance. That is retrograde analysis for a game with dice and
+captures, where positions can repeat: values are exact win
+probabilities under optimal play, to within the tolerance. Tables are
+solved for the standard rules; games under other house rules are never
+looked up.
+
+Tables are saved as one .npy file that load() memory-maps, so a lookup
+reads a single float. Positions are indexed by a perfect hash: each
+player's free marbles are ranked with the combinatorial number system
+(waiting marbles first, then the set of path spots) and the two ranks
+are combined with the player to roll.
+
+Requires NumPy.
+
+Usage:
+    python3 endgame.py PATH [--outside K] [--tolerance T]
+"""
+
+import argparse
+import sys
+import time
+from itertools import combinations
+from math import comb
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_engine import (
+    AggravationGame, NUM_NODES, OFF_BOARD, PLAYER_FINAL_HOME_INDICES, PLAYER_START_INDEX, STANDARD_RULES,
+    advance
+)
+
+# The two seats of a two-player game
+PLAYERS = (1, 2)
+
+
+class _Side:
+    """
+    Every arrangement of one player's k free marbles, by rank, with the
+    moves each arrangement has for each roll.
+    """
+    
+    def __init__(self, player: int, k: int):
+        self.player = player
+        self.k = k
+        finals = PLAYER_FINAL_HOME_INDICES[player]
+        # Spots a free marble can stand on, in walking order
+        path = [PLAYER_START_INDEX[player]]
+        while path[-1] != finals[k - 1]:
+            path.append(advance(player, path[-1], 1))
+        self.path = path
+        self.spot = {node: index for index, node in enumerate(path)}
+        self.packed = finals[k:]
+        n = len(path)
+        # offsets[w]: rank of the first arrangement with w marbles waiting
+        self.offsets = [0]
+        for waiting in range(k + 1):
+            self.offsets.append(self.offsets[-1] + comb(n, k - waiting))
+        size = self.offsets[-1]
+        self.size = size
+        
+        self.configs = [None] * size
+        for waiting in range(k + 1):
+            for spots in combinations(range(n), k - waiting):
+                self.configs[self.rank(waiting, spots)] = (waiting, spots)
+        
+        first_final = n - k
+        self.won = np.array([waiting == 0 and spots[0] >= first_final
+                             for waiting, spots in self.configs])
+        # Ring and path nodes held, for spotting impossible pairs of sides
+        self.occupied = np.zeros((size, NUM_NODES), dtype=np.int32)
+        # capture[rank, node]: rank after an opponent lands on node
+        self.capture = np.tile(np.arange(size, dtype=np.int32)[:, None], (1, NUM_NODES))
+        # moves[rank, roll - 1, m]: rank after the m-th legal move (-1: none);
+        # landing[...]: the node that move lands on
+        self.moves = np.full((size, 6, k + 1), -1, dtype=np.int32)
+        self.landing = np.zeros((size, 6, k + 1), dtype=np.int32)
+        for rank, (waiting, spots) in enumerate(self.configs):
+            for index in spots:
+                node = path[index]
+                self.occupied[rank, node] = 1
+                rest = tuple(spot for spot in spots if spot != index)
+                self.capture[rank, node] = self.rank(waiting + 1, rest)
+            for dice_roll in range(1, 7):
+                for m, (to_rank, node) in enumerate(self._successors(waiting, spots, dice_roll)):
+                    self.moves[rank, dice_roll - 1, m] = to_rank
+                    self.landing[rank, dice_roll - 1, m] = node
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def rank(self, waiting: int, spots: Sequence[int]) -> int:
+        """Perfect hash of an arrangement: its waiting count and sorted path spots."""
+        rank = self.offsets[waiting]
+        for i, spot in enumerate(spots):
+            rank += comb(spot, i + 1)
+        return rank
+    
+    def rank_nodes(self, nodes: Sequence[int]) -> Optional[int]:
+        """
+        Rank the player's marble nodes, or None if they aren't k free
+        marbles plus the packed ones.
+        """
+        nodes = list(nodes)
+        for node in self.packed:
+            if node not in nodes:
+                return None
+            nodes.remove(node)
+        waiting = nodes.count(OFF_BOARD)
+        try:
+            spots = sorted(self.spot[node] for node in nodes if node != OFF_BOARD)
+        except KeyError:
+            return None
+        if len(set(spots)) != len(spots):
+            return None
+        return self.rank(waiting, spots)
+    
+    def _successors(self, waiting: int, spots: Tuple[int, ...], dice_roll: int):
+        """Yield (rank, landing node) for every legal move, as the engine allows them."""
+        n = len(self.path)
+        if waiting and (dice_roll == 1 or dice_roll == 6) and 0 not in spots:
+            yield self.rank(waiting - 1, sorted(spots + (0,))), self.path[0]
+        for spot in spots:
+            dest = spot + dice_roll
+            # Overshooting, or running into the packed marbles or a free one
+            if dest >= n or any(step in spots for step in range(spot + 1, dest + 1)):
+                continue
+            moved = sorted(dest if other == spot else other for other in spots)
+            yield self.rank(waiting, moved), self.path[dest]
+
+
+def _solve_block(side1: _Side, side2: _Side, tolerance: float, max_sweeps: int) -> Tuple[np.ndarray, int]:
+    """
+    Solve every position with side1's and side2's free marble counts.
+    
+    Returns:
+        Array [rank1, rank2, player to roll - 1] of player 1's win
+        probability (NaN where the sides share a spot), and the number of
+        sweeps it took
+    """
+    n1, n2 = len(side1), len(side2)
+    invalid = (side1.occupied @ side2.occupied.T) > 0
+    won1 = side1.won[:, None] & ~invalid
+    won2 = side2.won[None, :] & ~invalid
+    active = ~(invalid | won1 | won2)
+    values = np.full((n1, n2, 2), 0.5)
+    values[won1] = 1.0
+    values[won2] = 0.0
+    values[invalid] = np.nan
+    
+    for sweep in range(1, max_sweeps + 1):
+        change = 0.0
+        for mover, side, other in ((0, side1, side2), (1, side2, side1)):
+            total = np.zeros((n1, n2))
+            for dice_roll in range(1, 7):
+                after = mover if dice_roll == 6 else 1 - mover
+                best = None
+                for m in range(side.k + 1):
+                    to = side.moves[:, dice_roll - 1, m]
+                    legal = to >= 0
+                    if not legal.any():
+                        continue
+                    to = np.where(legal, to, 0)
+                    captured = other.capture[:, side.landing[:, dice_roll - 1, m]]
+                    if mover == 0:
+                        value = values[to[:, None], captured.T, after]
+                        value = np.where(side.won[to][:, None], 1.0, value)
+                        value = np.where(legal[:, None], value, -np.inf)
+                        best = value if best is None else np.maximum(best, value)
+                    else:
+                        value = values[captured, to[None, :], after]
+                        value = np.where(side.won[to][None, :], 0.0, value)
+                        value = np.where(legal[None, :], value, np.inf)
+                        best = value if best is None else np.minimum(best, value)
+                # No legal move: pass the roll
+                passed = values[:, :, after]
+                if best is None:
+                    best = passed
+                else:
+                    best = np.where(np.isinf(best), passed, best)
+                total += best
+            new = total / 6
+            change = max(change, float(np.abs(new - values[:, :, mover])[active].max(initial=0.0)))
+            values[:, :, mover] = np.where(active, new, values[:, :, mover])
+        if change < tolerance:
+            return values, sweep
+    return values, max_sweeps
+
+
+class EndgameTable:
+    """
+    Exact win probabilities for two-player endgames with at most
+    `outside` free marbles per player.
+    
+    Build one with solve() or open a saved one with load(). Positions
+    outside the table (more players, more free marbles, a finished game)
+    give None from every query.
+    """
+    
+    def __init__(self, values: np.ndarray, outside: int):
+        """
+        Wrap a solved table.
+        
+        Args:
+            values: Flat array of player 1's win probabilities, laid out
+                    as table_size(outside) describes
+            outside: Most free marbles per player
+        
+        Raises:
+            ValueError: If values has the wrong length for outside
+        """
+        self.outside = outside
+        self._sides = {(player, k): _Side(player, k)
+                       for player in PLAYERS for k in range(1, outside + 1)}
+        # Blocks by (k1, k2): offset into values and player 2's side size
+        self._blocks = {}
+        offset = 0
+        for k1 in range(1, outside + 1):
+            for k2 in range(1, outside + 1):
+                n2 = len(self._sides[2, k2])
+                self._blocks[k1, k2] = offset, n2
+                offset += len(self._sides[1, k1]) * n2 * 2
+        if len(values) != offset:
+            raise ValueError(f"Endgame table has {len(values)} entries, expected {offset} "
+                             f"for {outside} free marbles")
+        self.values = values
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def index(self, game: AggravationGame, to_roll: Optional[int] = None) -> Optional[int]:
+        """
+        Perfect hash of a position.
+        
+        Args:
+            game: Game to look up
+            to_roll: Player about to roll (default: game.current_player)
+        
+        Returns:
+            Index into values, or None if the position isn't in the table
+            (tables are solved for the standard rules only)
+        """
+        if game.num_players != 2 or game.game_over or game.rules != STANDARD_RULES:
+            return None
+        ranks = []
+        counts = []
+        for player in PLAYERS:
+            nodes = game.get_marble_nodes(player)
+            finals = PLAYER_FINAL_HOME_INDICES[player]
+            packed = 0
+            while packed < 4 and finals[3 - packed] in nodes:
+                packed += 1
+            k = 4 - packed
+            if not 1 <= k <= self.outside:
+                return None
+            rank = self._sides[player, k].rank_nodes(nodes)
+            if rank is None:
+                return None
+            ranks.append(rank)
+            counts.append(k)
+        offset, n2 = self._blocks[counts[0], counts[1]]
+        to_roll = game.current_player if to_roll is None else to_roll
+        return offset + (ranks[0] * n2 + ranks[1]) * 2 + (to_roll - 1)
+    
+    def win_probability(self, game: AggravationGame, player: Optional[int] = None,
+                        to_roll: Optional[int] = None) -> Optional[float]:
+        """
+        Chance that a player wins from a position with best play by both.
+        
+        Args:
+            game: Game to look up
+            player: Player to give the chance for (default: the one to roll)
+            to_roll: Player about to roll (default: game.current_player)
+        
+        Returns:
+            Win probability, or None if the position isn't in the table
+        """
+        to_roll = game.current_player if to_roll is None else to_roll
+        index = self.index(game, to_roll)
+        if index is None:
+            return None
+        value = float(self.values[index])
+        player = to_roll if player is None else player
+        return value if player == 1 else 1.0 - value
+    
+    def best_move(self, game: AggravationGame, dice_roll: int,
+                  valid_moves: Optional[List[int]] = None) -> Optional[int]:
+        """
+        Pick the move that maximizes the current player's win probability.
+        
+        Args:
+            game: Game to move in; left unchanged
+            dice_roll: Number rolled on die
+            valid_moves: Valid moves for the roll, or None to compute them
+        
+        Returns:
+            Chosen marble index (-1 for out of home), or None if there is
+            no valid move or a resulting position isn't in the table
+        """
+        if game.rules != STANDARD_RULES:
+            return None  # Other rules have other moves (and shortcut moves aren't marble indices)
+        player = game.current_player
+        if valid_moves is None:
+            valid_moves = game.get_valid_moves(player, dice_roll)
+        after = player if dice_roll == 6 else player % 2 + 1
+        best_move, best_value = None, -1.0
+        for marble_idx in valid_moves:
+            record = game.apply_move(player, marble_idx, dice_roll)
+            if game.check_win_condition(player):
+                value = 1.0
+            else:
+                value = self.win_probability(game, player, after)
+            game.undo(record)
+            if value is None:
+                return None
+            if value > best_value:
+                best_move, best_value = marble_idx, value
+        return best_move
+    
+    def save(self, path: str):
+        """Write the table to a .npy file."""
+        np.save(path, np.asarray(self.values))
+    
+    @classmethod
+    def load(cls, path: str, outside: Optional[int] = None) -> 'EndgameTable':
+        """
+        Memory-map a table written by save().
+        
+        Args:
+            path: .npy file
+            outside: Most free marbles per player, or None to work it out
+                     from the table's length
+        
+        Returns:
+            EndgameTable reading values from the file on demand
+        
+        Raises:
+            ValueError: If the file doesn't hold a table of a known size
+        """
+        values = np.load(path, mmap_mode='r')
+        if outside is None:
+            outside = next((k for k in range(1, 4) if table_size(k) == len(values)), None)
+            if outside is None:
+                raise ValueError(f"{path} doesn't hold an endgame table")
+        return cls(values, outside)
+
+
+def table_size(outside: int) -> int:
+    """Number of entries in a table for up to `outside` free marbles per player."""
+    sizes = [len(_Side(1, k)) for k in range(1, outside + 1)]
+    return 2 * sum(sizes) ** 2
+
+
+def solve(outside: int = 1, tolerance: float = 1e-12, max_sweeps: int = 100000,
+          progress: Optional[Callable[[int, int, int], None]] = None) -> EndgameTable:
+    """
+    Solve every endgame with up to `outside` free marbles per player.
+    
+    Args:
+        outside: Most free marbles per player
+        tolerance: Stop once no value changes by more than this in a sweep
+        max_sweeps: Most sweeps per block of positions
+        progress: Called as progress(k1, k2, sweeps) after each block
+    
+    Returns:
+        The solved EndgameTable
+    """
+    blocks = []
+    for k1 in range(1, outside + 1):
+        for k2 in range(1, outside + 1):
+            values, sweeps = _solve_block(_Side(1, k1), _Side(2, k2), tolerance, max_sweeps)
+            blocks.append(values.ravel())
+            if progress is not None:
+                progress(k1, k2, sweeps)
+    return EndgameTable(np.concatenate(blocks), outside)
+
+
+class EndgamePolicy:
+    """
+    Policy that plays perfectly from an endgame table and asks a fallback
+    policy everywhere else.
+    """
+    
+    def __init__(self, table: EndgameTable, fallback: Callable[[AggravationGame, int, List[int]], int]):
+        self.table = table
+        self.fallback = fallback
+    
+    def __call__(self, game: AggravationGame, dice_roll: int, valid_moves: List[int]) -> int:
+        move = self.table.best_move(game, dice_roll, valid_moves)
+        return self.fallback(game, dice_roll, valid_moves) if move is None else move
+
+
+def main():
+    """Main entry point: solve the endgames and save the table."""
+    parser = argparse.ArgumentParser(description="Solve two-player Aggravation endgames.")
+    parser.add_argument('path', help="where to write the table (.npy)")
+    parser.add_argument('--outside', type=int, default=2,
+                        help="most marbles per player outside the final home (default: 2)")
+    parser.add_argument('--tolerance', type=float, default=1e-12,
+                        help="stop when no value changes by more than this (default: 1e-12)")
+    args = parser.parse_args()
+    if args.outside < 1:
+        parser.error("--outside must be at least 1")
+    
+    start = time.perf_counter()
+    
+    def report(k1, k2, sweeps):
+        print(f"Solved {k1} vs {k2} free marbles in {sweeps} sweeps "
+              f"({time.perf_counter() - start:.1f}s)")
+    
+    table = solve(args.outside, args.tolerance, progress=report)
+    table.save(args.path)
+    print(f"Wrote {len(table)} positions to {args.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
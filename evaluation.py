@@ -0,0 +1,120 @@
+"""
+Position evaluation for the search-based players and for analytics.
+
+Scores are built from per-player lookup tables over the board nodes, so
+scoring a position is a few list lookups per marble: how far each node
+is from the player's start, and which ring nodes a marble on it could
+aggravate next roll.
+"""
+
+from typing import List
+
+from game_engine import (
+    CENTER_INDEX, AggravationGame, NUM_NODES, OFF_BOARD, PLAYER_EXIT_STAR_INDEX, PLAYER_START_INDEX,
+    PLAYER_STARTS, TRACK_LENGTH, advance
+)
+
+
+def _build_progress(player: int) -> List[int]:
+    """
+    Steps from the player's start to every node, plus one so a marble on
+    the start counts for more than one waiting in home.
+    
+    The center hole (reached only by shortcut) is one step short of the
+    player's exit star hole, where a 1 takes the marble next.
+    
+    Args:
+        player: Player number (1-4)
+    
+    Returns:
+        List indexed by node; 0 for nodes the player can never reach and
+        for OFF_BOARD (the last entry)
+    """
+    progress = [0] * (NUM_NODES + 1)
+    steps = 0
+    node = PLAYER_START_INDEX[player]
+    while node is not None:
+        progress[node] = steps + 1
+        steps += 1
+        node = advance(player, PLAYER_START_INDEX[player], steps)
+    progress[CENTER_INDEX] = progress[PLAYER_EXIT_STAR_INDEX[player]] - 1
+    return progress
+
+
+PROGRESS = {player: _build_progress(player) for player in PLAYER_STARTS}
+
+
+def _build_danger_zones(player: int) -> List[tuple]:
+    """
+    Ring nodes a marble of the player's could aggravate on its next roll.
+    
+    Args:
+        player: Player number (1-4)
+    
+    Returns:
+        List indexed by node of tuples of ring nodes; a marble waiting in
+        home (OFF_BOARD, the last entry) threatens the player's start
+    """
+    zones = [()] * (NUM_NODES + 1)
+    for node in range(TRACK_LENGTH):
+        targets = (advance(player, node, dice_roll) for dice_roll in range(1, 7))
+        zones[node] = tuple(target for target in targets
+                            if target is not None and target < TRACK_LENGTH)
+    zones[OFF_BOARD] = (PLAYER_START_INDEX[player],)
+    return zones
+
+
+DANGER_ZONES = {player: _build_danger_zones(player) for player in PLAYER_STARTS}
+
+# Marble values for score_position(): convex in progress, so getting the
+# leading marble home is worth more than spreading the same steps around
+_MARBLE_VALUE = {player: [(7 + steps) ** 2 if steps else 0 for steps in progress]
+                 for player, progress in PROGRESS.items()}
+
+# score_position() always lies within +/-SCORE_LIMIT: a player's marbles are
+# worth at most 4 * the top marble value and count num_players - 1 times
+SCORE_LIMIT = 4 * 3 * max(max(values) for values in _MARBLE_VALUE.values())
+
+
+def score_position(game: AggravationGame, player: int) -> float:
+    """
+    Score a position for one player: the value of their marbles minus the
+    mean value of the opponents' marbles.
+    
+    A marble is worth more the further along it is, and nothing while it
+    waits in home. A marble on the ring loses a sixth of its value for
+    every opponent marble (or waiting opponent, for a start spot) that
+    could land on it next roll, roughly the chance of being aggravated.
+    
+    Args:
+        game: Game to score
+        player: Player to score for
+    
+    Returns:
+        Score (higher is better for the player), scaled by num_players - 1
+    """
+    seats = range(1, game.num_players + 1)
+    nodes = {seat: game.get_marble_nodes(seat) for seat in seats}
+    threats = {}
+    for seat in seats:
+        zones = DANGER_ZONES[seat]
+        counts = {}
+        # A set, so several waiting marbles threaten the start once
+        for node in set(nodes[seat]):
+            for target in zones[node]:
+                counts[target] = counts.get(target, 0) + 1
+        threats[seat] = counts
+    
+    score = 0.0
+    for seat in seats:
+        values = _MARBLE_VALUE[seat]
+        total = 0.0
+        for node in nodes[seat]:
+            value = values[node]
+            if 0 <= node < TRACK_LENGTH:
+                behind = sum(threats[other].get(node, 0) for other in seats if other != seat)
+                if behind:
+                    value -= value * min(behind, 6) / 6
+            total += value
+        score += total * (game.num_players - 1) if seat == player else -total
+    return score
@@ -0,0 +1,373 @@
+"""
+Expectimax search player for Aggravation.
+
+The tree alternates decision nodes (a player picks a marble for a known
+roll) with chance nodes (the next die, each face with probability 1/6).
+With four players the search is paranoid: the searching player
+maximizes its score_position() and every opponent is assumed to
+minimize it, which turns the game into a two-sided one that Star1 and
+Star2 pruning can bound.
+
+Searches deepen iteratively until max_depth or the time budget runs
+out, so a move is always ready within roughly time_limit seconds.
+
+Moves are get_actions() entries, so under rules with shortcuts the
+search chooses each marble's destination too.
+
+Chance node values are kept in a transposition table, with the best
+move of each decision below them for move ordering. The game's own
+Zobrist hash doesn't change while moves are applied and undone for the
+same current_player, so table keys mix in the player to roll, the roll
+and the searching player, and the house rules the game is played under.
+"""
+
+import random
+import time
+from typing import Callable, List, Optional, Tuple, Union
+
+from evaluation import PROGRESS, SCORE_LIMIT, score_position
+from game_engine import (
+    PLAYER_FINAL_HOME_INDICES, STANDARD_RULES, AggravationGame, AggravationRules, TRACK_LENGTH,
+    split_action
+)
+from transposition import EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+
+# Probability of each die face
+_FACE = 1 / 6
+_ROLLS = (1, 2, 3, 4, 5, 6)
+
+# Table keys, fixed like the engine's Zobrist keys: per player to roll,
+# per roll (decision nodes only) and per (num_players, searching player)
+_key_rng = random.Random(0x7AB1E)
+_MOVER_KEYS = [0] + [_key_rng.getrandbits(64) for _ in range(4)]
+_ROLL_KEYS = [0] + [_key_rng.getrandbits(64) for _ in _ROLLS]
+_ROOT_KEYS = {(num_players, player): _key_rng.getrandbits(64)
+              for num_players in range(1, 5) for player in range(1, num_players + 1)}
+# A move as get_actions() gives it: a marble index or a (marble_idx, to_node) pair
+Move = Union[int, Tuple[int, int]]
+
+# Per rules, made on first use from the rules' hash (the standard rules
+# keep the plain keys)
+_RULES_KEYS = {STANDARD_RULES: 0}
+
+
+def _rules_key(rules: AggravationRules) -> int:
+    """Table key for a set of house rules."""
+    key = _RULES_KEYS.get(rules)
+    if key is None:
+        key = _RULES_KEYS[rules] = random.Random(hash(rules)).getrandbits(64)
+    return key
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its time budget is spent."""
+
+
+def order_moves(game: AggravationGame, player: int, dice_roll: int,
+                moves: List[Move]) -> List[Move]:
+    """
+    Order moves for search: captures first, then moves into the final
+    home, then the rest, furthest marble (and destination) first.
+    
+    Args:
+        game: Game to move in
+        player: Player to move
+        dice_roll: Number rolled on die
+        moves: Valid moves for the roll
+    
+    Returns:
+        The moves, best candidates first
+    """
+    if len(moves) < 2:
+        return moves
+    nodes = game.get_marble_nodes(player)
+    progress = PROGRESS[player]
+    final_home = PLAYER_FINAL_HOME_INDICES[player]
+    
+    def key(move):
+        marble_idx, to_node = split_action(move)
+        if game.is_capture(player, marble_idx, dice_roll, to_node):
+            return 0, 0, 0
+        if marble_idx < 0:
+            return 2, 0, 0
+        node = nodes[marble_idx]
+        # The game's rules decide where the marble lands (e.g. overshooting home)
+        dest = game.get_destinations(player, marble_idx, dice_roll)[0] if to_node is None else to_node
+        if node < TRACK_LENGTH and dest in final_home:
+            return 1, 0, 0
+        return 2, -progress[node], -progress[dest]
+    
+    return sorted(moves, key=key)
+
+
+class ExpectimaxPlayer:
+    """
+    Policy that picks moves by depth-limited expectimax search.
+    
+    Depth counts decisions: depth 1 scores the position after each of the
+    mover's options (like one_ply_search), depth 2 also averages over the
+    next roll and the reply to it, and so on.
+    
+    The node count, depth reached and search time of the last move are
+    kept in nodes, depth_reached and elapsed. The transposition table,
+    with its hit counters, is table (None until the first search).
+    """
+    
+    def __init__(self, max_depth: int = 3, time_limit: Optional[float] = 0.05,
+                 evaluate: Callable[[AggravationGame, int], float] = score_position,
+                 score_limit: float = SCORE_LIMIT, table_mb: Optional[float] = 16):
+        """
+        Create a player.
+        
+        Args:
+            max_depth: Deepest search, in decisions
+            time_limit: Seconds per move, or None to always search to
+                        max_depth
+            evaluate: Called as evaluate(game, player); higher is better
+                      for the player
+            score_limit: Bound on abs(evaluate(...)), used for wins and
+                         losses and for pruning at chance nodes
+            table_mb: Transposition table size in MB, or None for no table
+        """
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.evaluate = evaluate
+        self.score_limit = score_limit
+        self.table_mb = table_mb
+        self.table = None
+        self.nodes = 0
+        self.depth_reached = 0
+        self.elapsed = 0.0
+        self._deadline = None
+        self._root_player = 0
+        self._root_key = 0
+    
+    def __call__(self, game: AggravationGame, dice_roll: int, valid_moves: List[Move]) -> Move:
+        return self.choose_move(game, dice_roll, valid_moves)
+    
+    def choose_move(self, game: AggravationGame, dice_roll: int,
+                    valid_moves: Optional[List[Move]] = None) -> Move:
+        """
+        Pick a move for the current player.
+        
+        Args:
+            game: Game to move in; left unchanged
+            dice_roll: Number rolled on die
+            valid_moves: Valid moves for the roll (see get_actions), or
+                         None to compute them
+        
+        Returns:
+            Chosen move: marble index (-1 for out of home), or a
+            (marble_idx, to_node) pair under rules with shortcuts
+        
+        Raises:
+            ValueError: If there is no valid move
+        """
+        start = time.perf_counter()
+        player = game.current_player
+        if valid_moves is None:
+            valid_moves = game.get_actions(player, dice_roll)
+        if not valid_moves:
+            raise ValueError(f"Player {player} has no valid move with a {dice_roll}")
+        self.nodes = 0
+        self.depth_reached = 0
+        moves = order_moves(game, player, dice_roll, valid_moves)
+        best_move = moves[0]
+        
+        if len(moves) > 1:
+            self._deadline = start + self.time_limit if self.time_limit is not None else None
+            self._root_player = player
+            self._root_key = _ROOT_KEYS[game.num_players, player] ^ _rules_key(game.rules)
+            if self.table is None and self.table_mb:
+                # Allocated on first use, so registering a player is cheap
+                self.table = TranspositionTable(self.table_mb)
+            if self.table is not None:
+                self.table.new_search()
+            # Search a copy: a timeout unwinds without undoing moves
+            search_game = game.clone()
+            for depth in range(1, self.max_depth + 1):
+                try:
+                    best_move = self._search_root(search_game, player, dice_roll, moves, depth)
+                except SearchTimeout:
+                    break
+                self.depth_reached = depth
+                # Search the best move first next iteration
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+        
+        self.elapsed = time.perf_counter() - start
+        return best_move
+    
+    def _search_root(self, game: AggravationGame, player: int, dice_roll: int,
+                     moves: List[Move], depth: int) -> Move:
+        limit = self.score_limit
+        next_player = player if dice_roll == 6 else player % game.num_players + 1
+        best_move, best_value = moves[0], -limit - 1
+        for move in moves:
+            marble_idx, to_node = split_action(move)
+            record = game.apply_move(player, marble_idx, dice_roll, to_node)
+            if game.check_win_condition(player):
+                value = limit
+            else:
+                value = self._chance(game, next_player, depth - 1, best_value, limit)
+            game.undo(record)
+            if value > best_value:
+                best_move, best_value = move, value
+        return best_move
+    
+    def _tick(self):
+        self.nodes += 1
+        if self._deadline is not None and self.nodes & 15 == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+    
+    def _decision(self, game: AggravationGame, player: int, dice_roll: int, depth: int,
+                  alpha: float, beta: float, moves: List[Move], best: Optional[float] = None,
+                  best_move: Move = NO_MOVE, key: Optional[int] = None) -> float:
+        """
+        Value of a decision node: the best of moves for player (the root
+        player maximizes, everyone else minimizes), starting from best, the
+        value of best_move if it was already searched.
+        
+        With a key, the node's value and best move are stored in the table
+        (just the marble, for a (marble_idx, to_node) move).
+        """
+        self._tick()
+        limit = self.score_limit
+        next_player = player if dice_roll == 6 else player % game.num_players + 1
+        maximize = player == self._root_player
+        window = alpha, beta
+        if best is None:
+            best = -limit if maximize else limit
+        elif (best >= beta) if maximize else (best <= alpha):
+            return self._store_decision(key, best, depth, window, best_move)
+        
+        for move in moves:
+            marble_idx, to_node = split_action(move)
+            record = game.apply_move(player, marble_idx, dice_roll, to_node)
+            if game.check_win_condition(player):
+                value = limit if maximize else -limit
+            else:
+                value = self._chance(game, next_player, depth - 1, alpha, beta)
+            game.undo(record)
+            if maximize:
+                if value > best:
+                    best, best_move = value, move
+                    if best >= beta:
+                        break
+                    alpha = max(alpha, best)
+            else:
+                if value < best:
+                    best, best_move = value, move
+                    if best <= alpha:
+                        break
+                    beta = min(beta, best)
+        return self._store_decision(key, best, depth, window, best_move)
+    
+    def _store_decision(self, key: Optional[int], value: float, depth: int,
+                        window: Tuple[float, float], best_move: Move) -> float:
+        if key is not None:
+            self._store(key, value, depth, *window, split_action(best_move)[0])
+        return value
+    
+    def _store(self, key: int, value: float, depth: int, alpha: float, beta: float,
+               move: int = NO_MOVE):
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, value, depth, flag, move)
+    
+    def _chance(self, game: AggravationGame, player: int, depth: int,
+                alpha: float, beta: float) -> float:
+        """
+        Value of a chance node: the mean over the six rolls of player's
+        decision.
+        
+        From depth 2 up (shallower nodes are cheaper to search than to
+        look up), a table entry searched to the same depth answers the node
+        outright if it is exact or a bound outside (alpha, beta). Deeper
+        entries are not used, so a search returns the same values as one
+        without the table.
+        
+        Star2: every roll leads to a decision by the same player, so
+        searching just the first ordered move of each (the probe) bounds
+        every child on the same side, from below when the root player
+        maximizes and from above for an opponent. If the mean of the
+        probes is already outside (alpha, beta) the node is cut off;
+        otherwise the full search starts from the probed values.
+        
+        Star1: each roll is searched with a window narrowed by what is
+        known of the other rolls, and the node stops as soon as the mean
+        is certain to fall outside (alpha, beta).
+        """
+        if depth <= 0:
+            return self.evaluate(game, self._root_player)
+        table = self.table
+        key = None
+        if table is not None and depth > 1:
+            key = game.zobrist_hash ^ _MOVER_KEYS[player] ^ self._root_key
+            entry = table.lookup(key)
+            if entry is not None and entry[1] == depth:
+                value, _, _, flag = entry
+                if flag == EXACT or (value >= beta if flag == LOWER else value <= alpha):
+                    return value
+        limit = self.score_limit
+        maximize = player == self._root_player
+        next_player = player % game.num_players + 1
+        
+        orders = []
+        probes = []
+        for dice_roll in _ROLLS:
+            moves = game.get_actions(player, dice_roll)
+            if moves:
+                moves = order_moves(game, player, dice_roll, moves)
+                if key is not None and len(moves) > 1:
+                    # Probe the move that was best last time first
+                    hint = table.best_move(key ^ _ROLL_KEYS[dice_roll])
+                    marbles = moves if type(moves[0]) is int else [move[0] for move in moves]
+                    if hint != marbles[0] and hint in marbles:
+                        moves.insert(0, moves.pop(marbles.index(hint)))
+                probe = self._decision(game, player, dice_roll, depth, -limit, limit, moves[:1])
+            else:
+                # A forced pass: the probe is the node's exact value
+                self._tick()
+                passer = player if dice_roll == 6 else next_player
+                probe = self._chance(game, passer, depth - 1, -limit, limit)
+            orders.append(moves)
+            probes.append(probe)
+        rest = sum(probes)
+        if (rest * _FACE >= beta) if maximize else (rest * _FACE <= alpha):
+            return self._store_chance(key, rest * _FACE, depth, alpha, beta)
+        
+        total = 0.0
+        for index, dice_roll in enumerate(_ROLLS):
+            # Bounds on the rolls still to search: the probes on one side,
+            # the score limit on the other
+            rest -= probes[index]
+            remaining = 5 - index
+            low_rest = rest if maximize else -limit * remaining
+            high_rest = limit * remaining if maximize else rest
+            child_alpha = 6 * alpha - total - high_rest
+            child_beta = 6 * beta - total - low_rest
+            moves = orders[index]
+            if moves:
+                value = self._decision(game, player, dice_roll, depth,
+                                       max(child_alpha, -limit), min(child_beta, limit),
+                                       moves[1:], probes[index], moves[0],
+                                       None if key is None else key ^ _ROLL_KEYS[dice_roll])
+            else:
+                value = probes[index]
+            total += value
+            if value <= child_alpha:
+                return self._store_chance(key, (total + high_rest) * _FACE, depth, alpha, beta)
+            if value >= child_beta:
+                return self._store_chance(key, (total + low_rest) * _FACE, depth, alpha, beta)
+        return self._store_chance(key, total * _FACE, depth, alpha, beta)
+    
+    def _store_chance(self, key: Optional[int], value: float, depth: int,
+                      alpha: float, beta: float) -> float:
+        if key is not None:
+            self._store(key, value, depth, alpha, beta)
+        return value
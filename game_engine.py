@@ -6,9 +6,10 @@ with NO pygame dependencies to enable headless testing.
 
 import random
 import json
+from array import array
 from datetime import datetime
 from pathlib import Path
-from typing import Tuple, List, Dict, Optional
+from typing import Callable, Tuple, List, Dict, Optional, Union
 
 # Board Constants
 BOARD_TEMPLATE = [
@@ -68,54 +69,785 @@ PLAYER_HOME_STRETCHES = {
 BLANK = '.'
 SPOT = '#'
 
+# Shortcut holes: the star holes are the four inner corners of the cross,
+# clockwise from the top right, and the center hole is in the middle
+STAR_HOLES = ((19, 6), (19, 10), (11, 10), (11, 6))
+CENTER_HOLE = (15, 8)
+
+
+# Precomputed track model
+# The board is turned into integer "nodes" once at import time so movement is
+# a table lookup instead of coordinate arithmetic:
+#   nodes 0..TRACK_LENGTH-1      the clockwise ring, node 0 is P1START
+#   nodes TRACK_LENGTH..+15      final home slots, 4 per player in player order
+#   node CENTER_INDEX (the last)  the center hole, only reachable by shortcut
+
+def _build_track() -> Tuple[Tuple[int, int], ...]:
+    """
+    Derive the clockwise ring of spots from BOARD_TEMPLATE.
+    
+    Two ring spots are neighbours when they are 2 columns or 1 row apart.
+    Every ring spot has exactly two neighbours; the center hole has none and
+    is left out. The walk starts at P1START and is flipped if it turns out
+    to run counter-clockwise on screen.
+    
+    Returns:
+        Tuple of (x, y) coordinates in clockwise order
+    """
+    def is_spot(x, y):
+        return 0 <= y < len(BOARD_TEMPLATE) and 0 <= x < len(BOARD_TEMPLATE[y]) \
+            and BOARD_TEMPLATE[y][x] == SPOT
+    
+    def neighbours(x, y):
+        return [(nx, ny) for nx, ny in ((x + 2, y), (x - 2, y), (x, y + 1), (x, y - 1))
+                if is_spot(nx, ny)]
+    
+    ring = [P1START]
+    prev, coords = P1START, neighbours(*P1START)[0]
+    while coords != P1START:
+        ring.append(coords)
+        prev, coords = coords, [n for n in neighbours(*coords) if n != prev][0]
+    
+    # Shoelace sum is positive for a clockwise walk when y points down
+    area = sum(x0 * y1 - x1 * y0
+               for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]))
+    if area < 0:
+        ring = ring[:1] + ring[:0:-1]
+    return tuple(ring)
+
+
+TRACK = _build_track()
+TRACK_LENGTH = len(TRACK)
+
+# Every node's board coordinates, ring first, then the final home slots and the center hole
+NODE_COORDS = TRACK + tuple(pos for player in range(1, 5) for pos in PLAYER_FINAL_HOMES[player]) \
+    + (CENTER_HOLE,)
+NODE_INDEX = {pos: node for node, pos in enumerate(NODE_COORDS)}
+NUM_NODES = len(NODE_COORDS)
+CENTER_INDEX = NODE_INDEX[CENTER_HOLE]
+STAR_HOLE_INDICES = tuple(NODE_INDEX[pos] for pos in STAR_HOLES)
+
+# Per-player node lookups
+PLAYER_START_INDEX = {player: NODE_INDEX[pos] for player, pos in PLAYER_STARTS.items()}
+PLAYER_HOME_ENTRY_INDEX = {player: NODE_INDEX[stretch[0]]
+                           for player, stretch in PLAYER_HOME_STRETCHES.items()}
+# Ring distance from a player's start to the first spot of their home stretch
+PLAYER_HOME_ENTRY_OFFSET = {player: (PLAYER_HOME_ENTRY_INDEX[player] - PLAYER_START_INDEX[player]) % TRACK_LENGTH
+                            for player in PLAYER_STARTS}
+PLAYER_FINAL_HOME_INDICES = {player: tuple(NODE_INDEX[pos] for pos in PLAYER_FINAL_HOMES[player])
+                             for player in PLAYER_FINAL_HOMES}
+
+
+def _build_walks(player: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Build the full forward walk from every node for one player.
+    
+    A marble on its own home stretch or final home follows the home path,
+    anywhere else it follows the ring. The walk from a node lists that node
+    followed by every node reached one step at a time until the last final
+    home slot, so walk[steps] is the destination after `steps` moves.
+    Other players' final home slots are dead ends for this player.
+    
+    Args:
+        player: Player number (1-4)
+    
+    Returns:
+        Tuple indexed by node of walks (tuples of nodes)
+    """
+    home_path = [NODE_INDEX[pos] for pos in PLAYER_HOME_STRETCHES[player]] + \
+        list(PLAYER_FINAL_HOME_INDICES[player])
+    successor = [None] * NUM_NODES
+    for node in range(TRACK_LENGTH):
+        successor[node] = (node + 1) % TRACK_LENGTH
+    for node, nxt in zip(home_path, home_path[1:]):
+        successor[node] = nxt
+    
+    walks = []
+    for node in range(NUM_NODES):
+        walk = [node]
+        while successor[walk[-1]] is not None:
+            walk.append(successor[walk[-1]])
+        walks.append(tuple(walk))
+    return tuple(walks)
+
+
+_WALKS = {player: _build_walks(player) for player in PLAYER_STARTS}
+
+# Coordinate successor tables backing get_next_position / get_next_home_position
+_NEXT_COORDS = {pos: TRACK[(node + 1) % TRACK_LENGTH] for node, pos in enumerate(TRACK)}
+_HOME_NEXT_COORDS = {
+    player: dict(zip(PLAYER_HOME_STRETCHES[player] + PLAYER_FINAL_HOMES[player],
+                     (PLAYER_HOME_STRETCHES[player] + PLAYER_FINAL_HOMES[player])[1:]))
+    for player in PLAYER_STARTS
+}
+
+
+def advance(player: int, pos_index: int, steps: int) -> Optional[int]:
+    """
+    Move a node forward for a player in O(1).
+    
+    Args:
+        player: Player number (1-4)
+        pos_index: Current node index
+        steps: Number of spaces to move
+    
+    Returns:
+        Destination node index, or None if the move overshoots the final home
+    """
+    walk = _WALKS[player][pos_index]
+    return walk[steps] if steps < len(walk) else None
+
+
+# Shortcut move graph
+# With shortcuts on, a move is a path through a directed graph rather than a
+# walk: the ring and home path edges of _WALKS plus these extra edges.
+EDGE_STEP = 0           # one space along the ring or the player's home path
+EDGE_STAR = 1           # star hole to the next star hole clockwise
+EDGE_CENTER_IN = 2      # star hole into the center hole
+EDGE_CENTER_OUT = 3     # center hole out to any star hole
+
+# The star hole each player leaves the star circuit from: the last one
+# before their home stretch, so a marble can't hop past its own home
+PLAYER_EXIT_STAR_INDEX = {
+    player: min(STAR_HOLE_INDICES,
+                key=lambda star: (PLAYER_HOME_ENTRY_INDEX[player] - star) % TRACK_LENGTH)
+    for player in PLAYER_STARTS
+}
+
+# Where a move is along its path, which decides the edges it may take next
+_PHASE_START = 0        # no step taken yet
+_PHASE_STAR = 1         # only star-to-star hops so far
+_PHASE_WALK = 2         # has stepped along the ring or home path
+_PHASE_DONE = 3         # entered or left the center hole; the move must end here
+
+
+def _build_move_graph(player: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """
+    Build the directed move graph for one player.
+    
+    Args:
+        player: Player number (1-4)
+    
+    Returns:
+        Tuple indexed by node of outgoing edges as (next node, edge kind)
+        tuples, the EDGE_STEP edge first
+    """
+    next_star = dict(zip(STAR_HOLE_INDICES, STAR_HOLE_INDICES[1:] + STAR_HOLE_INDICES[:1]))
+    graph = []
+    for node in range(NUM_NODES):
+        walk = _WALKS[player][node]
+        edges = [(walk[1], EDGE_STEP)] if len(walk) > 1 else []
+        if node in next_star:
+            if node != PLAYER_EXIT_STAR_INDEX[player]:
+                edges.append((next_star[node], EDGE_STAR))
+            edges.append((CENTER_INDEX, EDGE_CENTER_IN))
+        elif node == CENTER_INDEX:
+            edges.extend((star, EDGE_CENTER_OUT) for star in STAR_HOLE_INDICES)
+        graph.append(tuple(edges))
+    return tuple(graph)
+
+
+def _build_routes(player: int, shortcuts: bool = True,
+                  exact_home: bool = True) -> Tuple[Tuple[Tuple[Tuple[int, Tuple[int, ...]], ...], ...], ...]:
+    """
+    Find every move for one player with a bounded BFS over the move graph.
+    
+    A move takes exactly `roll` edges of the move graph:
+      - star hops only while every earlier step was a star hop, so a
+        marble must start the move on a star hole to travel the circuit
+      - entering the center hole only as the last step (exact count)
+      - leaving the center hole only with a roll of 1
+    
+    Args:
+        player: Player number (1-4)
+        shortcuts: If False, only EDGE_STEP edges are used, so each move
+                   is the plain walk
+        exact_home: If False, a move that runs out of path on the last
+                    final home spot stops there instead of being dropped
+    
+    Returns:
+        Tuple indexed by node, then by roll (0-6), of (destination, path)
+        tuples; path lists the nodes entered, destination last. The
+        plain walk, when there is one, comes first.
+    """
+    graph = MOVE_GRAPH[player]
+    last_home = PLAYER_FINAL_HOME_INDICES[player][-1]
+    routes = []
+    for start in range(NUM_NODES):
+        by_roll = [()]
+        frontier = [(start, _PHASE_START, ())]
+        for _ in range(6):
+            reached = []
+            for node, phase, path in frontier:
+                if phase == _PHASE_DONE:
+                    continue
+                if node == last_home and path and not exact_home:
+                    reached.append((node, phase, path))
+                    continue
+                for nxt, kind in graph[node]:
+                    if kind != EDGE_STEP and not shortcuts:
+                        continue
+                    if kind == EDGE_STEP:
+                        new_phase = _PHASE_WALK
+                    elif kind == EDGE_STAR:
+                        if phase == _PHASE_WALK:
+                            continue
+                        new_phase = _PHASE_STAR
+                    elif kind == EDGE_CENTER_OUT and phase != _PHASE_START:
+                        continue
+                    else:
+                        new_phase = _PHASE_DONE
+                    reached.append((nxt, new_phase, path + (nxt,)))
+            by_roll.append(tuple((path[-1], path) for _, _, path in reached))
+            frontier = reached
+        routes.append(tuple(by_roll))
+    return tuple(routes)
+
+
+MOVE_GRAPH = {player: _build_move_graph(player) for player in PLAYER_STARTS}
+
+
+class AggravationRules:
+    """
+    A house rule variant.
+    
+    The engine compiles each distinct set of rules once into move tables
+    (see _compile_rules) when a game is created. Moves under rules that
+    only ever walk (see _RuleTables.walk_only) are checked along the
+    plain walk; the others loop over their precomputed routes. Changing a rules object afterwards
+    doesn't affect games already created with it.
+    """
+    __slots__ = ('exit_rolls', 'exact_home', 'capture_on_start', 'shortcuts')
+    
+    def __init__(self, exit_rolls: Tuple[int, ...] = (1, 6), exact_home: bool = True,
+                 capture_on_start: bool = True, shortcuts: bool = False):
+        """
+        Create a rule variant; the defaults are the standard rules.
+        
+        Args:
+            exit_rolls: Rolls that move a marble from home to the start
+            exact_home: If True, a roll that would overshoot the last final
+                        home spot can't be used; if False the marble stops
+                        on the last spot
+            capture_on_start: If False, a marble on any start spot can't be
+                              aggravated, so moves landing on an occupied
+                              start spot are blocked
+            shortcuts: Play the star hole and center hole shortcuts
+        
+        Raises:
+            ValueError: If an exit roll isn't a die face
+        """
+        exit_rolls = tuple(sorted(set(exit_rolls)))
+        if not exit_rolls or not 1 <= exit_rolls[0] <= exit_rolls[-1] <= 6:
+            raise ValueError(f"Exit rolls must be die faces, got {exit_rolls}")
+        self.exit_rolls = exit_rolls
+        self.exact_home = exact_home
+        self.capture_on_start = capture_on_start
+        self.shortcuts = shortcuts
+    
+    def _key(self) -> tuple:
+        return (self.exit_rolls, self.exact_home, self.capture_on_start, self.shortcuts)
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AggravationRules) and self._key() == other._key()
+    
+    def __hash__(self) -> int:
+        return hash(self._key())
+    
+    def __repr__(self) -> str:
+        return (f"AggravationRules(exit_rolls={self.exit_rolls}, exact_home={self.exact_home}, "
+                f"capture_on_start={self.capture_on_start}, shortcuts={self.shortcuts})")
+    
+    def to_dict(self) -> dict:
+        """Serialize the rules for a save file."""
+        return {
+            'exit_rolls': list(self.exit_rolls),
+            'exact_home': self.exact_home,
+            'capture_on_start': self.capture_on_start,
+            'shortcuts': self.shortcuts
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AggravationRules':
+        """Create rules from to_dict() output; missing keys take the standard rules."""
+        return cls(**data)
+
+
+STANDARD_RULES = AggravationRules()
+
+# Named variants, e.g. for sweeping balance simulations over house rules
+RULE_VARIANTS = {
+    'standard': STANDARD_RULES,
+    'exit-on-one': AggravationRules(exit_rolls=(1,)),
+    'overshoot-home': AggravationRules(exact_home=False),
+    'safe-start': AggravationRules(capture_on_start=False),
+    'shortcuts': AggravationRules(shortcuts=True),
+}
+
+
+class _RuleTables:
+    """
+    Move tables compiled from one AggravationRules, shared by every game
+    playing those rules.
+    
+    routes[player][node][roll] lists the (destination, path) tuples of
+    every move (see _build_routes); protected[node] is True for nodes
+    where a marble can't be aggravated, so moves can't land there while
+    they are occupied; walk_only is True when every move is the plain
+    walk, which lets get_valid_moves_all_rolls() share paths across rolls.
+    """
+    __slots__ = ('exit_rolls', 'routes', 'protected', 'walk_only')
+    
+    def __init__(self, rules: AggravationRules):
+        self.exit_rolls = frozenset(rules.exit_rolls)
+        self.routes = {player: _build_routes(player, rules.shortcuts, rules.exact_home)
+                       for player in PLAYER_STARTS}
+        start_nodes = set(PLAYER_START_INDEX.values())
+        self.protected = tuple(not rules.capture_on_start and node in start_nodes
+                               for node in range(NUM_NODES))
+        self.walk_only = not rules.shortcuts and rules.exact_home and rules.capture_on_start
+
+
+# Compiled tables by rules, filled in as games with new rules are created
+_RULE_TABLES: Dict[AggravationRules, _RuleTables] = {}
+
+
+def _compile_rules(rules: AggravationRules) -> _RuleTables:
+    """Get the move tables for a set of rules, compiling them the first time."""
+    tables = _RULE_TABLES.get(rules)
+    if tables is None:
+        tables = _RULE_TABLES[AggravationRules(**rules.to_dict())] = _RuleTables(rules)
+    return tables
+
+
+def split_action(action: Union[int, Tuple[int, int]]) -> Tuple[int, Optional[int]]:
+    """
+    Split an entry of AggravationGame.get_actions() into (marble_idx,
+    to_node); to_node is None for a plain marble index, whose move has
+    only the one destination.
+    """
+    return action if type(action) is tuple else (action, None)
+
+
+def shortcut_destinations(player: int, pos_index: int, steps: int) -> List[int]:
+    """
+    Every node a marble can reach in exactly `steps` moves under the
+    shortcut rules, ignoring other marbles.
+    
+    Args:
+        player: Player number (1-4)
+        pos_index: Current node index
+        steps: Number of spaces to move (1-6)
+    
+    Returns:
+        Destination node indices, the plain walk's destination first
+    """
+    if not 1 <= steps <= 6:
+        return []
+    destinations = []
+    routes = _compile_rules(RULE_VARIANTS['shortcuts']).routes[player]
+    for dest, _ in routes[pos_index][steps]:
+        if dest not in destinations:
+            destinations.append(dest)
+    return destinations
+
+
+# Compact game state
+# All mutable state lives in one signed-byte array so a game is ~50 bytes of
+# data and copies with a single memcpy. Positions are stored as node codes
+# (see NODE_COORDS) with OFF_BOARD meaning "in the waiting home".
+OFF_BOARD = -1
+
+# Offsets into the state array; per-player blocks are indexed by (player - 1)
+_MARBLES = 0        # 16 marble nodes, 4 per player
+_END_HOME = 16      # 16 final home records, 4 per player
+_END = 32           # node of each player's last moved marble
+_HOME = 36          # marbles waiting in each player's starting home
+_START_OCCUPIED = 40
+_CURRENT_PLAYER = 44
+_WINNER = 45        # 0 when there is no winner
+_GAME_OVER = 46
+_STATE_SIZE = 47
+
+_INITIAL_STATE = array('b', [OFF_BOARD] * 36 + [4] * 4 + [0] * 4 + [1, 0, 0])
+_EMPTY_OCCUPANCY = array('H', bytes(2 * NUM_NODES))
+
+# Dice
+# roll_dice() draws from a random source: the random module (default), a
+# random.Random or a NumPy Generator. With a dice buffer, rolls are drawn
+# in blocks (DICE_BUFFER_SIZE is a good size) and served from a list, which
+# saves a Python-level RNG call per roll.
+DICE_BUFFER_SIZE = 4096
+_DIE_FACES = (1, 2, 3, 4, 5, 6)
+
+
+def _die_roller(rng) -> Callable[[], int]:
+    """Return a function rolling one die from rng."""
+    if hasattr(rng, 'integers'):
+        return lambda: int(rng.integers(1, 7))
+    return lambda: rng.randint(1, 6)
+
+
+def _draw_dice(rng, count: int) -> List[int]:
+    """Draw a block of count dice from rng in one call."""
+    if hasattr(rng, 'integers'):
+        return rng.integers(1, 7, size=count).tolist()
+    return rng.choices(_DIE_FACES, k=count)
+
+
+# Zobrist keys
+# One 64-bit key per (player, node) for marbles, per waiting-home count and
+# per side-to-move. Final home records and start flags are keyed as well
+# since they change which moves are legal. The seed is fixed so a position
+# hashes the same in every process. Tables are indexed by the stored value;
+# node tables end with a zero key so OFF_BOARD (-1) adds nothing.
+_zobrist_rng = random.Random(0x5A0B)
+
+
+def _zobrist_keys(count: int) -> List[int]:
+    return [_zobrist_rng.getrandbits(64) for _ in range(count)]
+
+
+_Z_MARBLE = {player: _zobrist_keys(NUM_NODES) + [0] for player in PLAYER_STARTS}
+_Z_END_HOME = {player: _zobrist_keys(NUM_NODES) + [0] for player in PLAYER_STARTS}
+_Z_HOME = {player: _zobrist_keys(5) for player in PLAYER_STARTS}
+_Z_START_OCCUPIED = {player: [0] + _zobrist_keys(1) for player in PLAYER_STARTS}
+_Z_TURN = [0] + _zobrist_keys(4)
+
+
+def _build_zobrist_table() -> List[Optional[List[int]]]:
+    """
+    Map each state offset to its key table.
+    
+    Returns:
+        List of key tables indexed by state offset, None for fields left out
+        of the hash (last moved marble, winner, game over)
+    """
+    table = [None] * _STATE_SIZE
+    for player in PLAYER_STARTS:
+        base = (player - 1) * 4
+        for k in range(4):
+            table[_MARBLES + base + k] = _Z_MARBLE[player]
+            table[_END_HOME + base + k] = _Z_END_HOME[player]
+        table[_HOME + player - 1] = _Z_HOME[player]
+        table[_START_OCCUPIED + player - 1] = _Z_START_OCCUPIED[player]
+    table[_CURRENT_PLAYER] = _Z_TURN
+    return table
+
+
+_ZOBRIST = _build_zobrist_table()
+
+
+def _zobrist_hash(state: array) -> int:
+    """Hash a state array from scratch (the game keeps its hash incrementally)."""
+    h = 0
+    for idx, keys in enumerate(_ZOBRIST):
+        if keys is not None:
+            h ^= keys[state[idx]]
+    return h
+
+
+_INITIAL_HASH = _zobrist_hash(_INITIAL_STATE)
+
+
+def _encode(pos) -> int:
+    """Convert an (x, y) position, (None, None) or None to a node code."""
+    if pos is None or pos == (None, None):
+        return OFF_BOARD
+    try:
+        return NODE_INDEX[tuple(pos)]
+    except (KeyError, TypeError):
+        raise ValueError(f"Position {pos} is not a board position")
+
+
+def _decode(node: int) -> Tuple[int, int]:
+    """Convert a node code back to an (x, y) position or (None, None)."""
+    return NODE_COORDS[node] if node >= 0 else (None, None)
+
+
+class _NodeView:
+    """
+    Live list-like view of 4 consecutive node codes in a game's state array.
+    
+    Reading yields (x, y) tuples and assigning encodes them, so code written
+    against the old p1_marbles/p1_end_home lists keeps working unchanged.
+    """
+    __slots__ = ('_game', '_base')
+    
+    def __init__(self, game: 'AggravationGame', base: int):
+        self._game = game
+        self._base = base
+    
+    def _codes(self) -> array:
+        return self._game._state[self._base:self._base + 4]
+    
+    def __len__(self) -> int:
+        return 4
+    
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [_decode(node) for node in self._codes()[idx]]
+        if not -4 <= idx < 4:
+            raise IndexError('view index out of range')
+        return _decode(self._game._state[self._base + idx % 4])
+    
+    def __setitem__(self, idx, pos):
+        if not -4 <= idx < 4:
+            raise IndexError('view assignment index out of range')
+        self._store(self._base + idx % 4, _encode(pos))
+    
+    def _store(self, index: int, node: int):
+        self._game._write(index, node)
+    
+    def __iter__(self):
+        return iter([_decode(node) for node in self._codes()])
+    
+    def __contains__(self, pos) -> bool:
+        return pos in list(self)
+    
+    def index(self, pos) -> int:
+        return list(self).index(pos)
+    
+    def count(self, pos) -> int:
+        return list(self).count(pos)
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (_NodeView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class _MarbleView(_NodeView):
+    """Marble slot view; writes go through the game so its indexes stay in sync."""
+    __slots__ = ()
+    
+    def _store(self, index: int, node: int):
+        self._game._move_marble(index, node)
+
+
+def _marbles_property(player: int) -> property:
+    """Build the p<N>_marbles property for one player."""
+    base = _MARBLES + (player - 1) * 4
+    
+    def fget(self):
+        return _MarbleView(self, base)
+    
+    def fset(self, positions):
+        nodes = [_encode(pos) for pos in positions]
+        for slot in range(4):
+            self._move_marble(base + slot, nodes[slot])
+    
+    return property(fget, fset, doc=f"Player {player} marble positions (live view)")
+
+
+def _end_home_property(player: int) -> property:
+    """Build the p<N>_end_home property for one player."""
+    base = _END_HOME + (player - 1) * 4
+    
+    def fget(self):
+        return _NodeView(self, base)
+    
+    def fset(self, positions):
+        nodes = [_encode(pos) for pos in positions]
+        for k in range(4):
+            self._write(base + k, nodes[k])
+    
+    return property(fget, fset, doc=f"Player {player} final home entries (live view)")
+
+
+def _home_property(player: int) -> property:
+    """Build the p<N>_home property; the waiting home is stored as a count."""
+    idx = _HOME + player - 1
+    
+    def fget(self):
+        return PLAYER_STARTING_HOMES[player][:self._state[idx]]
+    
+    def fset(self, home):
+        self._write(idx, len(home))
+    
+    return property(fget, fset, doc=f"Player {player} marbles in home base")
+
+
+def _end_property(player: int) -> property:
+    """Build the p<N>_end property for one player."""
+    idx = _END + player - 1
+    
+    def fget(self):
+        return _decode(self._state[idx])
+    
+    def fset(self, pos):
+        self._state[idx] = _encode(pos)
+    
+    return property(fget, fset, doc=f"Player {player} last moved marble position")
+
+
+def _start_occupied_property(player: int) -> property:
+    """Build the p<N>_start_occupied property for one player."""
+    idx = _START_OCCUPIED + player - 1
+    
+    def fget(self):
+        return bool(self._state[idx])
+    
+    def fset(self, occupied):
+        self._write(idx, 1 if occupied else 0)
+    
+    return property(fget, fset, doc=f"Player {player} start position flag")
+
+
+class _PlayerData:
+    """
+    Static per-player lookup data, built once at import and shared by all games.
+    
+    Holds the player's offsets into the state array plus the board data as
+    frozensets for constant-time membership tests. Live values (marbles,
+    home count, flags) are read from a game's state array via the offsets.
+    """
+    __slots__ = ('player', 'base', 'marbles_at', 'end_home_at', 'end_idx', 'home_idx',
+                 'start_occupied_idx', 'own_mask', 'start_pos', 'start_node',
+                 'starting_home', 'home_stretch', 'home_stretch_nodes',
+                 'final_home', 'final_home_nodes', 'walks')
+    
+    def __init__(self, player: int):
+        self.player = player
+        self.base = (player - 1) * 4
+        self.marbles_at = _MARBLES + self.base
+        self.end_home_at = _END_HOME + self.base
+        self.end_idx = _END + player - 1
+        self.home_idx = _HOME + player - 1
+        self.start_occupied_idx = _START_OCCUPIED + player - 1
+        self.own_mask = 0xF << self.marbles_at  # this player's bits in the occupancy index
+        self.start_pos = PLAYER_STARTS[player]
+        self.start_node = PLAYER_START_INDEX[player]
+        self.starting_home = PLAYER_STARTING_HOMES[player]
+        self.home_stretch = frozenset(PLAYER_HOME_STRETCHES[player])
+        self.home_stretch_nodes = frozenset(NODE_INDEX[pos] for pos in PLAYER_HOME_STRETCHES[player])
+        self.final_home = frozenset(PLAYER_FINAL_HOMES[player])
+        self.final_home_nodes = frozenset(PLAYER_FINAL_HOME_INDICES[player])
+        self.walks = _WALKS[player]
+
+
+_PLAYER_DATA = {player: _PlayerData(player) for player in PLAYER_STARTS}
+
+
+class UndoRecord:
+    """
+    Everything apply_move() changed, so undo() can restore the exact
+    previous state without copying the game.
+    
+    State offsets and node codes only; a victim_slot of -1 means no capture
+    and an end_home_idx of -1 means no final home record was written.
+    """
+    __slots__ = ('player', 'slot', 'from_node', 'prev_end', 'prev_home',
+                 'prev_start_occupied', 'end_home_idx', 'victim_slot',
+                 'victim_node', 'victim_prev_home', 'victim_prev_start_occupied')
+
 
 class AggravationGame:
     """
     Pure game logic for Aggravation board game.
     No pygame dependencies - enables headless testing and simulation.
+    
+    All state is held in a compact node-code array (see _INITIAL_STATE);
+    the p1_marbles-style attributes are properties over it.
     """
     
-    def __init__(self, num_players: int = 4):
+    __slots__ = ('num_players', 'debug', 'rules', '_tables', '_state', '_occupancy', '_hash',
+                 '_rng', '_roll_die', '_dice_buffer', '_dice')
+    
+    def __init__(self, num_players: int = 4, debug: bool = False,
+                 rng=None, dice_buffer: int = 0, rules: Optional[AggravationRules] = None):
         """
         Initialize game state.
         
         Args:
             num_players: Number of players (1-4)
+            debug: If True, verify the occupancy index and Zobrist hash
+                   against a full recompute after every state change
+            rng: Source of dice rolls: a random.Random, a NumPy Generator
+                 or an int seed for a new random.Random. None uses the
+                 global random module.
+            dice_buffer: If nonzero, draw dice from rng this many at a time
+                         and serve them from a buffer (see DICE_BUFFER_SIZE)
+            rules: House rule variant (see AggravationRules), compiled into
+                   the move tables here; None plays the standard rules
         """
         self.num_players = num_players
-        
-        # Player 1 state
-        self.p1_home = PLAYER_STARTING_HOMES[1].copy()  # Marbles in home base
-        self.p1_marbles = [(None, None), (None, None), (None, None), (None, None)]  # Marble positions on board
-        self.p1_end = (None, None)  # Last position of player 1's marble
-        self.p1_end_home = [(None, None), (None, None), (None, None), (None, None)]  # Final home positions
-        self.p1_start_occupied = False
-        
-        # Player 2 state
-        self.p2_home = PLAYER_STARTING_HOMES[2].copy()
-        self.p2_marbles = [(None, None), (None, None), (None, None), (None, None)]
-        self.p2_end = (None, None)
-        self.p2_end_home = [(None, None), (None, None), (None, None), (None, None)]
-        self.p2_start_occupied = False
-        
-        # Player 3 state
-        self.p3_home = PLAYER_STARTING_HOMES[3].copy()
-        self.p3_marbles = [(None, None), (None, None), (None, None), (None, None)]
-        self.p3_end = (None, None)
-        self.p3_end_home = [(None, None), (None, None), (None, None), (None, None)]
-        self.p3_start_occupied = False
-        
-        # Player 4 state
-        self.p4_home = PLAYER_STARTING_HOMES[4].copy()
-        self.p4_marbles = [(None, None), (None, None), (None, None), (None, None)]
-        self.p4_end = (None, None)
-        self.p4_end_home = [(None, None), (None, None), (None, None), (None, None)]
-        self.p4_start_occupied = False
-        
-        # Game state
-        self.current_player = 1
-        self.game_over = False
-        self.winner = None
+        self.debug = debug
+        self.rules = rules if rules is not None else STANDARD_RULES
+        self._tables = _compile_rules(self.rules)
+        if rng is None:
+            rng = random
+        elif isinstance(rng, int):
+            rng = random.Random(rng)
+        self._rng = rng
+        self._roll_die = _die_roller(rng)
+        self._dice_buffer = dice_buffer
+        self._dice = [] if dice_buffer else None
+        self._state = array('b', _INITIAL_STATE)
+        # Occupancy index: bitmask of marble slots (bit = state offset) per node
+        self._occupancy = array('H', _EMPTY_OCCUPANCY)
+        # Zobrist hash of the position, kept in step by _write/_move_marble
+        self._hash = _INITIAL_HASH
+    
+    # Per-player state views (backward compatible with the old list attributes)
+    p1_home = _home_property(1)
+    p1_marbles = _marbles_property(1)
+    p1_end = _end_property(1)
+    p1_end_home = _end_home_property(1)
+    p1_start_occupied = _start_occupied_property(1)
+    
+    p2_home = _home_property(2)
+    p2_marbles = _marbles_property(2)
+    p2_end = _end_property(2)
+    p2_end_home = _end_home_property(2)
+    p2_start_occupied = _start_occupied_property(2)
+    
+    p3_home = _home_property(3)
+    p3_marbles = _marbles_property(3)
+    p3_end = _end_property(3)
+    p3_end_home = _end_home_property(3)
+    p3_start_occupied = _start_occupied_property(3)
+    
+    p4_home = _home_property(4)
+    p4_marbles = _marbles_property(4)
+    p4_end = _end_property(4)
+    p4_end_home = _end_home_property(4)
+    p4_start_occupied = _start_occupied_property(4)
+    
+    # Game state
+    @property
+    def current_player(self) -> int:
+        return self._state[_CURRENT_PLAYER]
+    
+    @current_player.setter
+    def current_player(self, player: int):
+        self._write(_CURRENT_PLAYER, player)
+    
+    @property
+    def winner(self) -> Optional[int]:
+        return self._state[_WINNER] or None
+    
+    @winner.setter
+    def winner(self, player: Optional[int]):
+        self._state[_WINNER] = player or 0
+    
+    @property
+    def game_over(self) -> bool:
+        return bool(self._state[_GAME_OVER])
+    
+    @game_over.setter
+    def game_over(self, over: bool):
+        self._state[_GAME_OVER] = 1 if over else 0
+    
+    @property
+    def rng(self):
+        """Random source the dice are rolled from."""
+        return self._rng
     
     def roll_dice(self) -> int:
         """
@@ -124,7 +856,12 @@ class AggravationGame:
         Returns:
             Random integer between 1 and 6 (inclusive)
         """
-        return random.randint(1, 6)
+        dice = self._dice
+        if dice is None:
+            return self._roll_die()
+        if not dice:
+            dice.extend(_draw_dice(self._rng, self._dice_buffer))
+        return dice.pop()
     
     def get_next_position(self, x: int, y: int) -> Tuple[int, int]:
         """
@@ -133,49 +870,16 @@ class AggravationGame:
         Args:
             x: Current x coordinate
             y: Current y coordinate
-            
+        
         Returns:
             Tuple of (next_x, next_y) coordinates
         """
+        coords = _NEXT_COORDS.get((x, y))
+        if coords is not None:
+            return coords
+        
         # Validate current position is on the board
         assert BOARD_TEMPLATE[y][x] == SPOT, 'Current spot must be a valid board position (#)'
-        
-        # Corner positions - hard coded for the 12 corners
-        if (x, y) == (19, 1):     # p1 outside corner
-            return (19, 2)
-        elif (x, y) == (19, 6):   # p1 inside corner
-            return (21, 6)
-        elif (x, y) == (29, 6):   # p2 outside corner
-            return (29, 7)
-        elif (x, y) == (29, 10):  # p2 outside corner
-            return (27, 10)
-        elif (x, y) == (19, 10):  # p2 inside corner
-            return (19, 11)
-        elif (x, y) == (19, 15):  # p3 outside corner
-            return (17, 15)
-        elif (x, y) == (11, 15):  # p3 outside corner
-            return (11, 14)
-        elif (x, y) == (11, 10):  # p3 inside corner
-            return (9, 10)
-        elif (x, y) == (1, 10):   # p4 outside corner
-            return (1, 9)
-        elif (x, y) == (1, 6):    # p4 outside corner
-            return (3, 6)
-        elif (x, y) == (11, 6):   # p4 inside corner
-            return (11, 5)
-        elif (x, y) == (11, 1):   # p1 outside corner
-            return (13, 1)
-        # Horizontal movements
-        elif y == 1 or y == 6:    # horizontal top side, move right/clockwise
-            return (x + 2, y)
-        elif y == 10 or y == 15:  # horizontal bottom side, move left/clockwise
-            return (x - 2, y)
-        # Vertical movements
-        elif x == 19 or x == 29:  # vertical right side, move down/clockwise
-            return (x, y + 1)
-        elif x == 1 or x == 11:   # vertical left side, move up/clockwise
-            return (x, y - 1)
-        
         # Should never reach here if board is valid
         raise ValueError(f"Invalid position ({x}, {y}) - not on board path")
     
@@ -187,205 +891,181 @@ class AggravationGame:
             player: Player number (1-4)
             x: Current x coordinate
             y: Current y coordinate
-            
+        
         Returns:
             Tuple of (next_x, next_y) coordinates in home area
         """
+        coords = _HOME_NEXT_COORDS.get(player, {}).get((x, y))
+        if coords is not None:
+            return coords
+        
         # Validate current position is valid (either SPOT or player number)
         assert BOARD_TEMPLATE[y][x] in [SPOT, '1', '2', '3', '4'], 'Current spot must be a valid board position'
-        
-        # Player 1 home stretch path
-        # Home stretch: (11,3) -> (11,2) -> (11,1) -> (13,1) -> (15,1)
-        # Final home: (15,2), (15,3), (15,4), (15,5)
-        if player == 1:
-            if (x, y) == (11, 3):
-                return (11, 2)
-            elif (x, y) == (11, 2):
-                return (11, 1)
-            elif (x, y) == (11, 1):
-                return (13, 1)
-            elif (x, y) == (13, 1):
-                return (15, 1)
-            elif (x, y) == (15, 1):
-                return (15, 2)
-            elif (x, y) == (15, 2):
-                return (15, 3)
-            elif (x, y) == (15, 3):
-                return (15, 4)
-            elif (x, y) == (15, 4):
-                return (15, 5)
-        
-        # Player 2 home stretch path
-        # Home stretch: (25,6) -> (27,6) -> (29,6) -> (29,7) -> (29,8) -> into final home
-        # Final home: (27,8), (25,8), (23,8), (21,8)
-        elif player == 2:
-            if (x, y) == (25, 6):
-                return (27, 6)
-            elif (x, y) == (27, 6):
-                return (29, 6)
-            elif (x, y) == (29, 6):
-                return (29, 7)
-            elif (x, y) == (29, 7):
-                return (29, 8)
-            elif (x, y) == (29, 8):
-                return (27, 8)
-            elif (x, y) == (27, 8):
-                return (25, 8)
-            elif (x, y) == (25, 8):
-                return (23, 8)
-            elif (x, y) == (23, 8):
-                return (21, 8)
-        
-        # Player 3 home stretch path  
-        # Home stretch: (19,13) -> (19,14) -> (19,15) -> (17,15) -> (15,15) -> into final home
-        # Final home: (15,14), (15,13), (15,12), (15,11)
-        elif player == 3:
-            if (x, y) == (19, 13):
-                return (19, 14)
-            elif (x, y) == (19, 14):
-                return (19, 15)
-            elif (x, y) == (19, 15):
-                return (17, 15)
-            elif (x, y) == (17, 15):
-                return (15, 15)
-            elif (x, y) == (15, 15):
-                return (15, 14)
-            elif (x, y) == (15, 14):
-                return (15, 13)
-            elif (x, y) == (15, 13):
-                return (15, 12)
-            elif (x, y) == (15, 12):
-                return (15, 11)
-        
-        # Player 4 home stretch path
-        # Home stretch: (5,10) -> (3,10) -> (1,10) -> (1,9) -> (1,8) -> into final home
-        # Final home: (3,8), (5,8), (7,8), (9,8)
-        elif player == 4:
-            if (x, y) == (5, 10):
-                return (3, 10)
-            elif (x, y) == (3, 10):
-                return (1, 10)
-            elif (x, y) == (1, 10):
-                return (1, 9)
-            elif (x, y) == (1, 9):
-                return (1, 8)
-            elif (x, y) == (1, 8):
-                return (3, 8)
-            elif (x, y) == (3, 8):
-                return (5, 8)
-            elif (x, y) == (5, 8):
-                return (7, 8)
-            elif (x, y) == (7, 8):
-                return (9, 8)
-        
         raise ValueError(f"Home position not implemented for player {player} at ({x}, {y})")
     
-    def _get_player_data(self, player: int) -> Dict:
+    def _get_player_data(self, player: int) -> _PlayerData:
         """
-        Get player-specific data (marbles, home stretch, final home, etc.)
+        Get player-specific data (state offsets, home stretch, final home, etc.)
         
         Args:
             player: Player number (1-4)
-            
+        
         Returns:
-            Dictionary with player data
-        """
-        if player == 1:
-            return {
-                'marbles': self.p1_marbles,
-                'home': self.p1_home,
-                'end_home': self.p1_end_home,
-                'start_pos': PLAYER_STARTS[1],
-                'start_occupied': self.p1_start_occupied,
-                'home_stretch': PLAYER_HOME_STRETCHES[1],
-                'final_home': PLAYER_FINAL_HOMES[1]
-            }
-        elif player == 2:
-            return {
-                'marbles': self.p2_marbles,
-                'home': self.p2_home,
-                'end_home': self.p2_end_home,
-                'start_pos': PLAYER_STARTS[2],
-                'start_occupied': self.p2_start_occupied,
-                'home_stretch': PLAYER_HOME_STRETCHES[2],
-                'final_home': PLAYER_FINAL_HOMES[2]
-            }
-        elif player == 3:
-            return {
-                'marbles': self.p3_marbles,
-                'home': self.p3_home,
-                'end_home': self.p3_end_home,
-                'start_pos': PLAYER_STARTS[3],
-                'start_occupied': self.p3_start_occupied,
-                'home_stretch': PLAYER_HOME_STRETCHES[3],
-                'final_home': PLAYER_FINAL_HOMES[3]
-            }
-        elif player == 4:
-            return {
-                'marbles': self.p4_marbles,
-                'home': self.p4_home,
-                'end_home': self.p4_end_home,
-                'start_pos': PLAYER_STARTS[4],
-                'start_occupied': self.p4_start_occupied,
-                'home_stretch': PLAYER_HOME_STRETCHES[4],
-                'final_home': PLAYER_FINAL_HOMES[4]
-            }
-        else:
+            Shared _PlayerData for the player (no per-call allocation)
+        """
+        pdata = _PLAYER_DATA.get(player)
+        if pdata is None:
             raise ValueError(f"Invalid player number: {player}")
+        return pdata
     
     def _set_start_occupied(self, player: int, occupied: bool):
         """Set the start_occupied flag for a player."""
-        if player == 1:
-            self.p1_start_occupied = occupied
-        elif player == 2:
-            self.p2_start_occupied = occupied
-        elif player == 3:
-            self.p3_start_occupied = occupied
-        elif player == 4:
-            self.p4_start_occupied = occupied
+        pdata = _PLAYER_DATA.get(player)
+        if pdata is not None:
+            self._write(pdata.start_occupied_idx, 1 if occupied else 0)
     
     def _set_end(self, player: int, pos: Tuple[int, int]):
         """Set the end position for a player."""
-        if player == 1:
-            self.p1_end = pos
-        elif player == 2:
-            self.p2_end = pos
-        elif player == 3:
-            self.p3_end = pos
-        elif player == 4:
-            self.p4_end = pos
+        pdata = _PLAYER_DATA.get(player)
+        if pdata is not None:
+            self._state[pdata.end_idx] = _encode(pos)
     
     def _get_end_home(self, player: int) -> List[Tuple[int, int]]:
-        """Get the end_home list for a player."""
-        if player == 1:
-            return self.p1_end_home
-        elif player == 2:
-            return self.p2_end_home
-        elif player == 3:
-            return self.p3_end_home
-        elif player == 4:
-            return self.p4_end_home
+        """Get the end_home list (live view) for a player."""
+        pdata = _PLAYER_DATA.get(player)
+        if pdata is not None:
+            return _NodeView(self, pdata.end_home_at)
         return []
     
+    def _write(self, index: int, value: int):
+        """
+        Store a hashed state field (home count, start flag, final home
+        record, side to move) and update the Zobrist hash.
+        """
+        keys = _ZOBRIST[index]
+        state = self._state
+        self._hash ^= keys[state[index]] ^ keys[value]
+        state[index] = value
+    
+    def _move_marble(self, slot: int, node: int):
+        """
+        Store a marble's node and keep the occupancy index and hash in sync.
+        Every marble write goes through here.
+        """
+        state = self._state
+        occupancy = self._occupancy
+        old_node = state[slot]
+        if old_node != OFF_BOARD:
+            occupancy[old_node] &= ~(1 << slot)
+        if node != OFF_BOARD:
+            occupancy[node] |= 1 << slot
+        keys = _ZOBRIST[slot]
+        self._hash ^= keys[old_node] ^ keys[node]
+        state[slot] = node
+    
+    def _marble_at(self, node: int) -> int:
+        """
+        Get the marble slot occupying a node in O(1).
+        
+        Args:
+            node: Node index to check
+        
+        Returns:
+            State offset of the first marble (in player order) among the
+            active players, or -1 if the node is empty
+        """
+        mask = self._occupancy[node] & ((1 << (self.num_players * 4)) - 1)
+        return (mask & -mask).bit_length() - 1
+    
+    def _home_slot(self, pdata: _PlayerData) -> int:
+        """
+        Get the slot of a marble waiting in the player's home.
+        
+        Returns:
+            State offset of the highest-numbered off-board marble, or -1
+        """
+        state = self._state
+        for slot in range(pdata.marbles_at + 3, pdata.marbles_at - 1, -1):
+            if state[slot] == OFF_BOARD:
+                return slot
+        return -1
+    
+    def _end_home_slot(self, pdata: _PlayerData, from_node: int) -> int:
+        """
+        Get the final home record to write when a marble lands in the final home.
+        
+        A marble already in the final home reuses its own record, so the
+        records always match the occupied final home spots.
+        
+        Returns:
+            State offset of the record, or -1 if none is free
+        """
+        state = self._state
+        match = from_node if from_node in pdata.final_home_nodes else OFF_BOARD
+        for i in range(pdata.end_home_at, pdata.end_home_at + 4):
+            if state[i] == match:
+                return i
+        return -1
+    
+    def _compute_occupancy(self) -> array:
+        """Rebuild the occupancy index from scratch."""
+        occupancy = array('H', bytes(2 * NUM_NODES))
+        for slot in range(_MARBLES, _MARBLES + 16):
+            node = self._state[slot]
+            if node != OFF_BOARD:
+                occupancy[node] |= 1 << slot
+        return occupancy
+    
+    def verify_occupancy(self) -> bool:
+        """
+        Check the incremental occupancy index against a full recompute.
+        
+        Returns:
+            True if the index matches the marble positions
+        """
+        return self._occupancy == self._compute_occupancy()
+    
+    @property
+    def zobrist_hash(self) -> int:
+        """64-bit Zobrist hash of the position, maintained incrementally."""
+        return self._hash
+    
+    def verify_hash(self) -> bool:
+        """
+        Check the incremental Zobrist hash against a full recompute.
+        
+        Returns:
+            True if the hash matches the current state
+        """
+        return self._hash == _zobrist_hash(self._state)
+    
+    def _check_debug(self):
+        """In debug mode, fail loudly if the occupancy index or hash drifted."""
+        if self.debug:
+            assert self.verify_occupancy(), 'Occupancy index out of sync with marble positions'
+            assert self.verify_hash(), 'Zobrist hash out of sync with game state'
+    
     def find_marble_at_position(self, position: Tuple[int, int]) -> Optional[Tuple[int, int]]:
         """
         Find if any marble occupies the given position.
         
         Args:
             position: (x, y) coordinate to check
-            
+        
         Returns:
             Tuple of (player_number, marble_index) if found, None otherwise
         """
         if position is None or position == (None, None):
             return None
         
-        for player in range(1, self.num_players + 1):
-            pdata = self._get_player_data(player)
-            for idx, marble_pos in enumerate(pdata['marbles']):
-                if marble_pos == position:
-                    return (player, idx)
-        return None
+        node = NODE_INDEX.get(position)
+        if node is None:
+            return None
+        self._check_debug()
+        slot = self._marble_at(node)
+        if slot < 0:
+            return None
+        return (slot // 4 + 1, slot % 4)
     
     def send_marble_home(self, player: int, marble_idx: int) -> Tuple[int, int]:
         """
@@ -394,30 +1074,26 @@ class AggravationGame:
         Args:
             player: Player number (1-4)
             marble_idx: Index of marble to send home (0-3)
-            
+        
         Returns:
             The position the marble was at before being sent home
         """
         pdata = self._get_player_data(player)
-        old_pos = pdata['marbles'][marble_idx]
+        state = self._state
+        slot = pdata.marbles_at + marble_idx
+        old_node = state[slot]
         
         # If was on start position, mark start as unoccupied
-        if old_pos == pdata['start_pos']:
-            self._set_start_occupied(player, False)
-        
-        # Set marble position to None (back in home waiting area)
-        pdata['marbles'][marble_idx] = (None, None)
-        
-        # Add marble back to home waiting list
-        starting_home = PLAYER_STARTING_HOMES[player]
-        if len(pdata['home']) < 4:
-            # Add an available starting home position back
-            for pos in starting_home:
-                if pos not in pdata['home']:
-                    pdata['home'].append(pos)
-                    break
+        if old_node == pdata.start_node:
+            self._write(pdata.start_occupied_idx, 0)
         
-        return old_pos
+        # Marble goes back to home waiting area
+        self._move_marble(slot, OFF_BOARD)
+        if state[pdata.home_idx] < 4:
+            self._write(pdata.home_idx, state[pdata.home_idx] + 1)
+        
+        self._check_debug()
+        return _decode(old_node)
     
     def is_safe_position(self, player: int, position: Tuple[int, int]) -> bool:
         """
@@ -427,12 +1103,12 @@ class AggravationGame:
         Args:
             player: Player number (1-4)
             position: (x, y) coordinate to check
-            
+        
         Returns:
             True if position is safe (in final home), False otherwise
         """
-        final_home = PLAYER_FINAL_HOMES.get(player, [])
-        return position in final_home
+        pdata = _PLAYER_DATA.get(player)
+        return pdata is not None and position in pdata.final_home
     
     def is_valid_move(self, player: int, marble_idx: int, dice_roll: int) -> bool:
         """
@@ -442,7 +1118,7 @@ class AggravationGame:
             player: Player number (1-4)
             marble_idx: Index of marble in player's marble array (0-3)
             dice_roll: Number rolled on die
-            
+        
         Returns:
             True if move is valid, False otherwise
         """
@@ -450,44 +1126,220 @@ class AggravationGame:
             pdata = self._get_player_data(player)
         except ValueError:
             return False
+        if not 0 <= marble_idx < 4:
+            return False
         
-        marbles = pdata['marbles']
-        end_home = pdata['end_home']
-        home_stretch = pdata['home_stretch']
-        final_home = pdata['final_home']
-        start_pos = marbles[marble_idx] if marble_idx < len(marbles) else None
+        state = self._state
+        node = state[pdata.marbles_at + marble_idx]
+        
+        # Can't move if marble is not on board
+        if node == OFF_BOARD:
+            return False
         
-        # Can't move if marble position is None (not on board)
-        if start_pos is None or start_pos == (None, None):
+        occupancy = self._occupancy
+        own_mask = pdata.own_mask
+        if self._tables.walk_only:
+            # Precomputed walk already follows the home path where it applies
+            walk = pdata.walks[node]
+            if dice_roll >= len(walk):
+                return False  # Can't move past end of home - invalid move (overshot)
+            for step in range(1, dice_roll + 1):
+                node = walk[step]
+                # Check if this position is occupied by player's own marble
+                if occupancy[node] & own_mask:
+                    return False  # Can't jump own marbles
+                # end_home only ever records final home slots
+                if node >= TRACK_LENGTH and node in state[pdata.end_home_at:pdata.end_home_at + 4]:
+                    return False  # Can't land on occupied home spot
+            return True
+        
+        # Precomputed routes already follow the home path and the rules' shortcuts
+        routes = self._tables.routes[player][node]
+        if not 0 < dice_roll < len(routes):
             return False
         
-        # Check if marble is already in final home - can still move within home
-        in_final_home = start_pos in final_home
-        
-        coords = start_pos
-        for move in range(dice_roll):
-            # Determine next position based on whether we're in/entering home
-            if in_final_home or coords in home_stretch:
-                # Use home path
-                try:
-                    coords = self.get_next_home_position(player, coords[0], coords[1])
-                    in_final_home = coords in final_home
-                except (ValueError, AssertionError):
-                    # Can't move past end of home - invalid move (overshot)
-                    return False
+        protected = self._tables.protected
+        # end_home only ever records final home slots
+        end_home = state[pdata.end_home_at:pdata.end_home_at + 4]
+        for dest, path in routes[dice_roll]:
+            for node in path:
+                # Check if this position is occupied by player's own marble
+                if occupancy[node] & own_mask:
+                    break  # Can't jump own marbles
+                if node >= TRACK_LENGTH and node in end_home:
+                    break  # Can't land on occupied home spot
             else:
-                coords = self.get_next_position(coords[0], coords[1])
-                # Check if we just entered home stretch
-                if coords in home_stretch:
-                    in_final_home = False  # Not in final home yet, but on home stretch
-            
-            # Check if this position is occupied by player's own marble
-            if coords in marbles or coords in end_home:
-                return False  # Can't jump own marbles or land on occupied home spot
+                if not (protected[dest] and occupancy[dest]):
+                    return True
         
-        return True
+        return False  # Overshot the final home, or every route is blocked
+    
+    def _can_leave_home(self, pdata: _PlayerData, dice_roll: int) -> bool:
+        """Check if the player can move a marble from home to the start with a roll."""
+        state = self._state
+        start = pdata.start_node
+        return dice_roll in self._tables.exit_rolls and state[pdata.home_idx] > 0 \
+            and not state[pdata.start_occupied_idx] \
+            and not (self._tables.protected[start] and self._occupancy[start])
+    
+    def _walk_destination(self, pdata: _PlayerData, node: int, dice_roll: int) -> int:
+        """
+        Destination of a marble's plain walk, for rules where every move is
+        the walk (_RuleTables.walk_only).
+        
+        Returns:
+            Destination node, or -1 if the walk overshoots the final home,
+            jumps an own marble or lands on an occupied final home spot
+        """
+        # Precomputed walk already follows the home path where it applies
+        walk = pdata.walks[node]
+        if not 0 < dice_roll < len(walk):
+            return -1
+        occupancy = self._occupancy
+        own_mask = pdata.own_mask
+        end_home = None
+        for step in range(1, dice_roll + 1):
+            node = walk[step]
+            if occupancy[node] & own_mask:
+                return -1  # Can't jump own marbles
+            if node >= TRACK_LENGTH:
+                # end_home only ever records final home slots
+                if end_home is None:
+                    end_home = self._state[pdata.end_home_at:pdata.end_home_at + 4]
+                if node in end_home:
+                    return -1  # Can't land on occupied home spot
+        return node
+    
+    def _route_destinations(self, pdata: _PlayerData, node: int, dice_roll: int) -> List[int]:
+        """
+        Legal destinations of a marble on a node.
+        
+        A destination is legal when at least one of its precomputed routes
+        doesn't jump an own marble or land on an occupied final home spot
+        (or an occupied protected node).
+        
+        Returns:
+            Destination nodes, the plain walk's destination first
+        """
+        if self._tables.walk_only:
+            dest = self._walk_destination(pdata, node, dice_roll)
+            return [dest] if dest >= 0 else []
+        routes = self._tables.routes[pdata.player][node]
+        if not 0 < dice_roll < len(routes):
+            return []
+        occupancy = self._occupancy
+        own_mask = pdata.own_mask
+        protected = self._tables.protected
+        end_home = self._state[pdata.end_home_at:pdata.end_home_at + 4]
+        destinations = []
+        for dest, path in routes[dice_roll]:
+            if dest in destinations or (protected[dest] and occupancy[dest]):
+                continue
+            for step_node in path:
+                if occupancy[step_node] & own_mask or (step_node >= TRACK_LENGTH and step_node in end_home):
+                    break
+            else:
+                destinations.append(dest)
+        return destinations
+    
+    def _resolve_destination(self, pdata: _PlayerData, node: int, dice_roll: int,
+                             to_node: Optional[int]) -> int:
+        """
+        Pick the destination of a move by a marble on the board, checking
+        the move on the way.
+        
+        Returns:
+            to_node if it is one of the marble's destinations, the first
+            destination if to_node is None, otherwise -1 (including when
+            the marble can't move at all)
+        """
+        if self._tables.walk_only:
+            dest = self._walk_destination(pdata, node, dice_roll)
+            return dest if to_node is None or to_node == dest else -1
+        destinations = self._route_destinations(pdata, node, dice_roll)
+        if to_node is None:
+            return destinations[0] if destinations else -1
+        return to_node if to_node in destinations else -1
+    
+    def get_destinations(self, player: int, marble_idx: int, dice_roll: int) -> List[int]:
+        """
+        Get every node a marble can move to with a roll.
+        
+        Under the standard rules this is at most the one node along the
+        walk; with shortcuts a marble on a star hole can also hop the star
+        circuit or enter the center hole.
+        
+        Args:
+            player: Player number (1-4)
+            marble_idx: Index of marble to move (0-3), or -1 to leave home
+            dice_roll: Number rolled on die
+        
+        Returns:
+            Destination node indices (see NODE_COORDS), the plain walk's
+            destination first; empty if the marble can't move
+        """
+        try:
+            pdata = self._get_player_data(player)
+        except ValueError:
+            return []
+        if marble_idx == -1:
+            return [pdata.start_node] if self._can_leave_home(pdata, dice_roll) else []
+        if not 0 <= marble_idx < 4:
+            return []
+        node = self._state[pdata.marbles_at + marble_idx]
+        if node == OFF_BOARD:
+            return []
+        return self._route_destinations(pdata, node, dice_roll)
+    
+    def get_move_options(self, player: int, dice_roll: int) -> List[Tuple[int, int]]:
+        """
+        Get every legal move for a roll, one entry per destination.
+        
+        Args:
+            player: Player number (1-4)
+            dice_roll: Number rolled on die
+        
+        Returns:
+            List of (marble_idx, to_node) tuples; marble_idx -1 moves a
+            marble from home to the start position
+        """
+        try:
+            pdata = self._get_player_data(player)
+        except ValueError:
+            return []
+        
+        options = []
+        if self._can_leave_home(pdata, dice_roll):
+            options.append((-1, pdata.start_node))
+        state = self._state
+        for idx in range(4):
+            node = state[pdata.marbles_at + idx]
+            if node != OFF_BOARD:
+                options.extend((idx, dest) for dest in self._route_destinations(pdata, node, dice_roll))
+        return options
+    
+    def get_actions(self, player: int, dice_roll: int) -> List[Union[int, Tuple[int, int]]]:
+        """
+        Get every legal move for a roll as actions for step().
+        
+        Under rules with shortcuts a marble can have several destinations,
+        so the moves are get_move_options() pairs; otherwise they are the
+        get_valid_moves() marble indices.
+        
+        Args:
+            player: Player number (1-4)
+            dice_roll: Number rolled on die
+        
+        Returns:
+            List of marble indices (-1 for out of home) or of
+            (marble_idx, to_node) tuples
+        """
+        if self.rules.shortcuts:
+            return self.get_move_options(player, dice_roll)
+        return self.get_valid_moves(player, dice_roll)
     
-    def execute_move(self, player: int, marble_idx: int, dice_roll: int) -> Dict:
+    def execute_move(self, player: int, marble_idx: int, dice_roll: int,
+                     to_node: Optional[int] = None) -> Dict:
         """
         Execute a move and update game state.
         
@@ -495,7 +1347,9 @@ class AggravationGame:
             player: Player number (1-4)
             marble_idx: Index of marble to move (0-3)
             dice_roll: Number of spaces to move
-            
+            to_node: Destination node (see get_destinations), or None for
+                     the first destination
+        
         Returns:
             Dictionary with move result:
             {
@@ -521,44 +1375,37 @@ class AggravationGame:
         except ValueError:
             result['message'] = f'Invalid player: {player}'
             return result
+        if not 0 <= marble_idx < 4:
+            result['message'] = f'Invalid marble index: {marble_idx}'
+            return result
         
-        marbles = pdata['marbles']
-        home_stretch = pdata['home_stretch']
-        final_home = pdata['final_home']
-        start_pos = pdata['start_pos']
-        old_pos = marbles[marble_idx]
+        state = self._state
+        slot = pdata.marbles_at + marble_idx
+        old_node = state[slot]
         
-        if old_pos is None or old_pos == (None, None):
+        if old_node == OFF_BOARD:
             result['message'] = 'Marble not on board'
             return result
         
-        # Validate move
-        if not self.is_valid_move(player, marble_idx, dice_roll):
-            result['message'] = "Invalid move - can't jump own marbles"
-            return result
-        
-        # Execute the move - track if we're in/entering home
-        coords = old_pos
-        in_final_home = coords in final_home
-        
-        for move in range(dice_roll):
-            # Determine next position based on whether we're in/entering home
-            if in_final_home or coords in home_stretch:
-                # Use home path
-                coords = self.get_next_home_position(player, coords[0], coords[1])
-                in_final_home = coords in final_home
+        # Validate the move and find its destination in one pass - routes
+        # already follow the home path where it applies
+        new_node = self._resolve_destination(pdata, old_node, dice_roll, to_node)
+        if new_node < 0:
+            if to_node is None:
+                result['message'] = "Invalid move - can't jump own marbles"
             else:
-                coords = self.get_next_position(coords[0], coords[1])
-                # Check if we just entered home stretch
-                if coords in home_stretch:
-                    in_final_home = False
+                result['message'] = f'Invalid destination {_decode(to_node)} for a {dice_roll}'
+            return result
+        old_pos = NODE_COORDS[old_node]
+        coords = NODE_COORDS[new_node]
+        final_nodes = pdata.final_home_nodes
         
         # Check for aggravation - is there an opponent marble at destination?
         # (Must check BEFORE updating our marble position)
-        if coords not in final_home:  # Can't aggravate in safe zone (final home)
-            opponent = self.find_marble_at_position(coords)
-            if opponent is not None and opponent[0] != player:
-                opp_player, opp_marble_idx = opponent
+        if new_node not in final_nodes:  # Can't aggravate in safe zone (final home)
+            victim = self._marble_at(new_node)
+            if victim >= 0 and victim // 4 != player - 1:
+                opp_player, opp_marble_idx = victim // 4 + 1, victim % 4
                 opp_old_pos = self.send_marble_home(opp_player, opp_marble_idx)
                 result['aggravated_opponent'] = True
                 result['aggravated_info'] = {
@@ -568,25 +1415,24 @@ class AggravationGame:
                 }
         
         # Update marble position
-        marbles[marble_idx] = coords
-        self._set_end(player, coords)
+        self._move_marble(slot, new_node)
+        state[pdata.end_idx] = new_node
         
         # Track if marble entered final home
-        if coords in final_home:
+        if new_node in final_nodes:
             result['entered_home'] = True
             # Update end_home tracking
-            end_home = self._get_end_home(player)
-            for i, pos in enumerate(end_home):
-                if pos == (None, None):
-                    end_home[i] = coords
-                    break
+            i = self._end_home_slot(pdata, old_node)
+            if i >= 0:
+                self._write(i, new_node)
         
         # Check if marble is on start position
-        if coords == start_pos:
-            self._set_start_occupied(player, True)
-        elif old_pos == start_pos:
-            self._set_start_occupied(player, False)
+        if new_node == pdata.start_node:
+            self._write(pdata.start_occupied_idx, 1)
+        elif old_node == pdata.start_node:
+            self._write(pdata.start_occupied_idx, 0)
         
+        self._check_debug()
         result['success'] = True
         result['old_position'] = old_pos
         result['new_position'] = coords
@@ -600,6 +1446,118 @@ class AggravationGame:
         
         return result
     
+    def apply_move(self, player: int, marble_idx: int, dice_roll: int,
+                   to_node: Optional[int] = None) -> UndoRecord:
+        """
+        Apply a move in place for search, returning the record to undo it.
+        
+        Same rules as execute_move(); marble_idx -1 moves a marble from home
+        to the start position and, like the GUI, aggravates any opponent
+        sitting there. No result dict or message is built.
+        
+        Args:
+            player: Player number (1-4)
+            marble_idx: Index of marble to move (0-3), or -1 to leave home
+            dice_roll: Number rolled on die
+            to_node: Destination node (see get_destinations), or None for
+                     the first destination
+        
+        Returns:
+            UndoRecord to pass to undo()
+        
+        Raises:
+            ValueError: If the player is invalid or the move is not legal
+        """
+        pdata = self._get_player_data(player)
+        state = self._state
+        
+        if marble_idx == -1:
+            if not self._can_leave_home(pdata, dice_roll) or to_node not in (None, pdata.start_node):
+                raise ValueError(f"Player {player} can't move from home with a {dice_roll}")
+            slot = self._home_slot(pdata)
+            if slot < 0:
+                raise ValueError(f"Player {player} has no marble off the board")
+            to_node = pdata.start_node
+        else:
+            slot = pdata.marbles_at + marble_idx
+            if not 0 <= marble_idx < 4 or state[slot] == OFF_BOARD:
+                raise ValueError(f"Invalid move for player {player} marble {marble_idx} with a {dice_roll}")
+            dest = self._resolve_destination(pdata, state[slot], dice_roll, to_node)
+            if dest < 0:
+                if to_node is None:
+                    raise ValueError(f"Invalid move for player {player} marble {marble_idx} with a {dice_roll}")
+                raise ValueError(f"Player {player} marble {marble_idx} can't reach node {to_node} with a {dice_roll}")
+            to_node = dest
+        
+        record = UndoRecord()
+        record.player = player
+        record.slot = slot
+        record.from_node = state[slot]
+        record.prev_end = state[pdata.end_idx]
+        record.prev_home = state[pdata.home_idx]
+        record.prev_start_occupied = state[pdata.start_occupied_idx]
+        record.end_home_idx = -1
+        record.victim_slot = -1
+        
+        # Aggravate an opponent on the destination (never in final home)
+        if to_node not in pdata.final_home_nodes:
+            victim = self._marble_at(to_node)
+            if victim >= 0 and victim // 4 != player - 1:
+                vdata = _PLAYER_DATA[victim // 4 + 1]
+                record.victim_slot = victim
+                record.victim_node = to_node
+                record.victim_prev_home = state[vdata.home_idx]
+                record.victim_prev_start_occupied = state[vdata.start_occupied_idx]
+                self.send_marble_home(vdata.player, victim % 4)
+        
+        if marble_idx == -1:
+            self._write(pdata.home_idx, state[pdata.home_idx] - 1)
+        self._move_marble(slot, to_node)
+        state[pdata.end_idx] = to_node
+        
+        if to_node in pdata.final_home_nodes:
+            i = self._end_home_slot(pdata, record.from_node)
+            if i >= 0:
+                self._write(i, to_node)
+                record.end_home_idx = i
+        
+        if to_node == pdata.start_node:
+            self._write(pdata.start_occupied_idx, 1)
+        elif record.from_node == pdata.start_node:
+            self._write(pdata.start_occupied_idx, 0)
+        
+        self._check_debug()
+        return record
+    
+    def undo(self, record: UndoRecord):
+        """
+        Restore the exact state from before an apply_move().
+        Records must be undone in reverse order of application.
+        
+        Args:
+            record: UndoRecord returned by apply_move()
+        """
+        pdata = _PLAYER_DATA[record.player]
+        state = self._state
+        
+        self._move_marble(record.slot, record.from_node)
+        state[pdata.end_idx] = record.prev_end
+        self._write(pdata.home_idx, record.prev_home)
+        self._write(pdata.start_occupied_idx, record.prev_start_occupied)
+        if record.end_home_idx >= 0:
+            # A move within the final home had updated the marble's own record
+            from_node = record.from_node
+            self._write(record.end_home_idx,
+                        from_node if from_node in pdata.final_home_nodes else OFF_BOARD)
+        
+        if record.victim_slot >= 0:
+            vdata = _PLAYER_DATA[record.victim_slot // 4 + 1]
+            self._move_marble(record.victim_slot, record.victim_node)
+            self._write(vdata.home_idx, record.victim_prev_home)
+            self._write(vdata.start_occupied_idx, record.victim_prev_start_occupied)
+        
+        self._check_debug()
+    
     def get_valid_moves(self, player: int, dice_roll: int) -> List[int]:
         """
         Get list of valid marble indices that can be moved.
@@ -607,7 +1565,7 @@ class AggravationGame:
         Args:
             player: Player number (1-4)
             dice_roll: Number rolled on die
-            
+        
         Returns:
             List of marble indices (0-3) that can be moved
         """
@@ -618,31 +1576,78 @@ class AggravationGame:
         except ValueError:
             return valid_moves
         
-        marbles = pdata['marbles']
-        home = pdata['home']
-        start_occupied = pdata['start_occupied']
+        state = self._state
         
-        # Check if can move marble from home
-        if (dice_roll == 1 or dice_roll == 6) and len(home) > 0:
-            # Can move marble from home to start if start not occupied
-            if not start_occupied:
-                valid_moves.append(-1)  # Special index for moving from home
+        # Check if can move marble from home (an exit roll and a free start position)
+        if self._can_leave_home(pdata, dice_roll):
+            valid_moves.append(-1)  # Special index for moving from home
         
         # Check each marble on the board
+        marbles_at = pdata.marbles_at
         for idx in range(4):
-            if marbles[idx] is not None and marbles[idx] != (None, None):
+            if state[marbles_at + idx] != OFF_BOARD:
                 if self.is_valid_move(player, idx, dice_roll):
                     valid_moves.append(idx)
         
         return valid_moves
     
+    def get_valid_moves_all_rolls(self, player: int) -> List[List[int]]:
+        """
+        Get the valid moves for every die face in one pass.
+        
+        Each marble's path is walked once up to 6 steps; the first blocked
+        step caps which rolls that marble can use. Equivalent to calling
+        get_valid_moves(player, roll) for rolls 1-6.
+        
+        Args:
+            player: Player number (1-4)
+        
+        Returns:
+            6-entry table where entry [roll - 1] is the list of valid marble
+            indices for that roll (including -1 for moving from home)
+        """
+        table = [[], [], [], [], [], []]
+        
+        try:
+            pdata = self._get_player_data(player)
+        except ValueError:
+            return table
+        
+        if not self._tables.walk_only:
+            # Variant moves don't all share one walk across rolls
+            return [self.get_valid_moves(player, dice_roll) for dice_roll in range(1, 7)]
+        
+        state = self._state
+        
+        # Moving from home needs an exit roll and a free start position
+        if state[pdata.home_idx] > 0 and not state[pdata.start_occupied_idx]:
+            for dice_roll in self._tables.exit_rolls:
+                table[dice_roll - 1].append(-1)
+        
+        occupancy = self._occupancy
+        own_mask = pdata.own_mask
+        end_home = state[pdata.end_home_at:pdata.end_home_at + 4]
+        for idx in range(4):
+            node = state[pdata.marbles_at + idx]
+            if node == OFF_BOARD:
+                continue
+            walk = pdata.walks[node]
+            for step in range(1, min(6, len(walk) - 1) + 1):
+                node = walk[step]
+                # First blocking point ends this marble's reach
+                if occupancy[node] & own_mask or (node >= TRACK_LENGTH and node in end_home):
+                    break
+                table[step - 1].append(idx)
+        
+        return table
+    
     def check_win_condition(self, player: int) -> bool:
         """
         Check if a player has won the game.
         
         Args:
             player: Player number (1-4)
-            
+        
         Returns:
             True if player has won, False otherwise
         """
@@ -652,11 +1657,9 @@ class AggravationGame:
             return False
         
         # A player wins when all 4 marbles are in their final home positions
-        final_home = pdata['final_home']
-        marbles = pdata['marbles']
-        # Check if all 4 marbles are in final home positions
-        marbles_in_home = [m for m in marbles if m in final_home]
-        return len(marbles_in_home) == 4
+        final_nodes = pdata.final_home_nodes
+        marbles_at = pdata.marbles_at
+        return all(node in final_nodes for node in self._state[marbles_at:marbles_at + 4])
     
     def is_game_over(self) -> bool:
         """
@@ -672,6 +1675,109 @@ class AggravationGame:
                 return True
         return False
     
+    def next_player(self) -> int:
+        """
+        Pass the turn to the next of num_players players.
+        
+        Returns:
+            The new current player
+        """
+        player = self.current_player % self.num_players + 1
+        self.current_player = player
+        return player
+    
+    def step(self, action: Union[None, int, Tuple[int, int]], dice_roll: int,
+             to_node: Optional[int] = None) -> Optional[UndoRecord]:
+        """
+        Play one die roll for the current player.
+        
+        Applies the chosen move (capturing like apply_move), records a win,
+        and passes the turn on unless the roll was a 6, which earns
+        another roll.
+        
+        Args:
+            action: Marble index (0-3), -1 to move a marble out of home, a
+                    (marble_idx, to_node) tuple from get_actions(), or None
+                    to pass when no move is legal
+            dice_roll: Number rolled on die
+            to_node: Destination node (see get_destinations), or None for
+                     the first destination
+        
+        Returns:
+            UndoRecord of the move, or None if the player passed
+        
+        Raises:
+            ValueError: If the action is not legal for this roll
+        """
+        player = self.current_player
+        if action is None:
+            if self.get_valid_moves(player, dice_roll):
+                raise ValueError(f"Player {player} has a legal move with a {dice_roll} and can't pass")
+            record = None
+        else:
+            if type(action) is tuple:
+                action, to_node = action
+            record = self.apply_move(player, action, dice_roll, to_node)
+            if self.check_win_condition(player):
+                self.game_over = True
+                self.winner = player
+                return record
+        
+        if dice_roll != 6:
+            self.next_player()
+        return record
+    
+    def play_turn(self, policy: Callable[['AggravationGame', int, List], Union[int, Tuple[int, int]]],
+                  on_roll: Optional[Callable[[int, int, Union[None, int, Tuple[int, int]],
+                                              Optional[UndoRecord]], None]] = None) -> int:
+        """
+        Play the current player's whole turn.
+        
+        Rolls, lets the policy pick whenever a move is legal, rolls again
+        after every 6 and leaves the turn with the next player.
+        
+        Args:
+            policy: Called as policy(game, dice_roll, valid_moves) with
+                    the get_actions() for the roll and returns one of them
+            on_roll: Called as on_roll(player, dice_roll, action, record)
+                     after every roll, with the chosen action and the
+                     move's UndoRecord (both None for a pass), or None
+        
+        Returns:
+            Number of dice rolled during the turn
+        """
+        rolls = 0
+        player = self.current_player
+        while not self.game_over:
+            dice_roll = self.roll_dice()
+            rolls += 1
+            valid_moves = self.get_actions(player, dice_roll)
+            if valid_moves:
+                action = policy(self, dice_roll, valid_moves)
+                record = self.step(action, dice_roll)
+            else:
+                # Forced pass (what step(None) does, without re-checking)
+                action = record = None
+                if dice_roll != 6:
+                    self.next_player()
+            if on_roll is not None:
+                on_roll(player, dice_roll, action, record)
+            if dice_roll != 6:
+                break
+        return rolls
+    
+    def _player_state(self, player: int) -> Dict:
+        """Snapshot of one player's state as plain lists and tuples."""
+        pdata = _PLAYER_DATA[player]
+        state = self._state
+        return {
+            'home': pdata.starting_home[:state[pdata.home_idx]],
+            'marbles': [_decode(node) for node in state[pdata.marbles_at:pdata.marbles_at + 4]],
+            'end': _decode(state[pdata.end_idx]),
+            'end_home': [_decode(node) for node in state[pdata.end_home_at:pdata.end_home_at + 4]],
+            'start_occupied': bool(state[pdata.start_occupied_idx])
+        }
+    
     def get_game_state(self) -> Dict:
         """
         Get current game state as a serializable dictionary.
@@ -684,54 +1790,70 @@ class AggravationGame:
             'current_player': self.current_player,
             'game_over': self.game_over,
             'winner': self.winner,
-            'player1': {
-                'home': self.p1_home,
-                'marbles': self.p1_marbles,
-                'end': self.p1_end,
-                'end_home': self.p1_end_home,
-                'start_occupied': self.p1_start_occupied
-            },
-            'player2': {
-                'home': self.p2_home,
-                'marbles': self.p2_marbles,
-                'end': self.p2_end,
-                'end_home': self.p2_end_home,
-                'start_occupied': self.p2_start_occupied
-            },
-            'player3': {
-                'home': self.p3_home,
-                'marbles': self.p3_marbles,
-                'end': self.p3_end,
-                'end_home': self.p3_end_home,
-                'start_occupied': self.p3_start_occupied
-            },
-            'player4': {
-                'home': self.p4_home,
-                'marbles': self.p4_marbles,
-                'end': self.p4_end,
-                'end_home': self.p4_end_home,
-                'start_occupied': self.p4_start_occupied
-            }
+            'player1': self._player_state(1),
+            'player2': self._player_state(2),
+            'player3': self._player_state(3),
+            'player4': self._player_state(4)
         }
     
+    def get_marble_nodes(self, player: int) -> List[int]:
+        """
+        Get a player's marble positions as node indices.
+        
+        Args:
+            player: Player number (1-4)
+        
+        Returns:
+            List of 4 node indices (see NODE_COORDS), OFF_BOARD for marbles
+            waiting in home
+        """
+        pdata = self._get_player_data(player)
+        return self._state[pdata.marbles_at:pdata.marbles_at + 4].tolist()
+    
+    def is_capture(self, player: int, marble_idx: int, dice_roll: int,
+                   to_node: Optional[int] = None) -> bool:
+        """
+        Check if a move would aggravate an opponent marble.
+        
+        Args:
+            player: Player number (1-4)
+            marble_idx: Index of marble to move (0-3), or -1 to leave home
+            dice_roll: Number rolled on die
+            to_node: Destination node (see get_destinations), or None for
+                     the first destination
+        
+        Returns:
+            True if an opponent marble sits on the move's destination
+        """
+        pdata = self._get_player_data(player)
+        if marble_idx == -1:
+            node = pdata.start_node
+        else:
+            node = self._state[pdata.marbles_at + marble_idx]
+            if node == OFF_BOARD:
+                return False
+            destinations = self._route_destinations(pdata, node, dice_roll)
+            if not destinations:
+                return False
+            node = destinations[0] if to_node is None else to_node
+            if node in pdata.final_home_nodes:
+                return False
+        victim = self._marble_at(node)
+        return victim >= 0 and victim // 4 != player - 1
+    
     def get_num_in_home(self, player: int) -> int:
         """
         Get number of marbles in player's home base.
         
         Args:
             player: Player number (1-4)
-            
+        
         Returns:
             Number of marbles in home
         """
-        if player == 1:
-            return len(self.p1_home)
-        elif player == 2:
-            return len(self.p2_home)
-        elif player == 3:
-            return len(self.p3_home)
-        elif player == 4:
-            return len(self.p4_home)
+        pdata = _PLAYER_DATA.get(player)
+        if pdata is not None:
+            return self._state[pdata.home_idx]
         return 0
     
     def remove_from_home(self, player: int) -> bool:
@@ -740,52 +1862,116 @@ class AggravationGame:
         
         Args:
             player: Player number (1-4)
-            
+        
         Returns:
             True if marble was removed, False if no marbles in home
         """
-        if player == 1:
-            if len(self.p1_home) >= 1:
-                self.p1_home = self.p1_home[:-1]
-                marble_idx = len(self.p1_home)
-                self.p1_marbles[marble_idx] = PLAYER_STARTS[1]
-                self.p1_end = PLAYER_STARTS[1]
-                self.p1_start_occupied = True
-                return True
-        elif player == 2:
-            if len(self.p2_home) >= 1:
-                self.p2_home = self.p2_home[:-1]
-                marble_idx = len(self.p2_home)
-                self.p2_marbles[marble_idx] = PLAYER_STARTS[2]
-                self.p2_end = PLAYER_STARTS[2]
-                self.p2_start_occupied = True
-                return True
-        elif player == 3:
-            if len(self.p3_home) >= 1:
-                self.p3_home = self.p3_home[:-1]
-                marble_idx = len(self.p3_home)
-                self.p3_marbles[marble_idx] = PLAYER_STARTS[3]
-                self.p3_end = PLAYER_STARTS[3]
-                self.p3_start_occupied = True
-                return True
-        elif player == 4:
-            if len(self.p4_home) >= 1:
-                self.p4_home = self.p4_home[:-1]
-                marble_idx = len(self.p4_home)
-                self.p4_marbles[marble_idx] = PLAYER_STARTS[4]
-                self.p4_end = PLAYER_STARTS[4]
-                self.p4_start_occupied = True
-                return True
+        pdata = _PLAYER_DATA.get(player)
+        if pdata is None:
+            return False
+        
+        state = self._state
+        slot = self._home_slot(pdata)
+        if state[pdata.home_idx] >= 1 and slot >= 0:
+            self._write(pdata.home_idx, state[pdata.home_idx] - 1)
+            self._move_marble(slot, pdata.start_node)
+            state[pdata.end_idx] = pdata.start_node
+            self._write(pdata.start_occupied_idx, 1)
+            self._check_debug()
+            return True
         
         return False
     
+    def clone(self) -> 'AggravationGame':
+        """
+        Fast copy of the game for search and rollouts.
+        
+        Copies the state array, occupancy index and hash directly instead of
+        round-tripping through to_dict()/from_dict(). The clone rolls from
+        the same random source with an empty dice buffer of its own, so
+        rollouts from one position don't all see the same dice.
+        
+        Returns:
+            Independent AggravationGame in the same position
+        """
+        cls = self.__class__
+        game = cls.__new__(cls)
+        game.num_players = self.num_players
+        game.debug = self.debug
+        game.rules = self.rules
+        game._tables = self._tables
+        game._state = self._state[:]
+        game._occupancy = self._occupancy[:]
+        game._hash = self._hash
+        game._rng = self._rng
+        game._roll_die = self._roll_die
+        game._dice_buffer = self._dice_buffer
+        game._dice = [] if self._dice_buffer else None
+        return game
+    
+    def __copy__(self) -> 'AggravationGame':
+        return self.clone()
+    
+    def __deepcopy__(self, memo) -> 'AggravationGame':
+        # All state is plain integers, so a shallow clone is already deep
+        return self.clone()
+    
+    def __getstate__(self) -> dict:
+        # Pickle the arrays and the random source, not the roller closure;
+        # the global random module is stored as None
+        return {
+            'num_players': self.num_players,
+            'debug': self.debug,
+            'rules': self.rules,
+            'state': self._state.tobytes(),
+            'occupancy': self._occupancy.tobytes(),
+            'hash': self._hash,
+            'rng': None if self._rng is random else self._rng,
+            'dice_buffer': self._dice_buffer,
+            'dice': self._dice
+        }
+    
+    def __setstate__(self, data: dict):
+        self.num_players = data['num_players']
+        self.debug = data['debug']
+        self.rules = data.get('rules', STANDARD_RULES)
+        self._tables = _compile_rules(self.rules)
+        self._state = array('b', data['state'])
+        self._occupancy = array('H', data['occupancy'])
+        self._hash = data['hash']
+        self._rng = random if data['rng'] is None else data['rng']
+        self._roll_die = _die_roller(self._rng)
+        self._dice_buffer = data['dice_buffer']
+        self._dice = data['dice']
+    
+    def copy_from(self, other: 'AggravationGame'):
+        """
+        Overwrite this game with another game's position, reusing this
+        game's arrays instead of allocating new ones.
+        
+        Args:
+            other: Game to copy the position from
+        """
+        self.num_players = other.num_players
+        self.rules = other.rules
+        self._tables = other._tables
+        self._state[:] = other._state
+        self._occupancy[:] = other._occupancy
+        self._hash = other._hash
+    
+    def reset(self):
+        """Return the game to the starting position in place."""
+        self._state[:] = _INITIAL_STATE
+        self._occupancy[:] = _EMPTY_OCCUPANCY
+        self._hash = _INITIAL_HASH
+    
     def to_dict(self, name: str = "Unnamed Save") -> dict:
         """
         Serialize game state to dictionary for JSON export.
         
         Args:
             name: Optional save game name
-            
+        
         Returns:
             Dictionary containing complete game state
         """
@@ -795,38 +1981,15 @@ class AggravationGame:
             'name': name,
             'game_state': {
                 'num_players': self.num_players,
+                'rules': self.rules.to_dict(),
                 'current_player': self.current_player,
                 'game_over': self.game_over,
                 'winner': self.winner,
                 'players': {
-                    '1': {
-                        'home': self.p1_home,
-                        'marbles': self.p1_marbles,
-                        'end': self.p1_end,
-                        'end_home': self.p1_end_home,
-                        'start_occupied': self.p1_start_occupied
-                    },
-                    '2': {
-                        'home': self.p2_home,
-                        'marbles': self.p2_marbles,
-                        'end': self.p2_end,
-                        'end_home': self.p2_end_home,
-                        'start_occupied': self.p2_start_occupied
-                    },
-                    '3': {
-                        'home': self.p3_home,
-                        'marbles': self.p3_marbles,
-                        'end': self.p3_end,
-                        'end_home': self.p3_end_home,
-                        'start_occupied': self.p3_start_occupied
-                    },
-                    '4': {
-                        'home': self.p4_home,
-                        'marbles': self.p4_marbles,
-                        'end': self.p4_end,
-                        'end_home': self.p4_end_home,
-                        'start_occupied': self.p4_start_occupied
-                    }
+                    '1': self._player_state(1),
+                    '2': self._player_state(2),
+                    '3': self._player_state(3),
+                    '4': self._player_state(4)
                 }
             }
         }
@@ -838,10 +2001,10 @@ class AggravationGame:
         
         Args:
             data: Dictionary containing saved game state
-            
+        
         Returns:
             New AggravationGame instance with restored state
-            
+        
         Raises:
             ValueError: If data format is invalid or version incompatible
         """
@@ -869,7 +2032,7 @@ class AggravationGame:
             raise ValueError(f"Incompatible save file version: {version}")
         
         state = data['game_state']
-        game = cls(num_players=state['num_players'])
+        game = cls(num_players=state['num_players'], rules=AggravationRules.from_dict(state.get('rules', {})))
         
         # Restore global game state
         game.current_player = state['current_player']
@@ -887,30 +2050,11 @@ class AggravationGame:
             end_home = [to_tuple(pos) for pos in pdata.get('end_home', [(None, None)] * 4)]
             start_occupied = pdata.get('start_occupied', False)
             
-            if player_num == 1:
-                game.p1_home = home
-                game.p1_marbles = marbles
-                game.p1_end = end
-                game.p1_end_home = end_home
-                game.p1_start_occupied = start_occupied
-            elif player_num == 2:
-                game.p2_home = home
-                game.p2_marbles = marbles
-                game.p2_end = end
-                game.p2_end_home = end_home
-                game.p2_start_occupied = start_occupied
-            elif player_num == 3:
-                game.p3_home = home
-                game.p3_marbles = marbles
-                game.p3_end = end
-                game.p3_end_home = end_home
-                game.p3_start_occupied = start_occupied
-            elif player_num == 4:
-                game.p4_home = home
-                game.p4_marbles = marbles
-                game.p4_end = end
-                game.p4_end_home = end_home
-                game.p4_start_occupied = start_occupied
+            setattr(game, f'p{player_num}_home', home)
+            setattr(game, f'p{player_num}_marbles', marbles)
+            setattr(game, f'p{player_num}_end', end)
+            setattr(game, f'p{player_num}_end_home', end_home)
+            setattr(game, f'p{player_num}_start_occupied', start_occupied)
         
         return game
     
@@ -921,7 +2065,7 @@ class AggravationGame:
         Args:
             filepath: Path to save file
             name: Optional save game name
-            
+        
         Raises:
             IOError: If file cannot be written
         """
@@ -942,10 +2086,10 @@ class AggravationGame:
         
         Args:
             filepath: Path to save file
-            
+        
         Returns:
             New AggravationGame instance with loaded state
-            
+        
         Raises:
             FileNotFoundError: If file doesn't exist
             ValueError: If file is corrupted or incompatible version or if
@@ -974,6 +2118,64 @@ class AggravationGame:
         return cls.from_dict(data)
 
 
+class GamePool:
+    """
+    Free list of AggravationGame objects for rollouts.
+    
+    acquire() reuses a released game by resetting or overwriting its arrays
+    in place, so a rollout loop stops allocating once the pool is warm.
+    """
+    __slots__ = ('num_players', 'rules', '_free')
+    
+    def __init__(self, size: int = 0, num_players: int = 4, rules: Optional[AggravationRules] = None):
+        """
+        Create a pool.
+        
+        Args:
+            size: Number of games to preallocate
+            num_players: Player count for games acquired without a source
+            rules: Rules for games acquired without a source (None for standard)
+        """
+        self.num_players = num_players
+        self.rules = rules if rules is not None else STANDARD_RULES
+        self._free = [AggravationGame(num_players, rules=self.rules) for _ in range(size)]
+    
+    def __len__(self) -> int:
+        return len(self._free)
+    
+    def acquire(self, source: Optional[AggravationGame] = None) -> AggravationGame:
+        """
+        Get a game from the pool.
+        
+        Args:
+            source: Game whose position to copy, or None for a new game
+        
+        Returns:
+            Game in the source position (or the starting position)
+        """
+        if not self._free:
+            return source.clone() if source is not None \
+                else AggravationGame(self.num_players, rules=self.rules)
+        game = self._free.pop()
+        if source is not None:
+            game.copy_from(source)
+        else:
+            game.reset()
+            game.num_players = self.num_players
+            game.rules = self.rules
+            game._tables = _compile_rules(self.rules)
+        return game
+    
+    def release(self, game: AggravationGame):
+        """
+        Return a game to the pool for reuse.
+        
+        Args:
+            game: Game that is no longer used by the caller
+        """
+        self._free.append(game)
+
+
 # Save file management functions
 
 def get_save_directory() -> Path:
@@ -1029,7 +2231,7 @@ def get_save_info(filepath: str) -> Optional[Dict]:
     
     Args:
         filepath: Path to save file
-        
+    
     Returns:
         Dictionary with metadata or None if file can't be read
     """
@@ -1056,7 +2258,7 @@ def delete_save(filepath: str) -> bool:
     
     Args:
         filepath: Path to save file
-        
+    
     Returns:
         True if file was deleted, False otherwise. Returns False if the
         path is outside the save directory or if deletion fails.
@@ -1064,7 +2266,7 @@ def delete_save(filepath: str) -> bool:
     try:
         save_dir = get_save_directory().resolve()
         target_path = Path(filepath).resolve()
-
+        
         # Ensure the target path is within the save directory to prevent
         # accidental or malicious deletion of arbitrary files.
         try:
@@ -1075,7 +2277,7 @@ def delete_save(filepath: str) -> bool:
             # Fallback for environments without Path.is_relative_to
             if save_dir not in target_path.parents and target_path != save_dir:
                 return False
-
+        
         target_path.unlink()
         return True
     except (FileNotFoundError, PermissionError, IOError, OSError):
@@ -1088,7 +2290,7 @@ def generate_save_filename(name: str = None) -> str:
     
     Args:
         name: Optional base name for the save file
-        
+    
     Returns:
         Full path to save file
     """
@@ -0,0 +1,309 @@
+"""
+Compact game records for simulation output.
+
+A record keeps just enough to replay a game through AggravationGame: the
+seed it was played from, the player count, every die rolled with the
+marble chosen for it, the winner and each seat's captures.
+
+File format: a 4-byte magic header followed by length-prefixed records
+(a little-endian uint32 payload length, then the payload). The whole
+stream may be gzip or zstd compressed; read_records() detects which.
+Payload layout:
+    uint8 num_players, uint8 winner (0 = none), uint8 seed length,
+    seed (UTF-8), uint16 captures per seat, then one byte per roll
+    (die in the low 3 bits, move code in the high bits: 0 = pass,
+    1 = marble out of home, 2-5 = marble 0-3).
+"""
+
+import gzip
+import io
+import struct
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from game_engine import AggravationGame
+
+try:
+    import zstandard
+except ImportError:  # zstd framing is optional
+    zstandard = None
+
+MAGIC = b'AGR1'
+COMPRESSIONS = (None, 'gzip', 'zstd')
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_LENGTH = struct.Struct('<I')
+_HEADER = struct.Struct('<BBB')
+
+
+class GameRecord:
+    """
+    One simulated game: its seed, rolls, chosen moves and outcome.
+    
+    Moves are kept packed one byte per roll, so a typical game of a few
+    hundred rolls takes a few hundred bytes.
+    """
+    __slots__ = ('seed', 'num_players', 'winner', 'captures', 'moves')
+    
+    def __init__(self, seed: str = '', num_players: int = 4):
+        """
+        Start an empty record.
+        
+        Args:
+            seed: Seed the game's random source was created from
+            num_players: Number of players in the game
+        """
+        self.seed = seed
+        self.num_players = num_players
+        self.winner = None
+        self.captures = [0] * num_players
+        self.moves = bytearray()
+    
+    def add_move(self, dice_roll: int, marble_idx: Optional[int]):
+        """
+        Append one roll and the move made with it.
+        
+        Args:
+            dice_roll: Die rolled (1-6)
+            marble_idx: Marble moved, -1 for out of home, None for a pass
+        """
+        code = 0 if marble_idx is None else marble_idx + 2
+        self.moves.append(dice_roll | (code << 3))
+    
+    def iter_moves(self) -> Iterator[Tuple[int, Optional[int]]]:
+        """
+        Iterate over the game's rolls.
+        
+        Returns:
+            Iterator of (dice_roll, marble_idx) with marble_idx None for a pass
+        """
+        for byte in self.moves:
+            code = byte >> 3
+            yield byte & 7, (code - 2 if code else None)
+    
+    def __len__(self) -> int:
+        return len(self.moves)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    def to_bytes(self) -> bytes:
+        """Encode the record payload (without its length prefix)."""
+        seed = self.seed.encode('utf-8')
+        if len(seed) > 255:
+            raise ValueError(f"Seed too long for a game record: {self.seed!r}")
+        return b''.join((
+            _HEADER.pack(self.num_players, self.winner or 0, len(seed)),
+            seed,
+            struct.pack(f'<{self.num_players}H', *self.captures),
+            self.moves
+        ))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GameRecord':
+        """
+        Decode a record payload.
+        
+        Args:
+            data: Payload as produced by to_bytes()
+        
+        Returns:
+            Decoded GameRecord
+        """
+        num_players, winner, seed_len = _HEADER.unpack_from(data)
+        pos = _HEADER.size
+        record = cls(bytes(data[pos:pos + seed_len]).decode('utf-8'), num_players)
+        pos += seed_len
+        record.winner = winner or None
+        record.captures = list(struct.unpack_from(f'<{num_players}H', data, pos))
+        record.moves = bytearray(data[pos + 2 * num_players:])
+        return record
+    
+    def replay(self, game: Optional[AggravationGame] = None) -> AggravationGame:
+        """
+        Play the recorded moves through AggravationGame.
+        
+        Args:
+            game: Game in its starting position to replay into, or None for
+                  a new game
+        
+        Returns:
+            Game after the last recorded roll
+        
+        Raises:
+            ValueError: If a recorded move is illegal in the replayed position
+        """
+        if game is None:
+            game = AggravationGame(num_players=self.num_players)
+        for dice_roll, marble_idx in self.iter_moves():
+            game.step(marble_idx, dice_roll)
+        return game
+
+
+def frame(record: GameRecord) -> bytes:
+    """Encode a record with its length prefix, as stored in a file."""
+    payload = record.to_bytes()
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _compression_for(path: Path, compression: Optional[str]) -> Optional[str]:
+    if compression is None:
+        if path.suffix == '.gz':
+            return 'gzip'
+        if path.suffix == '.zst':
+            return 'zstd'
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression!r}")
+    return compression
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError("zstd compression needs the zstandard package (pip install zstandard)")
+
+
+class RecordBuffer:
+    """
+    In-memory stand-in for GameRecordWriter, for worker processes that
+    hand their framed records back to the process writing the file.
+    """
+    __slots__ = ('_frames',)
+    
+    def __init__(self):
+        self._frames = []
+    
+    def write(self, record: GameRecord):
+        self._frames.append(frame(record))
+    
+    def getvalue(self) -> bytes:
+        """Return all framed records written so far."""
+        return b''.join(self._frames)
+
+
+class GameRecordWriter:
+    """
+    Buffered writer streaming game records to a file.
+    
+    Records are framed into a memory buffer and handed to the file (and
+    compressor) in large blocks, so writing millions of records costs
+    little more than encoding them. Use as a context manager or call
+    close() to flush.
+    """
+    
+    def __init__(self, path, compression: Optional[str] = None,
+                 buffer_size: int = 1 << 20, level: Optional[int] = None):
+        """
+        Open a record file for writing.
+        
+        Args:
+            path: File to create (overwritten if it exists)
+            compression: None, 'gzip' or 'zstd'; None picks from the suffix
+                         (.gz or .zst), otherwise the file is uncompressed
+            buffer_size: Bytes to collect before writing a block
+            level: Compression level, or None for the compressor's default
+        """
+        path = Path(path)
+        self.path = path
+        self.compression = _compression_for(path, compression)
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._buffer = bytearray(MAGIC)
+        self._raw = None
+        if self.compression == 'zstd':
+            _require_zstandard()
+            self._raw = open(path, 'wb')
+            compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+            self._file = compressor.stream_writer(self._raw)
+        elif self.compression == 'gzip':
+            self._file = gzip.open(path, 'wb', compresslevel=6 if level is None else level)
+        else:
+            self._file = open(path, 'wb')
+    
+    def write(self, record: GameRecord):
+        """
+        Append one game record.
+        
+        Args:
+            record: Record to write
+        """
+        self.write_frames(frame(record))
+    
+    def write_frames(self, data: bytes, count: int = 1):
+        """
+        Append records that are already framed (see RecordBuffer).
+        
+        Args:
+            data: One or more framed records
+            count: Number of records in data
+        """
+        self._buffer += data
+        self.count += count
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered records to the file."""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+    
+    def close(self):
+        """Flush and close the file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        if self._raw is not None:
+            self._raw.close()
+        self._file = None
+    
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _open_for_reading(path: Path):
+    """Open a record file, undoing whichever compression it was written with."""
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    if head.startswith(_GZIP_MAGIC):
+        return gzip.open(path, 'rb')
+    if head == _ZSTD_MAGIC:
+        _require_zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True)
+        return io.BufferedReader(reader)
+    return open(path, 'rb')
+
+
+def read_records(path) -> Iterator[GameRecord]:
+    """
+    Stream the records of a file written by GameRecordWriter.
+    
+    Args:
+        path: Record file (compressed or not)
+    
+    Returns:
+        Iterator of GameRecord, one at a time
+    
+    Raises:
+        ValueError: If the file is not a game record file or is truncated
+    """
+    with _open_for_reading(Path(path)) as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a game record file: {path}")
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if not prefix:
+                return
+            if len(prefix) < _LENGTH.size:
+                raise ValueError(f"Truncated game record file: {path}")
+            (length,) = _LENGTH.unpack(prefix)
+            payload = f.read(length)
+            if len(payload) < length:
+                raise ValueError(f"Truncated game record file: {path}")
+            yield GameRecord.from_bytes(payload)
+
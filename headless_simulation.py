@@ -4,131 +4,419 @@ Example headless simulation using the game_engine module.
 This demonstrates running Aggravation game logic without pygame GUI.
 
 Usage:
-    python3 headless_simulation.py [num_games]
+    python3 headless_simulation.py [num_games] [--workers N] [--seed S]
+                                   [--players N] [--policies P1,P2,...]
+                                   [--record PATH] [--compression gzip|zstd]
+                                   [--stats PATH] [--rules NAME[,NAME...]]
 
 Example:
     python3 headless_simulation.py 10  # Run 10 simulated games
+    python3 headless_simulation.py 10000 --workers 8 --seed 42  # Use 8 processes
+    python3 headless_simulation.py 1000 --policies greedy,random,search,first
+    python3 headless_simulation.py 100000 --workers 8 --record games.agr.gz
+    python3 headless_simulation.py 100000 --workers 8 --stats stats.json
+    python3 headless_simulation.py 10000 --workers 8 --rules standard,shortcuts,safe-start
 """
 
+import argparse
+import json
+import random
 import sys
-from game_engine import AggravationGame
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game_engine import (
+    AggravationGame, DICE_BUFFER_SIZE, NODE_COORDS, RULE_VARIANTS, STANDARD_RULES, split_action
+)
+from game_records import GameRecord, GameRecordWriter, RecordBuffer
+from policies import POLICIES, random_move, seat_policy
+from simulation_stats import SimulationStats
 
+# Games per worker task when game records are written
+RECORD_CHUNK_SIZE = 1000
 
-def simulate_single_game(verbose=False):
+
+def check_recordable(rules):
     """
-    Simulate a single game to completion using random moves.
+    Check that games under a set of rules can be written as game records.
+    
+    Records keep the marble moved but not its destination, and replay
+    under the standard rules.
+    
+    Args:
+        rules: AggravationRules, or None for the standard rules
+    
+    Raises:
+        ValueError: If the rules aren't the standard ones
+    """
+    if rules not in (None, STANDARD_RULES):
+        raise ValueError("Game records replay under the standard rules only")
+
+
+def simulate_single_game(verbose=False, num_players=4, seat_policies=None, rng=None, record=None,
+                         stats=None, rules=None):
+    """
+    Simulate a single game to completion, each seat playing its own policy.
     
     Args:
         verbose: If True, print detailed move information
-        
+        num_players: Number of players in the game
+        seat_policies: One policy per seat, each called as
+                       policy(game, dice_roll, valid_moves) with the roll's
+                       get_actions() (so under shortcut rules it picks the
+                       destination too); random moves for every seat if None
+        rng: Random source for the dice and random policies (see
+             AggravationGame); the global random module if None
+        record: GameRecord to append every roll, the chosen moves, the
+                captures and the winner to, or None
+        stats: SimulationStats to add the game's length, winner, captures
+               by node and turns to first final home entry to, or None
+        rules: AggravationRules to play; the standard rules if None
+    
     Returns:
-        Tuple of (moves_count, winner, final_state)
+        Tuple of (moves_count, winner, final_state, captures) where
+        moves_count is the number of dice rolled and captures is the number
+        of opponent marbles each seat aggravated
+    
+    Raises:
+        ValueError: If a record is requested for non-standard rules
     """
-    game = AggravationGame()
+    if record is not None:
+        check_recordable(rules)
+    if seat_policies is None:
+        seat_policies = [random_move] * num_players
+    game = AggravationGame(num_players=num_players, rng=rng, dice_buffer=DICE_BUFFER_SIZE, rules=rules)
+    captures = [0] * num_players
     moves_count = 0
-    max_moves = 1000  # Prevent infinite loops
+    max_moves = 2000  # Prevent infinite loops
+    # Per seat: own turns started, and the turn a marble first reached the final home
+    turns = [0] * num_players
+    first_home_turns = [None] * num_players
     
     if verbose:
         print("Starting new game simulation...")
         print(f"Initial state: {game.get_num_in_home(1)} marbles in home")
     
-    while not game.is_game_over() and moves_count < max_moves:
-        # Roll dice
-        dice_roll = game.roll_dice()
-        moves_count += 1
-        
-        if verbose:
-            print(f"\nMove {moves_count}: Rolled {dice_roll}")
-        
-        # Get valid moves for current player (Player 1 for now)
-        valid_moves = game.get_valid_moves(1, dice_roll)
-        
-        if not valid_moves:
+    def on_roll(player, dice_roll, action, undo_record):
+        """Count one roll's capture and home entry, and record and report it."""
+        if undo_record is None:
+            if record is not None:
+                record.add_move(dice_roll, None)
             if verbose:
-                print("  No valid moves available")
-            continue
-        
-        # Choose first valid move (simple strategy)
-        move_choice = valid_moves[0]
-        
-        if move_choice == -1:
-            # Move marble from home to start
-            if game.remove_from_home(1):
-                if verbose:
-                    print(f"  Moved marble from home to start position")
-            else:
-                if verbose:
-                    print("  Could not move from home")
-        else:
-            # Move marble on board
-            result = game.execute_move(1, move_choice, dice_roll)
-            if result['success']:
-                if verbose:
-                    print(f"  Moved marble {move_choice} from {result['old_position']} to {result['new_position']}")
-            else:
-                if verbose:
-                    print(f"  Move failed: {result['message']}")
+                print(f"  Player {player} rolled {dice_roll}: no valid moves")
+            return
+        move_choice, to_node = split_action(action)
+        if undo_record.victim_slot >= 0:
+            captures[player - 1] += 1
+            if stats is not None:
+                stats.add_capture(undo_record.victim_node)
+        if undo_record.end_home_idx >= 0 and first_home_turns[player - 1] is None:
+            first_home_turns[player - 1] = turns[player - 1]
+        if record is not None:
+            record.add_move(dice_roll, move_choice)
         
-        # Check for win after each move
-        if game.check_win_condition(1):
-            if verbose:
-                print(f"\n🎉 Game over! Player 1 wins in {moves_count} moves!")
-            break
-    
-    if moves_count >= max_moves:
         if verbose:
+            moved = "marble from home to start position" if move_choice == -1 else f"marble {move_choice}"
+            if to_node is not None and move_choice != -1:
+                moved += f" to {NODE_COORDS[to_node]}"
+            aggravated = " - Aggravated an opponent!" if undo_record.victim_slot >= 0 else ""
+            print(f"  Player {player} rolled {dice_roll}: moved {moved}{aggravated}")
+    
+    while not game.game_over and moves_count < max_moves:
+        player = game.current_player
+        turns[player - 1] += 1
+        moves_count += game.play_turn(seat_policies[player - 1], on_roll)
+    
+    if verbose:
+        if game.game_over:
+            print(f"\n🎉 Game over! Player {game.winner} wins in {moves_count} moves!")
+        else:
             print(f"\n⚠ Game reached max moves ({max_moves}) without completion")
     
-    return moves_count, game.winner, game.get_game_state()
+    if record is not None:
+        record.winner = game.winner
+        record.captures = captures
+    if stats is not None:
+        stats.add_game(moves_count, game.winner, first_home_turns)
+    return moves_count, game.winner, game.get_game_state(), captures
 
 
-def run_batch_simulation(num_games=10):
+def empty_results(num_players=4):
+    """Statistics for zero games; the identity for merge_results()."""
+    return {
+        'games_played': 0,
+        'games_completed': 0,
+        'total_moves': 0,
+        'min_moves': float('inf'),
+        'max_moves': 0,
+        'avg_moves': 0,
+        'wins': [0] * num_players,
+        'captures': [0] * num_players
+    }
+
+
+def merge_results(a, b):
+    """
+    Combine statistics from two sets of games.
+    
+    Associative and commutative, so worker results can be merged in any
+    order and grouping with the same outcome. Detailed SimulationStats
+    under 'stats' are merged when either side has them.
+    
+    Args:
+        a: Statistics dictionary
+        b: Statistics dictionary
+    
+    Returns:
+        New statistics dictionary covering both sets of games
+    """
+    merged = {
+        'games_played': a['games_played'] + b['games_played'],
+        'games_completed': a['games_completed'] + b['games_completed'],
+        'total_moves': a['total_moves'] + b['total_moves'],
+        'min_moves': min(a['min_moves'], b['min_moves']),
+        'max_moves': max(a['max_moves'], b['max_moves']),
+        'avg_moves': 0,
+        'wins': [x + y for x, y in zip(a['wins'], b['wins'])],
+        'captures': [x + y for x, y in zip(a['captures'], b['captures'])]
+    }
+    if merged['games_played'] > 0:
+        merged['avg_moves'] = merged['total_moves'] / merged['games_played']
+    if 'stats' in a or 'stats' in b:
+        num_players = len(merged['wins'])
+        merged['stats'] = a.get('stats', SimulationStats(num_players)).merge(
+            b.get('stats', SimulationStats(num_players)))
+    return merged
+
+
+def game_seed(master_seed, game_index):
+    """Seed for one game, derived from the master seed and the game's index."""
+    return f"{master_seed}:{game_index}"
+
+
+def simulate_games(start, count, master_seed, num_players=4, policy_names=None, writer=None,
+                   collect_stats=False, rules=None):
+    """
+    Simulate a contiguous range of games (one worker task).
+    
+    Each game is seeded from its own index and gets fresh seat policies
+    (see seat_policy), so a game plays out the same whichever worker
+    runs it.
+    
+    Args:
+        start: Index of the first game
+        count: Number of games
+        master_seed: Seed of the whole simulation
+        num_players: Number of players per game
+        policy_names: POLICIES key for each seat; random moves if None
+        writer: GameRecordWriter (or RecordBuffer) to write a record of
+                every game to, or None
+        collect_stats: Also gather SimulationStats under 'stats'
+        rules: AggravationRules to play; the standard rules if None
+    
+    Returns:
+        Statistics dictionary for the range
+    """
+    if policy_names is None:
+        policy_names = ['random'] * num_players
+    
+    results = empty_results(num_players)
+    stats = SimulationStats(num_players) if collect_stats else None
+    for game_index in range(start, start + count):
+        seed = game_seed(master_seed, game_index)
+        rng = random.Random(seed)
+        record = GameRecord(seed, num_players) if writer is not None else None
+        moves, winner, state, captures = simulate_single_game(
+            num_players=num_players, seat_policies=[seat_policy(name, rng) for name in policy_names],
+            rng=rng, record=record, stats=stats, rules=rules)
+        if record is not None:
+            writer.write(record)
+        game_results = empty_results(num_players)
+        game_results.update({
+            'games_played': 1,
+            'games_completed': 1 if winner is not None else 0,
+            'total_moves': moves,
+            'min_moves': moves,
+            'max_moves': moves,
+            'avg_moves': moves,
+            'captures': captures
+        })
+        if winner is not None:
+            game_results['wins'][winner - 1] = 1
+        results = merge_results(results, game_results)
+    if stats is not None:
+        results['stats'] = stats
+    return results
+
+
+def _simulate_recorded_games(start, count, master_seed, num_players, policy_names, collect_stats=False,
+                             rules=None):
+    """Worker task: simulate_games() returning the framed game records too."""
+    buffer = RecordBuffer()
+    results = simulate_games(start, count, master_seed, num_players, policy_names, buffer, collect_stats, rules)
+    return results, buffer.getvalue()
+
+
+def run_batch_simulation(num_games=10, workers=1, seed=None, num_players=4, policy_names=None,
+                         record_path=None, compression=None, collect_stats=False, rules=None):
     """
     Run multiple simulated games and collect statistics.
     
     Args:
         num_games: Number of games to simulate
-        
+        workers: Number of worker processes (1 runs in this process)
+        seed: Master seed; the same seed gives the same statistics for any
+              number of workers. A random one is picked if None.
+        num_players: Number of players per game
+        policy_names: POLICIES key for each seat; random moves if None
+        record_path: File to stream a GameRecord of every game to, in game
+                     order, or None
+        compression: Compression for the record file (see GameRecordWriter)
+        collect_stats: Also gather SimulationStats (game length quantiles,
+                       win rate intervals, captures by slot, turns to
+                       first final home entry) under 'stats'
+        rules: AggravationRules to play; the standard rules if None
+    
     Returns:
-        Dictionary with simulation statistics
+        Dictionary with simulation statistics, including the master seed
+        and the seat policies
+    
+    Raises:
+        ValueError: If records are requested for non-standard rules
     """
-    print(f"Running {num_games} headless game simulations...")
+    if record_path is not None:
+        check_recordable(rules)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if policy_names is None:
+        policy_names = ['random'] * num_players
+    print(f"Running {num_games} headless game simulations (seed {seed}, {workers} worker(s))...")
     print("=" * 50)
     
-    results = {
-        'games_played': 0,
-        'games_completed': 0,
-        'total_moves': 0,
-        'min_moves': float('inf'),
-        'max_moves': 0,
-        'avg_moves': 0
-    }
+    # Several chunks per worker keeps the pool busy when chunk times vary.
+    # Recorded chunks come back to this process, so keep them small.
+    chunk_size = max(1, -(-num_games // (workers * 4)))
+    if record_path is not None:
+        chunk_size = min(chunk_size, RECORD_CHUNK_SIZE)
+    chunks = [(start, min(chunk_size, num_games - start))
+              for start in range(0, num_games, chunk_size)]
     
-    for i in range(num_games):
-        moves, winner, state = simulate_single_game(verbose=False)
-        
-        results['games_played'] += 1
-        if winner is not None:
-            results['games_completed'] += 1
-        
-        results['total_moves'] += moves
-        results['min_moves'] = min(results['min_moves'], moves)
-        results['max_moves'] = max(results['max_moves'], moves)
-        
-        # Print progress every 10 games
-        if (i + 1) % max(1, num_games // 10) == 0 or i == 0:
-            print(f"Progress: {i + 1}/{num_games} games simulated...")
+    writer = GameRecordWriter(record_path, compression) if record_path is not None else None
+    results = empty_results(num_players)
+    try:
+        if workers <= 1:
+            for start, count in chunks:
+                results = merge_results(results, simulate_games(start, count, seed, num_players,
+                                                                policy_names, writer, collect_stats, rules))
+                print(f"Progress: {results['games_played']}/{num_games} games simulated...")
+        elif writer is not None:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_simulate_recorded_games, start, count, seed,
+                                           num_players, policy_names, collect_stats, rules)
+                           for start, count in chunks]
+                # In submission order, so the file lists games by index
+                for future in futures:
+                    chunk_results, frames = future.result()
+                    writer.write_frames(frames, chunk_results['games_played'])
+                    results = merge_results(results, chunk_results)
+                    print(f"Progress: {results['games_played']}/{num_games} games simulated...")
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(simulate_games, start, count, seed, num_players, policy_names,
+                                           None, collect_stats, rules)
+                           for start, count in chunks]
+                for future in as_completed(futures):
+                    results = merge_results(results, future.result())
+                    print(f"Progress: {results['games_played']}/{num_games} games simulated...")
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        print(f"Wrote {writer.count} game records to {record_path}")
     
-    if results['games_played'] > 0:
-        results['avg_moves'] = results['total_moves'] / results['games_played']
+    results['seed'] = seed
+    results['policies'] = list(policy_names)
+    return results
+
+
+def run_variant_sweep(num_games=10, variants=None, workers=1, seed=None, num_players=4,
+                      policy_names=None, collect_stats=False):
+    """
+    Simulate the same games under several rule variants in one batch.
+    
+    Every variant plays the same game seeds, so differences between the
+    variants aren't down to different dice. With workers, the chunks of
+    all variants share one process pool.
     
+    Args:
+        num_games: Number of games to simulate per variant
+        variants: RULE_VARIANTS keys to play; every variant if None
+        workers: Number of worker processes (1 runs in this process)
+        seed: Master seed; a random one is picked if None
+        num_players: Number of players per game
+        policy_names: POLICIES key for each seat; random moves if None
+        collect_stats: Also gather SimulationStats under 'stats'
+    
+    Returns:
+        Dictionary of statistics dictionaries (as from run_batch_simulation,
+        plus the variant name under 'rules') by variant name
+    """
+    if variants is None:
+        variants = list(RULE_VARIANTS)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if policy_names is None:
+        policy_names = ['random'] * num_players
+    print(f"Running {num_games} headless game simulations for each of {len(variants)} rule variants "
+          f"(seed {seed}, {workers} worker(s))...")
+    print("=" * 50)
+    
+    chunk_size = max(1, min(num_games, -(-num_games * len(variants) // (workers * 4))))
+    tasks = [(name, start, min(chunk_size, num_games - start))
+             for name in variants for start in range(0, num_games, chunk_size)]
+    
+    results = {name: empty_results(num_players) for name in variants}
+    done = 0
+    if workers <= 1:
+        for name, start, count in tasks:
+            results[name] = merge_results(results[name], simulate_games(
+                start, count, seed, num_players, policy_names, None, collect_stats, RULE_VARIANTS[name]))
+            done += count
+            print(f"Progress: {done}/{num_games * len(variants)} games simulated...")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(simulate_games, start, count, seed, num_players, policy_names,
+                                       None, collect_stats, RULE_VARIANTS[name]): name
+                       for name, start, count in tasks}
+            for future in as_completed(futures):
+                name = futures[future]
+                chunk_results = future.result()
+                results[name] = merge_results(results[name], chunk_results)
+                done += chunk_results['games_played']
+                print(f"Progress: {done}/{num_games * len(variants)} games simulated...")
+    
+    for name in variants:
+        results[name]['seed'] = seed
+        results[name]['policies'] = list(policy_names)
+        results[name]['rules'] = name
     return results
 
 
+def print_variant_comparison(sweep):
+    """Print one line per rule variant from run_variant_sweep() results."""
+    print("\n" + "=" * 50)
+    print("RULE VARIANTS")
+    print("=" * 50)
+    for name, results in sweep.items():
+        games = results['games_played']
+        wins = ", ".join(f"{wins / games * 100:4.1f}%" for wins in results['wins']) if games else "-"
+        print(f"{name:<16} avg {results['avg_moves']:6.1f} rolls, "
+              f"{sum(results['captures']) / max(games, 1):5.1f} captures/game, wins {wins}")
+    print("=" * 50)
+
+
 def print_results(results):
     """Print simulation results in a formatted way."""
     print("\n" + "=" * 50)
-    print("SIMULATION RESULTS")
+    print("SIMULATION RESULTS" + (f" ({results['rules']} rules)" if 'rules' in results else ""))
     print("=" * 50)
     print(f"Games Played:     {results['games_played']}")
     print(f"Games Completed:  {results['games_completed']}")
@@ -139,6 +427,26 @@ def print_results(results):
         print(f"Avg Moves:        {results['avg_moves']:.1f}")
         completion_rate = (results['games_completed'] / results['games_played']) * 100
         print(f"Completion Rate:  {completion_rate:.1f}%")
+    if results['games_played'] > 0:
+        print("-" * 50)
+        policies = results.get('policies', ['?'] * len(results['wins']))
+        for seat, name in enumerate(policies):
+            win_rate = results['wins'][seat] / results['games_played'] * 100
+            print(f"Seat {seat + 1} ({name}): {win_rate:5.1f}% wins, {results['captures'][seat]} captures")
+    stats = results.get('stats')
+    if stats is not None and stats.games > 0:
+        print("-" * 50)
+        p50, p90, p99 = stats.length_quantiles()
+        print(f"Game Length:      P50 {p50}, P90 {p90}, P99 {p99} rolls")
+        for seat in range(1, stats.num_players + 1):
+            rate, low, high = stats.win_rate(seat)
+            first_home = stats.first_home_turns[seat - 1].quantile(0.5)
+            print(f"Seat {seat}: win rate {rate * 100:5.1f}% (95% CI {low * 100:.1f}-{high * 100:.1f}%), "
+                  f"median first home entry on turn {first_home}")
+        busiest = sorted(range(len(stats.slot_captures)), key=stats.slot_captures.__getitem__, reverse=True)[:5]
+        print("Most Aggravations: " + ", ".join(f"node {node} ({stats.slot_captures[node]})" for node in busiest))
+    if 'seed' in results:
+        print(f"Seed:             {results['seed']}")
     print("=" * 50)
 
 
@@ -168,29 +476,84 @@ def test_game_engine():
 
 def main():
     """Main entry point for headless simulation."""
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description="Run headless Aggravation simulations.")
+    parser.add_argument('num_games', nargs='?', type=int, default=10,
+                        help="number of games to simulate (default: 10)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="master seed for reproducible results")
+    parser.add_argument('--players', type=int, default=4, choices=range(1, 5),
+                        help="number of players per game (default: 4)")
+    parser.add_argument('--policies', default='random',
+                        help=f"comma-separated policy per seat, one of {', '.join(POLICIES)} "
+                             "(a single name applies to every seat; default: random)")
+    parser.add_argument('--record', metavar='PATH', default=None,
+                        help="write a replayable record of every game to PATH "
+                             "(.gz or .zst suffix compresses)")
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None,
+                        help="compression for --record (default: from the file suffix)")
+    parser.add_argument('--stats', metavar='PATH', default=None,
+                        help="gather detailed balance statistics and write them as JSON to PATH")
+    parser.add_argument('--rules', default='standard',
+                        help=f"comma-separated rule variants, from {', '.join(RULE_VARIANTS)}; "
+                             "several variants play the same games under each (default: standard)")
+    args = parser.parse_args()
+    num_games = args.num_games
+    
+    variants = args.rules.split(',')
+    if any(name not in RULE_VARIANTS for name in variants):
+        parser.error(f"--rules takes names from: {', '.join(RULE_VARIANTS)}")
+    if args.record is not None:
+        try:
+            for name in variants:
+                check_recordable(RULE_VARIANTS[name])
+        except ValueError as e:
+            parser.error(f"--record: {e}")
+    
+    policy_names = args.policies.split(',')
+    if len(policy_names) == 1:
+        policy_names = policy_names * args.players
+    if len(policy_names) != args.players or any(name not in POLICIES for name in policy_names):
+        parser.error(f"--policies needs {args.players} names from: {', '.join(POLICIES)}")
+    
     # First, verify engine works
     test_game_engine()
     
-    # Parse command line arguments
-    num_games = 10
-    if len(sys.argv) > 1:
-        try:
-            num_games = int(sys.argv[1])
-        except ValueError:
-            print(f"Invalid number: {sys.argv[1]}")
-            print("Usage: python3 headless_simulation.py [num_games]")
-            return 1
+    if len(variants) > 1:
+        sweep = run_variant_sweep(num_games, variants, workers=args.workers, seed=args.seed,
+                                  num_players=args.players, policy_names=policy_names,
+                                  collect_stats=args.stats is not None)
+        for results in sweep.values():
+            print_results(results)
+        print_variant_comparison(sweep)
+        if args.stats is not None:
+            with open(args.stats, 'w') as f:
+                json.dump({name: results['stats'].to_dict() for name, results in sweep.items()}, f, indent=2)
+            print(f"Wrote detailed statistics to {args.stats}")
+        return 0
     
     # Run batch simulation
-    results = run_batch_simulation(num_games)
+    results = run_batch_simulation(num_games, workers=args.workers, seed=args.seed,
+                                   num_players=args.players, policy_names=policy_names,
+                                   record_path=args.record, compression=args.compression,
+                                   collect_stats=args.stats is not None,
+                                   rules=RULE_VARIANTS[variants[0]])
     print_results(results)
+    if args.stats is not None:
+        with open(args.stats, 'w') as f:
+            json.dump(results['stats'].to_dict(), f, indent=2)
+        print(f"Wrote detailed statistics to {args.stats}")
     
     # Optionally run one verbose game for demonstration
     if num_games <= 3:
         print("\n" + "=" * 50)
         print("DETAILED SIMULATION OF ONE GAME")
         print("=" * 50)
-        simulate_single_game(verbose=True)
+        simulate_single_game(verbose=True, num_players=args.players,
+                             seat_policies=[seat_policy(name, random) for name in policy_names],
+                             rules=RULE_VARIANTS[variants[0]])
     
     return 0
 
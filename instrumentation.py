@@ -0,0 +1,209 @@
+"""
+Opt-in call counting and timing for AggravationGame hot paths.
+
+enable() replaces the instrumented methods on the AggravationGame class
+with timing wrappers and disable() puts the originals back, so a game
+that isn't being measured runs exactly the uninstrumented code: there is
+no per-call flag check. Times are inclusive (get_valid_moves includes the
+is_valid_move calls it makes) and counters are per process.
+
+Example:
+    import instrumentation
+    instrumentation.enable()
+    with instrumentation.PeriodicDump('engine_stats.json', interval=60):
+        run_games()
+    print(instrumentation.snapshot())
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from game_engine import AggravationGame
+
+# Public methods timed by default: the simulator's turn loop (play_turn,
+# step, get_actions and what they call), then the interactive and file APIs
+INSTRUMENTED_METHODS = (
+    'play_turn',
+    'step',
+    'apply_move',
+    'get_actions',
+    'get_move_options',
+    'execute_move',
+    'get_valid_moves',
+    'is_valid_move',
+    'send_marble_home',
+    'to_dict',
+    'from_dict',
+    'save_to_file',
+    'load_from_file',
+)
+
+# [calls, seconds] per method since the last reset()
+_stats: Dict[str, list] = {}
+# Original class attributes of the methods currently wrapped
+_originals: Dict[str, object] = {}
+
+
+def _wrap(name: str, func):
+    """Wrap a plain function so every call adds to its counters."""
+    counters = _stats.setdefault(name, [0, 0.0])
+    perf_counter = time.perf_counter
+    
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            counters[1] += perf_counter() - start
+            counters[0] += 1
+    
+    return timed
+
+
+def enable(methods: Iterable[str] = INSTRUMENTED_METHODS):
+    """
+    Start timing methods on AggravationGame (every instance, existing ones too).
+    
+    Args:
+        methods: Method names to time; ones already timed are left as they are
+    
+    Raises:
+        AttributeError: If AggravationGame has no such method
+    """
+    for name in methods:
+        if name in _originals:
+            continue
+        original = AggravationGame.__dict__.get(name)
+        if original is None:
+            raise AttributeError(f"AggravationGame has no method {name}")
+        if isinstance(original, classmethod):
+            wrapped = classmethod(_wrap(name, original.__func__))
+        elif isinstance(original, staticmethod):
+            wrapped = staticmethod(_wrap(name, original.__func__))
+        else:
+            wrapped = _wrap(name, original)
+        _originals[name] = original
+        setattr(AggravationGame, name, wrapped)
+
+
+def disable():
+    """Restore every timed method; the counters are kept."""
+    for name, original in _originals.items():
+        setattr(AggravationGame, name, original)
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    """True while any method is being timed."""
+    return bool(_originals)
+
+
+def reset():
+    """Zero the counters."""
+    for counters in _stats.values():
+        counters[0] = 0
+        counters[1] = 0.0
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """
+    Copy of the counters.
+    
+    Returns:
+        Dict by method name of calls, total_seconds and mean_us (mean
+        microseconds per call), for every method timed since the last
+        reset()
+    """
+    result = {}
+    for name, (calls, seconds) in _stats.items():
+        if calls:
+            result[name] = {
+                'calls': calls,
+                'total_seconds': seconds,
+                'mean_us': seconds / calls * 1e6,
+            }
+    return result
+
+
+def merge_snapshots(a: Dict[str, Dict[str, float]], b: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """
+    Combine snapshots from two processes.
+    
+    Args:
+        a: Snapshot
+        b: Snapshot
+    
+    Returns:
+        New snapshot with the calls and times of both
+    """
+    merged = {}
+    for name in set(a) | set(b):
+        calls = a.get(name, {}).get('calls', 0) + b.get(name, {}).get('calls', 0)
+        seconds = a.get(name, {}).get('total_seconds', 0.0) + b.get(name, {}).get('total_seconds', 0.0)
+        merged[name] = {'calls': calls, 'total_seconds': seconds, 'mean_us': seconds / calls * 1e6}
+    return merged
+
+
+def dump(path: str):
+    """
+    Write a snapshot to a JSON file, replacing it atomically.
+    
+    Args:
+        path: File to write
+    """
+    data = {'timestamp': time.time(), 'pid': os.getpid(), 'methods': snapshot()}
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+class PeriodicDump:
+    """
+    Background thread that dumps a snapshot every interval seconds, and
+    once more when stopped. Usable as a context manager.
+    """
+    
+    def __init__(self, path: str, interval: float = 60.0):
+        """
+        Create a dumper (call start() or use it in a with block).
+        
+        Args:
+            path: JSON file to write
+            interval: Seconds between dumps
+        """
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> 'PeriodicDump':
+        """Start dumping in a daemon thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='instrumentation-dump', daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the thread and write a final dump."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            dump(self.path)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            dump(self.path)
+    
+    def __enter__(self) -> 'PeriodicDump':
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,316 @@
+"""
+Monte Carlo Tree Search player for Aggravation.
+
+Every tree node is a decision: a player to move with a known roll. An
+edge is a move, and the roll that follows it is sampled, so a node's
+children are keyed by (move, next roll). Moves are picked with UCT on
+the mover's own value, and each iteration backs up one value per player
+(max-n), which fits the four-player game without pretending it is
+two-sided. Moves are get_actions() entries, so under rules with
+shortcuts the tree also branches on each marble's destination.
+
+Rollouts play random moves on a scratch copy of the position for a
+limited number of rolls, then score the position per player with
+score_position(). The player keeps its tree between moves and re-roots
+it at the position it is asked about next, if that was searched under
+the same house rules. With workers > 1, searches
+run in a process pool with root parallelization: each worker grows its
+own tree from the same position and the root visit counts are summed.
+"""
+
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from evaluation import SCORE_LIMIT, score_position
+from game_engine import AggravationGame
+
+# A move as get_actions() gives it: a marble index or a (marble_idx, to_node) pair
+Move = Union[int, Tuple[int, int]]
+
+
+class _Node:
+    """Decision node: player to move with dice_roll, plus per-move statistics."""
+    __slots__ = ('player', 'dice_roll', 'key', 'moves', 'visits', 'move_visits',
+                 'move_values', 'children')
+    
+    def __init__(self, game: AggravationGame, dice_roll: int):
+        self.player = game.current_player
+        self.dice_roll = dice_roll
+        # Position, roll and rules, for finding this node again when re-rooting
+        self.key = (game.zobrist_hash, dice_roll, game.rules)
+        # None stands for the forced pass when no move is legal
+        self.moves = game.get_actions(self.player, dice_roll) or [None]
+        self.visits = 0
+        self.move_visits = [0] * len(self.moves)
+        self.move_values = [0.0] * len(self.moves)
+        self.children = {}
+
+
+class MCTSPlayer:
+    """
+    Policy that picks moves by UCT Monte Carlo Tree Search.
+    
+    Each search stops after iterations or time_limit, whichever comes
+    first (either may be None, not both); the time limit covers the whole
+    move, re-rooting and copying the position included, and a search
+    stops early rather than start an iteration it expects to overrun.
+    The move played is the most
+    visited at the root. Statistics of the last search are kept in
+    iterations, elapsed and iterations_per_second; totals over every
+    search in total_iterations and total_elapsed.
+    """
+    
+    def __init__(self, iterations: Optional[int] = None, time_limit: Optional[float] = 0.05,
+                 exploration: float = 1.0, rollout_limit: Optional[int] = 40,
+                 rollout_policy: Optional[Callable[[AggravationGame, int, List[Move]], Move]] = None,
+                 value_scale: float = SCORE_LIMIT / 12, workers: int = 1,
+                 seed=None, reuse_tree: bool = True):
+        """
+        Create a player.
+        
+        Args:
+            iterations: Iterations per search (per worker), or None
+            time_limit: Seconds per search, or None
+            exploration: UCT exploration constant
+            rollout_limit: Rolls per rollout before the position is scored
+                           (0 scores the new node right away), or None to
+                           play every rollout to the end
+            rollout_policy: Called as policy(game, dice_roll, valid_moves);
+                            uniformly random moves if None
+            value_scale: Score difference that makes a rollout's value
+                         about 0.73 rather than 0.5 (one top marble's
+                         worth by default)
+            workers: Processes to search in parallel (root parallelization)
+            seed: Seed for the player's own random source
+            reuse_tree: Keep the tree between moves and re-root it
+        """
+        if iterations is None and time_limit is None:
+            raise ValueError("MCTSPlayer needs an iteration or time limit")
+        self.iterations_limit = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.rollout_limit = rollout_limit
+        self.rollout_policy = rollout_policy
+        self.value_scale = value_scale
+        self.workers = workers
+        self.reuse_tree = reuse_tree and workers <= 1
+        self.rng = random.Random(seed)
+        self.iterations = 0
+        self.elapsed = 0.0
+        self.total_iterations = 0
+        self.total_elapsed = 0.0
+        self.reused_visits = 0
+        self._root = None
+        self._executor = None
+    
+    def __call__(self, game: AggravationGame, dice_roll: int, valid_moves: List[Move]) -> Move:
+        return self.choose_move(game, dice_roll, valid_moves)
+    
+    def __getstate__(self) -> dict:
+        # Trees and process pools stay in the process that built them
+        state = {name: value for name, value in self.__dict__.items()}
+        state['_root'] = None
+        state['_executor'] = None
+        return state
+    
+    @property
+    def iterations_per_second(self) -> float:
+        """Iterations per second of the last search, over all workers."""
+        return self.iterations / self.elapsed if self.elapsed > 0 else 0.0
+    
+    def choose_move(self, game: AggravationGame, dice_roll: int,
+                    valid_moves: Optional[List[Move]] = None) -> Move:
+        """
+        Pick a move for the current player.
+        
+        Args:
+            game: Game to move in; left unchanged
+            dice_roll: Number rolled on die
+            valid_moves: Valid moves for the roll (see get_actions), or
+                         None to compute them
+        
+        Returns:
+            Chosen move: marble index (-1 for out of home), or a
+            (marble_idx, to_node) pair under rules with shortcuts
+        
+        Raises:
+            ValueError: If there is no valid move
+        """
+        start = time.perf_counter()
+        # Re-rooting and copying the position come out of the same budget
+        deadline = None if self.time_limit is None else start + self.time_limit
+        if valid_moves is None:
+            valid_moves = game.get_actions(game.current_player, dice_roll)
+        if not valid_moves:
+            raise ValueError(f"Player {game.current_player} has no valid move with a {dice_roll}")
+        
+        if len(valid_moves) == 1:
+            self.iterations = 0
+            move = valid_moves[0]
+        elif self.workers > 1:
+            move = self._parallel_search(game, dice_roll)
+        else:
+            root = self._reroot(game, dice_roll)
+            self.iterations = self.search(root, game, deadline)
+            move = root.moves[max(range(len(root.moves)), key=root.move_visits.__getitem__)]
+            self._root = root if self.reuse_tree else None
+        
+        self.elapsed = time.perf_counter() - start
+        self.total_iterations += self.iterations
+        self.total_elapsed += self.elapsed
+        return move
+    
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def _reroot(self, game: AggravationGame, dice_roll: int) -> _Node:
+        """Find the node for this position in the kept tree, or start a new tree."""
+        key = (game.zobrist_hash, dice_roll, game.rules)
+        self.reused_visits = 0
+        if self._root is not None:
+            # Breadth-first, so the shallowest match (the likeliest
+            # continuation of the game) wins
+            frontier = [self._root]
+            while frontier:
+                next_frontier = []
+                for node in frontier:
+                    if node.key == key:
+                        self.reused_visits = node.visits
+                        return node
+                    next_frontier.extend(node.children.values())
+                frontier = next_frontier
+        return _Node(game, dice_roll)
+    
+    def search(self, root: _Node, game: AggravationGame, deadline: Optional[float] = None) -> int:
+        """
+        Grow the tree from root.
+        
+        Args:
+            root: Node for game's position
+            game: Game at the root position; left unchanged
+            deadline: time.perf_counter() value to stop by, or None for
+                      time_limit from now
+        
+        Returns:
+            Number of iterations run
+        """
+        if deadline is None and self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
+        scratch = game.clone()
+        started = time.perf_counter()
+        iterations = 0
+        while self.iterations_limit is None or iterations < self.iterations_limit:
+            if deadline is not None and iterations:
+                # Stop unless an average iteration still fits before the deadline
+                now = time.perf_counter()
+                if now + (now - started) / iterations > deadline:
+                    break
+            scratch.copy_from(game)
+            self._iterate(root, scratch)
+            iterations += 1
+        return iterations
+    
+    def _select(self, node: _Node) -> int:
+        """Index of the move to follow from node (UCT on the mover's value)."""
+        best_index = 0
+        best_score = -1.0
+        log_visits = math.log(node.visits + 1)
+        for index, visits in enumerate(node.move_visits):
+            if visits == 0:
+                return index
+            score = (node.move_values[index] / visits
+                     + self.exploration * math.sqrt(log_visits / visits))
+            if score > best_score:
+                best_index, best_score = index, score
+        return best_index
+    
+    def _iterate(self, root: _Node, game: AggravationGame):
+        """One selection, expansion, rollout and backup from root."""
+        rng = self.rng
+        path = []
+        node = root
+        while True:
+            index = self._select(node)
+            path.append((node, index))
+            game.step(node.moves[index], node.dice_roll)
+            if game.game_over:
+                values = self._win_values(game)
+                break
+            dice_roll = int(rng.random() * 6) + 1
+            child_key = (index, dice_roll)
+            child = node.children.get(child_key)
+            if child is None:
+                node.children[child_key] = _Node(game, dice_roll)
+                values = self._rollout(game, dice_roll)
+                break
+            node = child
+        
+        for node, index in path:
+            node.visits += 1
+            node.move_visits[index] += 1
+            node.move_values[index] += values[node.player - 1]
+    
+    def _rollout(self, game: AggravationGame, dice_roll: int) -> List[float]:
+        """Play on from game for rollout_limit rolls; value per player."""
+        rng = self.rng
+        policy = self.rollout_policy
+        limit = self.rollout_limit
+        rolls = 0
+        while limit is None or rolls < limit:
+            valid_moves = game.get_actions(game.current_player, dice_roll)
+            if not valid_moves:
+                # Forced pass (what step(None) does, without re-checking)
+                if dice_roll != 6:
+                    game.next_player()
+            else:
+                if policy is None:
+                    move = valid_moves[int(rng.random() * len(valid_moves))]
+                else:
+                    move = policy(game, dice_roll, valid_moves)
+                game.step(move, dice_roll)
+                if game.game_over:
+                    return self._win_values(game)
+            rolls += 1
+            dice_roll = int(rng.random() * 6) + 1
+        return self._position_values(game)
+    
+    def _win_values(self, game: AggravationGame) -> List[float]:
+        return [1.0 if player == game.winner else 0.0
+                for player in range(1, game.num_players + 1)]
+    
+    def _position_values(self, game: AggravationGame) -> List[float]:
+        """Value in (0, 1) per player of an unfinished position."""
+        scale = self.value_scale
+        return [1 / (1 + math.exp(-score_position(game, player) / scale))
+                for player in range(1, game.num_players + 1)]
+    
+    def _parallel_search(self, game: AggravationGame, dice_roll: int) -> Move:
+        """Root parallelization: independent trees in each worker, visits summed."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        seeds = [self.rng.getrandbits(64) for _ in range(self.workers)]
+        futures = [self._executor.submit(_search_root_stats, self, game, dice_roll, seed)
+                   for seed in seeds]
+        visits = {}
+        self.iterations = 0
+        for future in futures:
+            worker_visits, iterations = future.result()
+            self.iterations += iterations
+            for move, count in worker_visits.items():
+                visits[move] = visits.get(move, 0) + count
+        return max(visits, key=visits.get)
+
+
+def _search_root_stats(player: MCTSPlayer, game: AggravationGame, dice_roll: int,
+                       seed: int) -> Tuple[Dict[Move, int], int]:
+    """Worker task: one fresh search; returns root visits per move and iterations."""
+    player.rng = random.Random(seed)
+    root = _Node(game, dice_roll)
+    iterations = player.search(root, game)
+    return dict(zip(root.moves, root.move_visits)), iterations
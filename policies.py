@@ -0,0 +1,110 @@
+"""
+Move-choosing policies for simulated Aggravation players.
+
+A policy is called as policy(game, dice_roll, valid_moves) with the legal
+moves already computed for game.current_player (see
+AggravationGame.get_actions), and returns one of them: a marble index,
+-1 to move a marble out of home, or under rules with shortcuts a
+(marble_idx, to_node) pair. Policies only read the game or apply and
+undo moves on it, so one policy object can serve every seat. Search
+players keep tables and trees between moves, though, so simulations give
+them a fresh player per seat and game (see seat_policy).
+"""
+
+import random
+from typing import Callable, List, Tuple, Union
+
+from evaluation import PROGRESS, score_position
+from expectimax import ExpectimaxPlayer
+from game_engine import AggravationGame, split_action
+from mcts import MCTSPlayer
+
+# A move as get_actions() gives it: a marble index or a (marble_idx, to_node) pair
+Move = Union[int, Tuple[int, int]]
+Policy = Callable[[AggravationGame, int, List[Move]], Move]
+
+
+def first_legal(game: AggravationGame, dice_roll: int, valid_moves: List[Move]) -> Move:
+    """Always take the first valid move."""
+    return valid_moves[0]
+
+
+def random_move(game: AggravationGame, dice_roll: int, valid_moves: List[Move]) -> Move:
+    """Pick a valid move uniformly at random, using the game's random source."""
+    return valid_moves[int(game.rng.random() * len(valid_moves))]
+
+
+def greedy_capture(game: AggravationGame, dice_roll: int, valid_moves: List[Move]) -> Move:
+    """
+    Aggravate an opponent whenever possible, otherwise advance the marble
+    that is furthest along, to its furthest destination (bringing a
+    marble out of home if that is all that can move).
+    """
+    player = game.current_player
+    for move in valid_moves:
+        marble_idx, to_node = split_action(move)
+        if game.is_capture(player, marble_idx, dice_roll, to_node):
+            return move
+    progress = PROGRESS[player]
+    nodes = game.get_marble_nodes(player)
+    
+    def key(move):
+        marble_idx, to_node = split_action(move)
+        if marble_idx < 0:
+            return 0, 0
+        return progress[nodes[marble_idx]], 0 if to_node is None else progress[to_node]
+    
+    return max(valid_moves, key=key)
+
+
+def one_ply_search(game: AggravationGame, dice_roll: int, valid_moves: List[Move]) -> Move:
+    """
+    Try every valid move with apply_move()/undo() and keep the one with the
+    best score_position() for the mover.
+    """
+    player = game.current_player
+    best_move = valid_moves[0]
+    best_score = None
+    for move in valid_moves:
+        marble_idx, to_node = split_action(move)
+        record = game.apply_move(player, marble_idx, dice_roll, to_node)
+        score = score_position(game, player)
+        game.undo(record)
+        if best_score is None or score > best_score:
+            best_move, best_score = move, score
+    return best_move
+
+
+# Policies by name, for command line options and worker processes. The
+# search players here think for a fixed time per move, for interactive play.
+POLICIES = {
+    'random': random_move,
+    'first': first_legal,
+    'greedy': greedy_capture,
+    'search': one_ply_search,
+    'expectimax': ExpectimaxPlayer(),
+    'mcts': MCTSPlayer(),
+}
+
+# Simulated seats of search players do a fixed amount of work per move
+# instead, so a game depends only on its seed. Each factory is called
+# with the game's random source and makes a fresh player for one seat.
+SEAT_POLICIES = {
+    'expectimax': lambda rng: ExpectimaxPlayer(max_depth=3, time_limit=None),
+    'mcts': lambda rng: MCTSPlayer(iterations=64, time_limit=None, seed=rng.getrandbits(64)),
+}
+
+
+def seat_policy(name: str, rng: random.Random) -> Policy:
+    """
+    Policy for one seat of a simulated game.
+    
+    Args:
+        name: POLICIES key
+        rng: The game's random source, for seeding the seat's player
+    
+    Returns:
+        A fresh player from SEAT_POLICIES, or the shared POLICIES entry
+    """
+    factory = SEAT_POLICIES.get(name)
+    return POLICIES[name] if factory is None else factory(rng)
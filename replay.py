@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Replay recorded games and seek to any point in them.
+
+A GameReplay plays a GameRecord through AggravationGame once, keeping a
+snapshot every K rolls, so reaching roll T later replays at most K - 1
+rolls from the nearest snapshot instead of T from the start.
+
+Usage:
+    python3 replay.py games.agr SEED [--roll N] [--turn N]
+
+Example:
+    python3 replay.py games.agr 42:17            # Final position of game 17
+    python3 replay.py games.agr.gz 42:17 --roll 500
+"""
+
+import argparse
+import sys
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+from game_engine import AggravationGame
+from game_records import GameRecord, read_records
+
+# Rolls between snapshots
+DEFAULT_CHECKPOINT_INTERVAL = 64
+
+
+class GameReplay:
+    """
+    Random access to the positions of one recorded game.
+    
+    Position n is the game after its first n rolls; position 0 is the
+    starting position and position len(replay) the final one.
+    """
+    
+    def __init__(self, record: GameRecord, checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Replay the record once, taking snapshots along the way.
+        
+        Args:
+            record: Game to replay
+            checkpoint_interval: Rolls between snapshots (K)
+        
+        Raises:
+            ValueError: If a recorded move is illegal in the replayed position
+        """
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1")
+        self.record = record
+        self.checkpoint_interval = checkpoint_interval
+        self._moves = list(record.iter_moves())
+        self._checkpoints = []
+        # Roll index at which each turn starts
+        self.turn_starts = [0]
+        
+        game = AggravationGame(num_players=record.num_players)
+        for index, (dice_roll, marble_idx) in enumerate(self._moves):
+            if index % checkpoint_interval == 0:
+                self._checkpoints.append(game.clone())
+            game.step(marble_idx, dice_roll)
+            # Every roll but a 6 (or the winning roll) ends the turn
+            if dice_roll != 6 and not game.game_over:
+                self.turn_starts.append(index + 1)
+        if len(self._moves) % checkpoint_interval == 0:
+            self._checkpoints.append(game.clone())
+        self.final = game
+    
+    @classmethod
+    def from_moves(cls, moves: Iterable[Tuple[int, Optional[int]]], num_players: int = 4,
+                   checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL) -> 'GameReplay':
+        """
+        Replay a plain move list.
+        
+        Args:
+            moves: (dice_roll, marble_idx) per roll, marble_idx -1 for out
+                   of home and None for a pass
+            num_players: Number of players in the game
+            checkpoint_interval: Rolls between snapshots
+        
+        Returns:
+            GameReplay of the moves
+        """
+        record = GameRecord(num_players=num_players)
+        for dice_roll, marble_idx in moves:
+            record.add_move(dice_roll, marble_idx)
+        return cls(record, checkpoint_interval)
+    
+    def __len__(self) -> int:
+        return len(self._moves)
+    
+    @property
+    def num_turns(self) -> int:
+        """Number of turns started in the game."""
+        return len(self.turn_starts)
+    
+    def move(self, index: int) -> Tuple[int, Optional[int]]:
+        """Return the (dice_roll, marble_idx) of roll number index (0-based)."""
+        return self._moves[index]
+    
+    def seek(self, position: int) -> AggravationGame:
+        """
+        Get the game after its first position rolls.
+        
+        Args:
+            position: Number of rolls to play (0 to len(self)); negative
+                      values count back from the end
+        
+        Returns:
+            New AggravationGame the caller may modify freely
+        """
+        if position < 0:
+            position += len(self._moves) + 1
+        if not 0 <= position <= len(self._moves):
+            raise IndexError(f"Position {position} outside 0-{len(self._moves)}")
+        checkpoint = position // self.checkpoint_interval
+        game = self._checkpoints[checkpoint].clone()
+        for dice_roll, marble_idx in self._moves[checkpoint * self.checkpoint_interval:position]:
+            game.step(marble_idx, dice_roll)
+        return game
+    
+    def seek_turn(self, turn: int) -> AggravationGame:
+        """
+        Get the game at the start of a turn.
+        
+        Args:
+            turn: Turn number, 0 for the first turn
+        
+        Returns:
+            New AggravationGame before the turn's first roll
+        """
+        return self.seek(self.turn_starts[turn])
+    
+    def turn_of(self, position: int) -> int:
+        """Return the turn that roll number position belongs to."""
+        return bisect_right(self.turn_starts, position) - 1
+
+
+def find_record(records: Iterable[GameRecord], seed: str) -> Optional[GameRecord]:
+    """
+    Find a game by its seed.
+    
+    Args:
+        records: Records to search, e.g. read_records(path)
+        seed: Seed of the wanted game
+    
+    Returns:
+        The first record with that seed, or None
+    """
+    for record in records:
+        if record.seed == seed:
+            return record
+    return None
+
+
+def unfinished_games(records: Iterable[GameRecord]) -> List[GameRecord]:
+    """Return the records of games that stopped without a winner."""
+    return [record for record in records if record.winner is None]
+
+
+def print_position(game: AggravationGame):
+    """Print where every player's marbles are."""
+    for player in range(1, game.num_players + 1):
+        print(f"Player {player}: home {game.get_num_in_home(player)}, "
+              f"marbles at nodes {game.get_marble_nodes(player)}")
+    if game.game_over:
+        print(f"Game over, player {game.winner} won")
+    else:
+        print(f"Player {game.current_player} to roll")
+
+
+def main():
+    """Main entry point: print one position of a recorded game."""
+    parser = argparse.ArgumentParser(description="Inspect a recorded Aggravation game.")
+    parser.add_argument('path', help="game record file written by headless_simulation.py --record")
+    parser.add_argument('seed', help="seed of the game, e.g. 42:17")
+    parser.add_argument('--roll', type=int, default=None,
+                        help="show the position after this many rolls (default: the end)")
+    parser.add_argument('--turn', type=int, default=None,
+                        help="show the position at the start of this turn")
+    args = parser.parse_args()
+    
+    record = find_record(read_records(args.path), args.seed)
+    if record is None:
+        parser.error(f"no game with seed {args.seed} in {args.path}")
+    replay = GameReplay(record)
+    print(f"Game {record.seed}: {len(replay)} rolls, {replay.num_turns} turns, "
+          f"winner {record.winner}")
+    
+    if args.turn is not None:
+        position = replay.turn_starts[args.turn]
+    elif args.roll is not None:
+        position = args.roll
+    else:
+        position = len(replay)
+    print(f"After roll {position} (turn {replay.turn_of(position)}):")
+    print_position(replay.seek(position))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
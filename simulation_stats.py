@@ -0,0 +1,197 @@
+"""
+Streaming statistics for headless simulation runs.
+
+Everything here is a fixed-size table of counts, so memory stays
+constant however many games are added, and merging two sets of
+statistics is element-wise addition: associative, commutative and exact,
+so worker processes can be merged in any order with the same outcome.
+
+Game lengths and turns to the first final home entry are whole numbers
+below a known cap (the simulator stops games at 2000 rolls), so they are
+kept as exact histograms with one bin per value plus an overflow bin.
+For these bounded integers the histogram is a mergeable quantile sketch
+with no error: P50/P90/P99 come straight from the counts.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence
+
+from game_engine import NUM_NODES
+
+# Largest value with its own bin; games are capped at this many rolls
+DEFAULT_MAX_VALUE = 2000
+
+# z for a 95% confidence interval
+Z_95 = 1.959963984540054
+
+
+class Histogram:
+    """
+    Counts of whole numbers 0..max_value, with larger values in an
+    overflow bin (reported as max_value + 1 by quantile()).
+    """
+    
+    def __init__(self, max_value: int = DEFAULT_MAX_VALUE):
+        self.max_value = max_value
+        self.counts = [0] * (max_value + 2)
+        self.total = 0
+        self.sum = 0
+    
+    def add(self, value: int, count: int = 1):
+        """Count value (negative values count as 0)."""
+        self.counts[min(max(value, 0), self.max_value + 1)] += count
+        self.total += count
+        self.sum += value * count
+    
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        """New histogram holding the counts of both."""
+        if other.max_value != self.max_value:
+            raise ValueError("Can't merge histograms with different ranges")
+        merged = Histogram(self.max_value)
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        merged.total = self.total + other.total
+        merged.sum = self.sum + other.sum
+        return merged
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Histogram) and self.counts == other.counts and self.sum == other.sum
+    
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+    
+    def quantile(self, q: float) -> Optional[int]:
+        """
+        Nearest-rank quantile.
+        
+        Args:
+            q: Fraction in [0, 1]
+        
+        Returns:
+            Smallest value with at least q of the counts at or below it,
+            or None if the histogram is empty
+        """
+        if not self.total:
+            return None
+        rank = max(1, math.ceil(q * self.total))
+        seen = 0
+        for value, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return value
+        return self.max_value + 1
+    
+    def nonzero(self) -> Dict[int, int]:
+        """Counts by value, for the values seen."""
+        return {value: count for value, count in enumerate(self.counts) if count}
+
+
+def wilson_interval(successes: int, trials: int, z: float = Z_95):
+    """
+    Wilson score interval for a proportion.
+    
+    Args:
+        successes: Number of successes
+        trials: Number of trials
+        z: Standard normal quantile for the confidence level
+    
+    Returns:
+        (low, high), or (0.0, 1.0) with no trials
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denom = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denom
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class SimulationStats:
+    """
+    Balance statistics over any number of games: game lengths, per-seat
+    wins, aggravations per track slot and each seat's turns to its first
+    final home entry.
+    """
+    
+    def __init__(self, num_players: int = 4, max_value: int = DEFAULT_MAX_VALUE):
+        self.num_players = num_players
+        self.max_value = max_value
+        self.games = 0
+        self.lengths = Histogram(max_value)
+        self.wins = [0] * num_players
+        # Aggravations by the node the victim was sent home from: a ring
+        # node, or the center hole when playing with shortcuts
+        self.slot_captures = [0] * NUM_NODES
+        # Per seat: own turns taken until a marble first reached the final home
+        self.first_home_turns = [Histogram(max_value) for _ in range(num_players)]
+    
+    def add_capture(self, node: int):
+        """Count an aggravation on a node (see NODE_COORDS)."""
+        self.slot_captures[node] += 1
+    
+    def add_game(self, rolls: int, winner: Optional[int], first_home_turns: Sequence[Optional[int]]):
+        """
+        Count a finished game.
+        
+        Args:
+            rolls: Dice rolled in the game
+            winner: Winning player, or None if the game hit the roll cap
+            first_home_turns: Per seat, the turn on which a marble first
+                              entered the final home, or None if none did
+        """
+        self.games += 1
+        self.lengths.add(rolls)
+        if winner is not None:
+            self.wins[winner - 1] += 1
+        for seat, turns in enumerate(first_home_turns):
+            if turns is not None:
+                self.first_home_turns[seat].add(turns)
+    
+    def merge(self, other: 'SimulationStats') -> 'SimulationStats':
+        """New statistics covering the games of both."""
+        if other.num_players != self.num_players:
+            raise ValueError("Can't merge statistics for different numbers of players")
+        merged = SimulationStats(self.num_players, self.max_value)
+        merged.games = self.games + other.games
+        merged.lengths = self.lengths.merge(other.lengths)
+        merged.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        merged.slot_captures = [a + b for a, b in zip(self.slot_captures, other.slot_captures)]
+        merged.first_home_turns = [a.merge(b) for a, b in zip(self.first_home_turns, other.first_home_turns)]
+        return merged
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SimulationStats) and self.to_dict() == other.to_dict()
+    
+    def length_quantiles(self, qs: Sequence[float] = (0.5, 0.9, 0.99)) -> List[Optional[int]]:
+        """Game length (rolls) at each quantile."""
+        return [self.lengths.quantile(q) for q in qs]
+    
+    def win_rate(self, seat: int):
+        """
+        A seat's win rate with its 95% confidence interval.
+        
+        Args:
+            seat: Seat number (1-num_players)
+        
+        Returns:
+            (rate, low, high)
+        """
+        wins = self.wins[seat - 1]
+        low, high = wilson_interval(wins, self.games)
+        return (wins / self.games if self.games else 0.0), low, high
+    
+    def to_dict(self) -> Dict:
+        """Plain-data summary, for JSON output."""
+        p50, p90, p99 = self.length_quantiles()
+        return {
+            'games': self.games,
+            'length': {'mean': self.lengths.mean, 'p50': p50, 'p90': p90, 'p99': p99,
+                       'histogram': self.lengths.nonzero()},
+            'wins': list(self.wins),
+            'win_rates': [list(self.win_rate(seat)) for seat in range(1, self.num_players + 1)],
+            'slot_captures': list(self.slot_captures),
+            'first_home_turns': [{'mean': h.mean, 'p50': h.quantile(0.5), 'p90': h.quantile(0.9),
+                                  'histogram': h.nonzero()}
+                                 for h in self.first_home_turns],
+        }
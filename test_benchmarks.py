@@ -0,0 +1,72 @@
+"""
+Tests for the engine benchmark runner (its bookkeeping, not the timings).
+"""
+
+import pytest
+from benchmarks.engine import (
+    BENCHMARKS, compare, midgame_position, run_benchmarks, temporary_save_directory
+)
+from game_engine import get_save_directory
+
+
+class TestBenchmarks:
+    """Test that benchmarks run and regressions are caught."""
+    
+    def test_every_benchmark_builds_a_call(self):
+        """Test that each benchmark's call runs on the mid-game position."""
+        game = midgame_position()
+        with temporary_save_directory():
+            for name, factory in BENCHMARKS.items():
+                if name != 'full_game':
+                    factory(game.clone())()
+    
+    def test_saves_use_a_temporary_directory(self):
+        """Test that the save and load benchmarks leave the real save directory alone."""
+        before = sorted(get_save_directory().iterdir())
+        with temporary_save_directory() as save_dir:
+            BENCHMARKS['save_to_file'](midgame_position())()
+            assert [path.name for path in save_dir.iterdir()] == ['benchmark.json']
+        assert not save_dir.exists()
+        assert sorted(get_save_directory().iterdir()) == before
+    
+    def test_results_are_json_ready(self):
+        """Test that results carry per-op timings for the benchmarks asked for."""
+        results = run_benchmarks(['get_valid_moves', 'is_valid_move'], repeat=1)
+        assert sorted(results['benchmarks']) == ['get_valid_moves', 'is_valid_move']
+        for result in results['benchmarks'].values():
+            assert result['ns_per_op'] > 0
+            assert result['ops_per_sec'] == pytest.approx(1e9 / result['ns_per_op'])
+            assert result['noise_pct'] >= 0
+    
+    def test_compare_flags_regressions(self):
+        """Test that only slowdowns past the threshold count as regressions."""
+        baseline = {'benchmarks': {'a': {'ns_per_op': 100.0}, 'b': {'ns_per_op': 100.0},
+                                   'gone': {'ns_per_op': 1.0}}}
+        results = {'benchmarks': {'a': {'ns_per_op': 120.0}, 'b': {'ns_per_op': 105.0},
+                                  'new': {'ns_per_op': 1.0}}}
+        rows = {row['name']: row for row in compare(results, baseline, threshold=10)}
+        assert sorted(rows) == ['a', 'b']
+        assert rows['a']['regressed'] and rows['a']['change_pct'] == 20
+        assert not rows['b']['regressed']
+    
+    def test_compare_allows_for_noise(self):
+        """Test that a slowdown within either run's noise margin is not a regression."""
+        baseline = {'benchmarks': {'a': {'ns_per_op': 100.0, 'noise_pct': 12.0},
+                                   'b': {'ns_per_op': 100.0}}}
+        results = {'benchmarks': {'a': {'ns_per_op': 120.0, 'noise_pct': 1.0},
+                                  'b': {'ns_per_op': 120.0, 'noise_pct': 5.0}}}
+        rows = {row['name']: row for row in compare(results, baseline, threshold=10)}
+        assert not rows['a']['regressed'] and rows['a']['noise_pct'] == 12
+        assert rows['b']['regressed']
+    
+    def test_compare_needs_the_fastest_batch_slower_too(self):
+        """Test that a slow median alone is not a regression when the fastest batch kept up."""
+        baseline = {'benchmarks': {'a': {'ns_per_op': 100.0, 'best_ns': 90.0}}}
+        results = {'benchmarks': {'a': {'ns_per_op': 150.0, 'best_ns': 95.0}}}
+        rows = compare(results, baseline, threshold=10)
+        assert rows[0]['change_pct'] == 50 and not rows[0]['regressed']
+        
+        # Older baselines have no best_ns; their ns_per_op was the fastest batch
+        legacy = {'benchmarks': {'a': {'ns_per_op': 100.0}}}
+        assert not compare({'benchmarks': {'a': {'ns_per_op': 150.0, 'best_ns': 105.0}}}, legacy, 10)[0]['regressed']
+        assert compare({'benchmarks': {'a': {'ns_per_op': 150.0, 'best_ns': 130.0}}}, legacy, 10)[0]['regressed']
@@ -0,0 +1,128 @@
+"""
+Tests for the endgame tables.
+Solved values must satisfy the game's expectimax equations as the
+engine plays them.
+"""
+
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from game_engine import AggravationGame, NODE_COORDS, OFF_BOARD, PLAYER_STARTING_HOMES, RULE_VARIANTS
+from endgame import EndgamePolicy, EndgameTable, _Side, solve, table_size
+from policies import first_legal
+from conftest import with_rules
+
+
+@pytest.fixture(scope="module")
+def table():
+    return solve(outside=1)
+
+
+def set_marbles(game, player, nodes):
+    """Place a player's marbles on nodes, keeping the derived fields in step."""
+    setattr(game, f'p{player}_marbles', [NODE_COORDS[node] if node != OFF_BOARD else (None, None)
+                                          for node in nodes])
+    setattr(game, f'p{player}_home', PLAYER_STARTING_HOMES[player][:nodes.count(OFF_BOARD)])
+    finals = game._get_player_data(player).final_home_nodes
+    setattr(game, f'p{player}_end_home', [NODE_COORDS[node] for node in nodes if node in finals]
+            + [(None, None)] * (4 - sum(node in finals for node in nodes)))
+    start = game._get_player_data(player).start_node
+    setattr(game, f'p{player}_start_occupied', start in nodes)
+
+
+def endgame_positions(table, count, seed):
+    """Yield random two-player positions from the table, with the mover set."""
+    rng = random.Random(seed)
+    side1, side2 = table._sides[1, 1], table._sides[2, 1]
+    while count > 0:
+        game = AggravationGame(num_players=2)
+        for player, side in ((1, side1), (2, side2)):
+            waiting, spots = side.configs[rng.randrange(len(side))]
+            nodes = [OFF_BOARD] * waiting + [side.path[spot] for spot in spots] + list(side.packed)
+            set_marbles(game, player, nodes)
+        occupied = [node for player in (1, 2) for node in game.get_marble_nodes(player) if node != OFF_BOARD]
+        if len(set(occupied)) < len(occupied) or game.check_win_condition(1) or game.check_win_condition(2):
+            continue
+        game.current_player = rng.choice((1, 2))
+        count -= 1
+        yield game
+
+
+class TestEndgame:
+    """Test the perfect hash, the solved values and lookups."""
+    
+    @pytest.mark.parametrize("k", [1, 2])
+    def test_rank_is_perfect_hash(self, k):
+        """Test that ranks number the arrangements 0..size-1 without gaps."""
+        side = _Side(2, k)
+        assert [side.rank(*config) for config in side.configs] == list(range(len(side)))
+        assert table_size(k) == 2 * sum(len(_Side(1, j)) for j in range(1, k + 1)) ** 2
+    
+    def test_values_satisfy_expectimax(self, table):
+        """Test that every value is the mean over rolls of the best move's value."""
+        for game in endgame_positions(table, 150, seed=1):
+            player = game.current_player
+            expected = 0.0
+            for dice_roll in range(1, 7):
+                after = player if dice_roll == 6 else 3 - player
+                moves = game.get_valid_moves(player, dice_roll)
+                if not moves:
+                    expected += table.win_probability(game, player, after)
+                    continue
+                values = []
+                for marble_idx in moves:
+                    record = game.apply_move(player, marble_idx, dice_roll)
+                    if game.check_win_condition(player):
+                        values.append(1.0)
+                    else:
+                        values.append(table.win_probability(game, player, after))
+                    game.undo(record)
+                expected += max(values)
+            assert table.win_probability(game) == pytest.approx(expected / 6, abs=1e-9)
+            assert table.win_probability(game, 3 - player) == pytest.approx(1 - expected / 6, abs=1e-9)
+    
+    def test_positions_outside_table(self, table):
+        """Test that openings, 4-player games and finished games aren't looked up."""
+        assert table.index(AggravationGame(num_players=2)) is None
+        assert table.index(AggravationGame()) is None
+        game = next(endgame_positions(table, 1, seed=2))
+        assert table.index(game) is not None
+        game.game_over = True
+        assert table.win_probability(game) is None
+    
+    def test_save_and_load(self, table, tmp_path):
+        """Test that a saved table memory-maps back with the same values."""
+        path = tmp_path / "endgame.npy"
+        table.save(str(path))
+        loaded = EndgameTable.load(str(path))
+        assert isinstance(loaded.values, np.memmap)
+        assert loaded.outside == 1
+        for game in endgame_positions(table, 20, seed=3):
+            assert loaded.win_probability(game) == table.win_probability(game)
+        with pytest.raises(ValueError):
+            EndgameTable(np.zeros(5), 1)
+    
+    def test_policy_uses_table(self, table):
+        """Test that the policy follows the table and falls back outside it."""
+        policy = EndgamePolicy(table, first_legal)
+        for game in endgame_positions(table, 50, seed=4):
+            for dice_roll in range(1, 7):
+                moves = game.get_valid_moves(game.current_player, dice_roll)
+                if moves:
+                    assert policy(game, dice_roll, moves) == table.best_move(game, dice_roll, moves)
+        game = AggravationGame(num_players=2)
+        assert policy(game, 6, game.get_valid_moves(1, 6)) == -1
+    
+    def test_policy_falls_back_under_other_rules(self, table):
+        """Test that games under shortcut rules fall back instead of using the table."""
+        policy = EndgamePolicy(table, first_legal)
+        for position in endgame_positions(table, 20, seed=5):
+            game = with_rules(position, RULE_VARIANTS['shortcuts'])
+            assert table.index(game) is None
+            for dice_roll in range(1, 7):
+                actions = game.get_actions(game.current_player, dice_roll)
+                if actions:
+                    assert table.best_move(game, dice_roll, actions) is None
+                    assert policy(game, dice_roll, actions) == actions[0]
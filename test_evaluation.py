@@ -0,0 +1,67 @@
+"""
+Tests for the position evaluation tables and score_position().
+"""
+
+from evaluation import DANGER_ZONES, PROGRESS, SCORE_LIMIT, _MARBLE_VALUE, score_position
+from game_engine import (
+    CENTER_INDEX, AggravationGame, NODE_COORDS, OFF_BOARD, PLAYER_EXIT_STAR_INDEX,
+    PLAYER_FINAL_HOME_INDICES, PLAYER_START_INDEX, STAR_HOLE_INDICES, advance
+)
+from conftest import random_positions
+
+
+class TestEvaluation:
+    """Test the progress and danger tables and the score built on them."""
+    
+    def test_progress_matches_walks(self):
+        """Test that progress agrees with walking the track one step at a time."""
+        for player in range(1, 5):
+            progress = PROGRESS[player]
+            start = PLAYER_START_INDEX[player]
+            last = PLAYER_FINAL_HOME_INDICES[player][-1]
+            assert progress[start] == 1 and progress[OFF_BOARD] == 0
+            for node, steps in enumerate(progress[:-1]):
+                if steps and node != CENTER_INDEX:
+                    assert advance(player, start, steps - 1) == node
+                    assert advance(player, node, progress[last] - steps + 1) is None
+    
+    def test_center_hole_values(self):
+        """Test that the center hole counts as one step short of the player's exit star."""
+        for player in range(1, 5):
+            exit_star = PLAYER_EXIT_STAR_INDEX[player]
+            assert PROGRESS[player][CENTER_INDEX] == PROGRESS[player][exit_star] - 1
+            first_star = min(STAR_HOLE_INDICES, key=lambda star: PROGRESS[player][star])
+            assert PROGRESS[player][CENTER_INDEX] > PROGRESS[player][first_star]
+    
+    def test_danger_zones(self):
+        """Test that danger zones are the ring nodes reachable with one roll."""
+        for player in range(1, 5):
+            start = PLAYER_START_INDEX[player]
+            assert DANGER_ZONES[player][start] == tuple(start + k for k in range(1, 7))
+            assert DANGER_ZONES[player][OFF_BOARD] == (start,)
+            assert DANGER_ZONES[player][PLAYER_FINAL_HOME_INDICES[player][0]] == ()
+    
+    def test_progress_and_exposure(self):
+        """Test that moving forward helps and sitting in front of an opponent hurts."""
+        game = AggravationGame()
+        assert score_position(game, 1) == 0
+        game.remove_from_home(1)
+        before = score_position(game, 1)
+        assert before > 0 and score_position(game, 2) < 0
+        game.execute_move(1, 3, 5)
+        assert score_position(game, 1) > before
+        
+        # Player 2's marble two spaces behind player 1's threatens it
+        game = AggravationGame(num_players=2)
+        game.p1_marbles = [(None, None)] * 3 + [NODE_COORDS[24]]
+        game.p1_home = game.p1_home[:3]
+        game.p2_marbles = [(None, None)] * 3 + [NODE_COORDS[22]]
+        game.p2_home = game.p2_home[:3]
+        assert score_position(game, 1) == _MARBLE_VALUE[1][24] * 5 / 6 - _MARBLE_VALUE[2][22]
+    
+    def test_within_limit(self):
+        """Test that scores stay within SCORE_LIMIT and sum to zero."""
+        for game, _, _ in random_positions(200, seed=9):
+            scores = [score_position(game, player) for player in range(1, 5)]
+            assert all(abs(score) <= SCORE_LIMIT for score in scores)
+            assert abs(sum(scores)) < 1e-6
@@ -0,0 +1,129 @@
+"""
+Tests for the expectimax player.
+Pruned searches must pick a move as good as a plain expectimax would.
+"""
+
+import pytest
+from evaluation import SCORE_LIMIT, score_position
+from expectimax import ExpectimaxPlayer, order_moves
+from game_engine import AggravationGame, RULE_VARIANTS
+from headless_simulation import simulate_games
+from policies import POLICIES, seat_policy
+from conftest import random_positions, with_rules
+
+
+def decision_value(game, root, player, dice_roll, depth):
+    """Unpruned paranoid expectimax value of a decision node."""
+    next_player = player if dice_roll == 6 else player % game.num_players + 1
+    moves = game.get_valid_moves(player, dice_roll)
+    if not moves:
+        return chance_value(game, root, next_player, depth - 1)
+    values = []
+    for marble_idx in moves:
+        record = game.apply_move(player, marble_idx, dice_roll)
+        if game.check_win_condition(player):
+            values.append(SCORE_LIMIT if player == root else -SCORE_LIMIT)
+        else:
+            values.append(chance_value(game, root, next_player, depth - 1))
+        game.undo(record)
+    return max(values) if player == root else min(values)
+
+
+def chance_value(game, root, player, depth):
+    """Unpruned expectimax value of a chance node."""
+    if depth <= 0:
+        return score_position(game, root)
+    return sum(decision_value(game, root, player, roll, depth) for roll in range(1, 7)) / 6
+
+
+def move_values(game, dice_roll, depth):
+    """Unpruned value of every valid move for the current player."""
+    player = game.current_player
+    next_player = player if dice_roll == 6 else player % game.num_players + 1
+    values = {}
+    for marble_idx in game.get_valid_moves(player, dice_roll):
+        record = game.apply_move(player, marble_idx, dice_roll)
+        if game.check_win_condition(player):
+            values[marble_idx] = SCORE_LIMIT
+        else:
+            values[marble_idx] = chance_value(game, player, next_player, depth - 1)
+        game.undo(record)
+    return values
+
+
+class TestExpectimax:
+    """Test the expectimax search."""
+    
+    @pytest.mark.parametrize("depth", [1, 2, 3])
+    def test_pruning_keeps_best_move(self, depth):
+        """Test that Star1/Star2 pruning never changes the chosen move's value."""
+        player = ExpectimaxPlayer(max_depth=depth, time_limit=None)
+        for game, dice_roll, valid_moves in random_positions(20 if depth == 3 else 50, seed=8):
+            if len(valid_moves) < 2:
+                continue
+            values = move_values(game, dice_roll, depth)
+            before = game.zobrist_hash
+            move = player(game, dice_roll, valid_moves)
+            assert values[move] == pytest.approx(max(values.values()))
+            assert game.zobrist_hash == before
+            assert player.depth_reached == depth
+    
+    def test_table_keeps_choices(self):
+        """Test that the transposition table saves work without changing moves."""
+        with_table = ExpectimaxPlayer(max_depth=4, time_limit=None)
+        without = ExpectimaxPlayer(max_depth=4, time_limit=None, table_mb=None)
+        nodes = [0, 0]
+        for game, dice_roll, valid_moves in random_positions(15, seed=3):
+            assert with_table(game, dice_roll, valid_moves) == without(game, dice_roll, valid_moves)
+            nodes[0] += with_table.nodes
+            nodes[1] += without.nodes
+        assert without.table is None
+        assert with_table.table.hits > 0
+        assert nodes[0] < nodes[1]
+    
+    def test_table_keyed_by_rules(self):
+        """Test that table entries stored under one set of rules are not used under another."""
+        shared = ExpectimaxPlayer(max_depth=3, time_limit=None)
+        for game, dice_roll, valid_moves in random_positions(30, seed=3):
+            variant = with_rules(game, RULE_VARIANTS['exit-on-one'])
+            moves = variant.get_valid_moves(variant.current_player, dice_roll)
+            shared(game, dice_roll, valid_moves)
+            if moves:
+                fresh = ExpectimaxPlayer(max_depth=3, time_limit=None)
+                assert shared(variant, dice_roll, moves) == fresh(variant, dice_roll, moves)
+                assert shared.nodes == fresh.nodes
+    
+    def test_time_limit(self):
+        """Test that a tiny time budget still returns a legal move."""
+        player = ExpectimaxPlayer(max_depth=50, time_limit=0.005)
+        for game, dice_roll, valid_moves in random_positions(20, seed=4):
+            assert player(game, dice_roll, valid_moves) in valid_moves
+            assert player.elapsed < 0.5
+            assert player.depth_reached < 50
+    
+    def test_no_valid_move_raises(self):
+        """Test that asking for a move when there is none is an error."""
+        game = AggravationGame()
+        with pytest.raises(ValueError):
+            ExpectimaxPlayer().choose_move(game, 3)
+        assert ExpectimaxPlayer().choose_move(game, 6) == -1
+    
+    def test_move_ordering(self):
+        """Test that captures are ordered before other moves."""
+        game = AggravationGame(num_players=2)
+        game.p2_marbles[0] = (29, 10)
+        game.p2_home = game.p2_home[:-1]
+        game.p1_marbles = [(19, 1), (None, None), (None, None), (29, 9)]
+        game.p1_home = game.p1_home[:2]
+        game.p1_start_occupied = True
+        assert order_moves(game, 1, 1, game.get_valid_moves(1, 1))[0] == 3
+    
+    def test_registered_policy(self):
+        """Test that interactive play is timed and simulated seats search to a fixed depth."""
+        assert isinstance(POLICIES['expectimax'], ExpectimaxPlayer)
+        assert POLICIES['expectimax'].time_limit == 0.05
+        seat = seat_policy('expectimax', None)
+        assert isinstance(seat, ExpectimaxPlayer) and seat.time_limit is None
+        assert seat is not seat_policy('expectimax', None)
+        players = ['expectimax', 'random']
+        assert simulate_games(0, 2, 7, 2, players) == simulate_games(0, 2, 7, 2, players)
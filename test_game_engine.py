@@ -3,10 +3,17 @@ Unit tests for game_engine.py
 Tests pure game logic without pygame dependencies.
 """
 
+import copy
+import pickle
+import random
 import pytest
 from game_engine import (
     AggravationGame, BOARD_TEMPLATE, P1START, P2START, P3START, P4START,
-    SPOT, BLANK
+    SPOT, BLANK, PLAYER_STARTS, TRACK, TRACK_LENGTH, NODE_COORDS, NODE_INDEX,
+    PLAYER_START_INDEX, PLAYER_HOME_ENTRY_OFFSET, PLAYER_FINAL_HOME_INDICES,
+    advance, GamePool, DICE_BUFFER_SIZE, STAR_HOLES, CENTER_HOLE, CENTER_INDEX,
+    STAR_HOLE_INDICES, PLAYER_EXIT_STAR_INDEX, MOVE_GRAPH, EDGE_STAR, shortcut_destinations,
+    AggravationRules, RULE_VARIANTS, STANDARD_RULES
 )
 
 
@@ -27,6 +34,59 @@ class TestDice:
         unique_rolls = set(rolls)
         # Should have at least 3 different values in 50 rolls
         assert len(unique_rolls) >= 3, "Dice rolls not random enough"
+    
+    @pytest.mark.parametrize("dice_buffer", [0, 16, DICE_BUFFER_SIZE])
+    def test_seeded_rolls_are_reproducible(self, dice_buffer):
+        """Verify the same seed gives the same rolls, buffered or not."""
+        game1 = AggravationGame(rng=random.Random(5), dice_buffer=dice_buffer)
+        game2 = AggravationGame(rng=5, dice_buffer=dice_buffer)
+        rolls = [game1.roll_dice() for _ in range(100)]
+        assert rolls == [game2.roll_dice() for _ in range(100)]
+        assert set(rolls) == {1, 2, 3, 4, 5, 6}
+    
+    def test_numpy_generator_rolls(self):
+        """Verify a NumPy Generator can drive the dice."""
+        np = pytest.importorskip("numpy")
+        for dice_buffer in (0, 64):
+            game1 = AggravationGame(rng=np.random.default_rng(3), dice_buffer=dice_buffer)
+            game2 = AggravationGame(rng=np.random.default_rng(3), dice_buffer=dice_buffer)
+            rolls = [game1.roll_dice() for _ in range(200)]
+            assert rolls == [game2.roll_dice() for _ in range(200)]
+            assert set(rolls) == {1, 2, 3, 4, 5, 6}
+            assert all(type(roll) is int for roll in rolls)
+    
+    def test_games_do_not_share_dice(self):
+        """Verify games with their own rng don't touch the global random state."""
+        random.seed(9)
+        expected = random.random()
+        random.seed(9)
+        game = AggravationGame(rng=random.Random(1), dice_buffer=8)
+        for _ in range(20):
+            game.roll_dice()
+        assert random.random() == expected
+    
+    def test_clone_rolls_from_same_source(self):
+        """Verify a clone shares the rng but not the buffered dice."""
+        reference = AggravationGame(rng=random.Random(2), dice_buffer=32)
+        expected = [reference.roll_dice() for _ in range(32)]
+        game = AggravationGame(rng=random.Random(2), dice_buffer=32)
+        game.roll_dice()
+        clone = game.clone()
+        assert clone.rng is game.rng
+        clone.roll_dice()
+        # The clone drew a fresh block; the original's buffer is untouched
+        assert [game.roll_dice() for _ in range(31)] == expected[1:]
+    
+    def test_seeded_game_replays(self):
+        """Verify a whole game replays from its seed."""
+        def play(seed):
+            game = AggravationGame(rng=random.Random(seed), dice_buffer=DICE_BUFFER_SIZE)
+            pick = lambda g, roll, moves: moves[int(g.rng.random() * len(moves))]
+            rolls = 0
+            while not game.game_over and rolls < 3000:
+                rolls += game.play_turn(pick)
+            return rolls, game.get_game_state()
+        assert play(4) == play(4)
 
 
 class TestBoardMovement:
@@ -87,6 +147,56 @@ class TestBoardMovement:
         assert game.get_next_home_position(1, 15, 2) == (15, 3)
         assert game.get_next_home_position(1, 15, 3) == (15, 4)
         assert game.get_next_home_position(1, 15, 4) == (15, 5)
+    
+    def test_invalid_positions_still_raise(self):
+        """Test that off-path coordinates raise like before."""
+        game = AggravationGame()
+        
+        # Center hole is a spot but not on the ring
+        with pytest.raises(ValueError):
+            game.get_next_position(15, 8)
+        # Blank squares fail the board assertion
+        with pytest.raises(AssertionError):
+            game.get_next_position(0, 0)
+        # Last final home spot has no successor
+        with pytest.raises(ValueError):
+            game.get_next_home_position(1, 15, 5)
+
+
+class TestTrackModel:
+    """Test the precomputed integer track tables."""
+    
+    def test_ring_layout(self):
+        """Test the ring has 56 spots starting at P1START."""
+        assert TRACK_LENGTH == 56
+        assert TRACK[0] == P1START
+        assert len(set(TRACK)) == TRACK_LENGTH
+        for player, start in PLAYER_STARTS.items():
+            assert TRACK[PLAYER_START_INDEX[player]] == start
+            assert PLAYER_HOME_ENTRY_OFFSET[player] == 50
+    
+    def test_ring_matches_get_next_position(self):
+        """Test ring order matches clockwise movement."""
+        game = AggravationGame()
+        for node, pos in enumerate(TRACK):
+            assert game.get_next_position(*pos) == TRACK[(node + 1) % TRACK_LENGTH]
+    
+    def test_advance_follows_home_path(self):
+        """Test advance() turns into the home stretch and final home."""
+        entry = NODE_INDEX[(11, 3)]
+        assert NODE_COORDS[advance(1, entry, 6)] == (15, 3)
+        # Other players keep going around the ring
+        assert NODE_COORDS[advance(2, entry, 2)] == (11, 1)
+        # From start, a full lap plus the final home is the longest walk
+        start = PLAYER_START_INDEX[1]
+        assert NODE_COORDS[advance(1, start, 58)] == (15, 5)
+        assert advance(1, start, 59) is None
+    
+    def test_advance_overshoot_returns_none(self):
+        """Test advance() returns None past the last final home spot."""
+        last = PLAYER_FINAL_HOME_INDICES[1][-1]
+        assert advance(1, last, 0) == last
+        assert advance(1, last, 1) is None
 
 
 class TestGameInitialization:
@@ -1022,6 +1132,743 @@ class TestAggravation:
         assert game.p2_marbles[0] == (None, None)  # P2 marble sent home
         assert len(game.p2_home) == 4  # P2 marble returned to home
 
+class TestCompactState:
+    """Test the array-backed state and its backward compatible views."""
+    
+    def test_marble_view_is_live(self):
+        """Test that a fetched marbles view reflects later moves."""
+        game = AggravationGame()
+        marbles = game.p1_marbles
+        
+        game.remove_from_home(1)
+        assert marbles[3] == P1START
+        
+        game.execute_move(1, 3, 2)
+        assert marbles[3] == (19, 3)
+        assert marbles.index((19, 3)) == 3
+        assert (19, 3) in marbles
+    
+    def test_marble_view_writes_through(self):
+        """Test that assigning into a view updates engine state."""
+        game = AggravationGame()
+        view = game.p2_marbles
+        view[1] = (25, 10)
+        
+        assert game.find_marble_at_position((25, 10)) == (2, 1)
+        assert game.p2_marbles == [(None, None), (25, 10), (None, None), (None, None)]
+        assert repr(view) == repr([(None, None), (25, 10), (None, None), (None, None)])
+    
+    def test_invalid_position_rejected(self):
+        """Test that positions off the board path cannot be stored."""
+        game = AggravationGame()
+        with pytest.raises(ValueError):
+            game.p1_marbles[0] = (0, 0)
+    
+    def test_home_is_prefix_of_starting_home(self):
+        """Test that the waiting home is stored as a count."""
+        game = AggravationGame()
+        game.p3_home = game.p3_home[:-2]
+        
+        assert game.p3_home == [(21, 11), (23, 12)]
+        assert game.get_num_in_home(3) == 2
+        
+        game.p3_marbles[2] = (19, 12)
+        game.send_marble_home(3, 2)
+        assert game.p3_home == [(21, 11), (23, 12), (25, 13)]
+    
+    def test_game_fields_round_trip(self):
+        """Test current player, winner and game over flags."""
+        game = AggravationGame()
+        game.current_player = 3
+        game.winner = 2
+        game.game_over = True
+        
+        assert game.current_player == 3
+        assert game.winner == 2
+        assert game.game_over is True
+        
+        game.winner = None
+        assert game.winner is None
+    
+    def test_no_per_instance_dict(self):
+        """Test that games use __slots__ and cannot grow new attributes."""
+        game = AggravationGame()
+        assert not hasattr(game, '__dict__')
+        with pytest.raises(AttributeError):
+            game.p5_marbles = []
+    
+    def test_player_data_is_shared(self):
+        """Test that player data is built once and returned by reference."""
+        game = AggravationGame()
+        other = AggravationGame()
+        pdata = game._get_player_data(2)
+        
+        assert pdata is game._get_player_data(2)
+        assert pdata is other._get_player_data(2)
+        assert isinstance(pdata.final_home, frozenset)
+        assert (27, 8) in pdata.final_home
+        assert pdata.start_pos == P2START
+        with pytest.raises(ValueError):
+            game._get_player_data(5)
+
+
+class TestOccupancyIndex:
+    """Test the incrementally maintained occupancy index."""
+    
+    def test_index_tracks_moves_and_captures(self):
+        """Test the index stays in sync through moves, captures and home exits."""
+        game = AggravationGame(num_players=2, debug=True)
+        game.remove_from_home(1)
+        game.execute_move(1, 3, 2)
+        game.p2_marbles[0] = (19, 5)
+        game.p2_home = game.p2_home[:-1]
+        
+        result = game.execute_move(1, 3, 2)
+        
+        assert result['aggravated_opponent'] == True
+        assert game.find_marble_at_position((19, 5)) == (1, 3)
+        assert game.find_marble_at_position((19, 3)) is None
+        assert game.verify_occupancy()
+    
+    def test_direct_assignment_updates_index(self):
+        """Test that GUI-style list assignment keeps the index in sync."""
+        game = AggravationGame()
+        game.p4_marbles = [(5, 6), (7, 6), (9, 6), (11, 6)]
+        game.p4_marbles[0] = (3, 6)
+        
+        assert game.find_marble_at_position((3, 6)) == (4, 0)
+        assert game.find_marble_at_position((5, 6)) is None
+        assert game.verify_occupancy()
+    
+    def test_inactive_players_ignored(self):
+        """Test lookups only report marbles of the active players."""
+        game = AggravationGame(num_players=2)
+        game.p3_marbles[0] = (11, 12)
+        
+        assert game.find_marble_at_position((11, 12)) is None
+    
+    def test_stacked_marbles_report_first_player(self):
+        """Test that shared spots report the lowest player like the old scan."""
+        game = AggravationGame(num_players=2)
+        game.p2_marbles[0] = (15, 2)
+        game.p1_marbles[1] = (15, 2)
+        
+        assert game.find_marble_at_position((15, 2)) == (1, 1)
+        game.p1_marbles[1] = (None, None)
+        assert game.find_marble_at_position((15, 2)) == (2, 0)
+
+
+class TestValidMovesAllRolls:
+    """Test the batched all-rolls move generator."""
+    
+    def test_initial_position(self):
+        """Test only 1 and 6 allow leaving home at the start."""
+        game = AggravationGame()
+        assert game.get_valid_moves_all_rolls(1) == [[-1], [], [], [], [], [-1]]
+    
+    def test_blocking_caps_reach(self):
+        """Test a marble can't use rolls that would jump its own marble."""
+        game = AggravationGame()
+        game.p1_marbles[0] = (19, 2)
+        game.p1_marbles[1] = (19, 5)
+        game.p1_home = game.p1_home[:-2]
+        
+        table = game.get_valid_moves_all_rolls(1)
+        assert table[0] == [-1, 0, 1]
+        assert table[1] == [0, 1]
+        assert table[2] == [1]  # marble 0 would land on marble 1
+        assert table[5] == [-1, 1]
+    
+    def test_matches_get_valid_moves(self):
+        """Test the table matches six get_valid_moves calls in random games."""
+        rng = random.Random(7)
+        for _ in range(20):
+            game = AggravationGame()
+            for _ in range(200):
+                player = rng.randint(1, 4)
+                table = game.get_valid_moves_all_rolls(player)
+                for roll in range(1, 7):
+                    assert table[roll - 1] == game.get_valid_moves(player, roll)
+                roll = rng.randint(1, 6)
+                moves = table[roll - 1]
+                if not moves:
+                    continue
+                choice = rng.choice(moves)
+                if choice == -1:
+                    game.remove_from_home(player)
+                else:
+                    game.execute_move(player, choice, roll)
+
+
+class TestApplyUndo:
+    """Test the make/unmake move API used by search."""
+    
+    def test_undo_restores_capture(self):
+        """Test that undo brings back an aggravated opponent marble."""
+        game = AggravationGame(num_players=2, debug=True)
+        game.p2_marbles[0] = (29, 10)
+        game.p2_home = game.p2_home[:-1]
+        game.p2_start_occupied = True
+        game.p1_marbles[0] = (29, 9)
+        game.p1_home = game.p1_home[:-1]
+        before = game.get_game_state()
+        
+        record = game.apply_move(1, 0, 1)
+        assert game.p2_marbles[0] == (None, None)
+        assert game.p2_start_occupied == False
+        assert len(game.p2_home) == 4
+        
+        game.undo(record)
+        assert game.get_game_state() == before
+        assert game.find_marble_at_position((29, 10)) == (2, 0)
+    
+    def test_undo_home_exit_and_final_home(self):
+        """Test undo of leaving home and of entering the final home."""
+        game = AggravationGame(debug=True)
+        before = game.get_game_state()
+        record = game.apply_move(1, -1, 6)
+        assert game.p1_marbles[3] == P1START
+        assert game.p1_start_occupied == True
+        game.undo(record)
+        assert game.get_game_state() == before
+        
+        game.p1_marbles[0] = (15, 1)
+        before = game.get_game_state()
+        record = game.apply_move(1, 0, 2)
+        assert game.p1_end_home[0] == (15, 3)
+        game.undo(record)
+        assert game.get_game_state() == before
+    
+    def test_illegal_moves_raise(self):
+        """Test that illegal moves are rejected without changing state."""
+        game = AggravationGame()
+        with pytest.raises(ValueError):
+            game.apply_move(1, -1, 3)
+        with pytest.raises(ValueError):
+            game.apply_move(1, 0, 2)
+        with pytest.raises(ValueError):
+            game.apply_move(7, 0, 2)
+    
+    def test_random_sequences_unwind_exactly(self):
+        """Test that undoing a long random line restores the start position."""
+        rng = random.Random(11)
+        game = AggravationGame(debug=True)
+        before = game.get_game_state()
+        records = []
+        for _ in range(300):
+            player = rng.randint(1, 4)
+            roll = rng.randint(1, 6)
+            moves = game.get_valid_moves(player, roll)
+            if moves:
+                records.append(game.apply_move(player, rng.choice(moves), roll))
+        for record in reversed(records):
+            game.undo(record)
+        assert game.get_game_state() == before
+
+
+class TestZobristHash:
+    """Test the incrementally maintained Zobrist position hash."""
+    
+    def test_hash_is_64_bit_and_deterministic(self):
+        """Test that fresh games share one 64-bit hash."""
+        game = AggravationGame()
+        assert 0 <= game.zobrist_hash < 2 ** 64
+        assert game.zobrist_hash == AggravationGame().zobrist_hash
+        assert game.verify_hash()
+    
+    def test_side_to_move_changes_hash(self):
+        """Test that the same marbles with a different player to move hash differently."""
+        game = AggravationGame()
+        start = game.zobrist_hash
+        game.current_player = 2
+        assert game.zobrist_hash != start
+        game.current_player = 1
+        assert game.zobrist_hash == start
+    
+    def test_transposition_hashes_equal(self):
+        """Test that reaching a position by different move orders gives one hash."""
+        game1 = AggravationGame()
+        game1.remove_from_home(1)
+        game1.execute_move(1, 3, 2)
+        game1.execute_move(1, 3, 3)
+        
+        game2 = AggravationGame()
+        game2.remove_from_home(1)
+        game2.execute_move(1, 3, 4)
+        game2.execute_move(1, 3, 1)
+        
+        assert game1.p1_marbles == game2.p1_marbles
+        assert game1.zobrist_hash == game2.zobrist_hash
+    
+    def test_capture_updates_hash(self):
+        """Test that send_marble_home via a capture keeps the hash exact."""
+        game = AggravationGame(num_players=2)
+        game.p2_marbles[0] = (29, 10)
+        game.p2_home = game.p2_home[:-1]
+        game.p2_start_occupied = True
+        game.p1_marbles[0] = (29, 9)
+        game.p1_home = game.p1_home[:-1]
+        result = game.execute_move(1, 0, 1)
+        assert result['aggravated_opponent']
+        assert game.verify_hash()
+    
+    def test_random_play_and_undo(self):
+        """Test the incremental hash against a recompute through play and undo."""
+        rng = random.Random(5)
+        game = AggravationGame()
+        start = game.zobrist_hash
+        records = []
+        for _ in range(200):
+            player = rng.randint(1, 4)
+            roll = rng.randint(1, 6)
+            moves = game.get_valid_moves(player, roll)
+            if moves:
+                records.append(game.apply_move(player, rng.choice(moves), roll))
+                assert game.verify_hash()
+        for record in reversed(records):
+            game.undo(record)
+        assert game.zobrist_hash == start
+    
+    def test_loaded_game_hash_matches(self):
+        """Test that a game restored from a dict hashes like the original."""
+        rng = random.Random(9)
+        game = AggravationGame()
+        for _ in range(60):
+            player = rng.randint(1, 4)
+            roll = rng.randint(1, 6)
+            moves = game.get_valid_moves(player, roll)
+            if moves:
+                game.apply_move(player, rng.choice(moves), roll)
+        restored = AggravationGame.from_dict(game.to_dict())
+        assert restored.zobrist_hash == game.zobrist_hash
+
+
+class TestCloneAndPool:
+    """Test fast game copies and the rollout game pool."""
+    
+    def _played_game(self, seed):
+        rng = random.Random(seed)
+        game = AggravationGame()
+        for _ in range(80):
+            player = rng.randint(1, 4)
+            roll = rng.randint(1, 6)
+            moves = game.get_valid_moves(player, roll)
+            if moves:
+                game.apply_move(player, rng.choice(moves), roll)
+        return game
+    
+    def test_clone_is_equal_and_independent(self):
+        """Test that a clone matches the original and does not share state."""
+        game = self._played_game(1)
+        copy_game = game.clone()
+        assert copy_game.get_game_state() == game.get_game_state()
+        assert copy_game.zobrist_hash == game.zobrist_hash
+        
+        before = game.get_game_state()
+        copy_game.send_marble_home(1, 0)
+        copy_game.remove_from_home(2)
+        assert game.get_game_state() == before
+        assert copy_game.get_game_state() != before
+        assert game.verify_occupancy() and copy_game.verify_occupancy()
+    
+    def test_copy_module_uses_clone(self):
+        """Test that copy.copy and copy.deepcopy give independent games."""
+        game = self._played_game(2)
+        for copy_game in (copy.copy(game), copy.deepcopy(game)):
+            assert copy_game is not game
+            assert copy_game.get_game_state() == game.get_game_state()
+            copy_game.current_player = game.current_player % 4 + 1
+            assert copy_game.current_player != game.current_player
+    
+    def test_pickle_round_trip(self):
+        """Test that games pickle (for worker processes) with their dice."""
+        for rng in (None, random.Random(3)):
+            game = AggravationGame(rng=rng, dice_buffer=8)
+            game.copy_from(self._played_game(5))
+            game.roll_dice()
+            restored = pickle.loads(pickle.dumps(game))
+            assert restored.get_game_state() == game.get_game_state()
+            assert restored.verify_occupancy() and restored.verify_hash()
+            assert restored.zobrist_hash == game.zobrist_hash
+            if rng is None:
+                assert restored.rng is random
+            else:
+                assert [restored.roll_dice() for _ in range(20)] == [game.roll_dice() for _ in range(20)]
+    
+    def test_pool_reuses_games(self):
+        """Test that released games are handed out again, reset or copied in place."""
+        pool = GamePool(size=1)
+        game = pool.acquire()
+        state_array = game._state
+        game.remove_from_home(1)
+        pool.release(game)
+        
+        again = pool.acquire()
+        assert again is game and again._state is state_array
+        assert again.get_game_state() == AggravationGame().get_game_state()
+        assert again.zobrist_hash == AggravationGame().zobrist_hash
+        
+        source = self._played_game(3)
+        pool.release(again)
+        copied = pool.acquire(source)
+        assert copied is game
+        assert copied.get_game_state() == source.get_game_state()
+        assert copied.verify_occupancy() and copied.verify_hash()
+    
+    def test_empty_pool_allocates(self):
+        """Test that an exhausted pool still hands out games."""
+        pool = GamePool(num_players=2)
+        assert len(pool) == 0
+        game = pool.acquire()
+        assert game.num_players == 2
+        source = self._played_game(4)
+        assert pool.acquire(source).get_game_state() == source.get_game_state()
+
+
+class ScriptedDiceGame(AggravationGame):
+    """Game whose dice follow a fixed script, for turn flow tests."""
+    
+    def __init__(self, rolls, **kwargs):
+        super().__init__(**kwargs)
+        self.rolls = list(rolls)
+    
+    def roll_dice(self):
+        return self.rolls.pop(0)
+
+
+class TestTurnAPI:
+    """Test turn flow: step(), play_turn() and turn advancement."""
+    
+    def test_next_player_wraps_over_num_players(self):
+        """Test that the turn cycles through the active players only."""
+        game = AggravationGame(num_players=2)
+        assert game.next_player() == 2
+        assert game.next_player() == 1
+        assert game.current_player == 1
+    
+    def test_step_passes_turn_unless_six(self):
+        """Test that a 6 keeps the turn and other rolls pass it on."""
+        game = AggravationGame()
+        game.step(None, 3)  # No legal move, pass
+        assert game.current_player == 2
+        record = game.step(-1, 6)
+        assert record is not None
+        assert game.p2_start_occupied == True
+        assert game.current_player == 2
+        game.step(3, 2)  # marble 3 left home
+        assert game.current_player == 3
+    
+    def test_step_rejects_illegal_actions(self):
+        """Test that passing with a legal move or making an illegal move raises."""
+        game = AggravationGame()
+        with pytest.raises(ValueError):
+            game.step(None, 6)
+        with pytest.raises(ValueError):
+            game.step(-1, 4)
+        assert game.current_player == 1
+    
+    def test_step_records_winner(self):
+        """Test that the winning move ends the game without passing the turn."""
+        game = AggravationGame()
+        game.p1_marbles = [(15, 1), (15, 3), (15, 4), (15, 5)]
+        game.p1_home = []
+        game.p1_end_home = [(15, 3), (15, 4), (15, 5), (None, None)]
+        game.step(0, 1)
+        assert game.game_over == True
+        assert game.winner == 1
+        assert game.current_player == 1
+    
+    def test_play_turn_rolls_again_on_six(self):
+        """Test that play_turn keeps rolling after each 6."""
+        game = ScriptedDiceGame([6, 6, 2])
+        rolls = game.play_turn(lambda game, dice_roll, valid_moves: valid_moves[0])
+        assert rolls == 3
+        assert game.current_player == 2
+        assert game.p1_marbles[3] == TRACK[8]  # out on a 6, then 6 + 2
+    
+    def test_play_turn_reports_each_roll(self):
+        """Test that play_turn calls on_roll with every roll's action and undo record."""
+        game = ScriptedDiceGame([3, 6, 2])
+        rolls = []
+        game.play_turn(lambda game, dice_roll, valid_moves: valid_moves[0],
+                       lambda *args: rolls.append(args))
+        assert [(player, dice_roll, action) for player, dice_roll, action, _ in rolls] == [(1, 3, None)]
+        assert rolls[0][3] is None
+        rolls.clear()
+        game.play_turn(lambda game, dice_roll, valid_moves: valid_moves[0],
+                       lambda *args: rolls.append(args))
+        assert [(player, dice_roll, action) for player, dice_roll, action, _ in rolls] == [(2, 6, -1), (2, 2, 3)]
+        assert all(record is not None for *_, record in rolls)
+    
+    def test_full_games_finish(self):
+        """Test that every player's marbles get home and games end with a winner."""
+        random.seed(3)
+        for num_players in (2, 4):
+            game = AggravationGame(num_players=num_players, debug=True)
+            rolls = 0
+            while not game.game_over and rolls < 5000:
+                rolls += game.play_turn(lambda game, dice_roll, valid_moves: random.choice(valid_moves))
+            assert game.game_over
+            assert game.check_win_condition(game.winner)
+    
+    def test_leaving_home_uses_free_slot(self):
+        """Test that a marble leaving home never overwrites a marble on the board."""
+        game = AggravationGame()
+        game.remove_from_home(1)           # marble 3 to start
+        game.execute_move(1, 3, 5)
+        game.remove_from_home(1)           # marble 2 to start
+        game.execute_move(1, 2, 2)
+        game.send_marble_home(1, 3)        # marble 3 back home, 3 waiting
+        
+        assert game.remove_from_home(1)
+        assert game.p1_marbles[2] == TRACK[2]
+        assert game.p1_marbles[3] == P1START
+        assert len(game.p1_home) == 2
+    
+    def test_final_home_records_follow_marble(self):
+        """Test that moving within the final home frees the spot it left."""
+        game = AggravationGame()
+        game.p1_marbles[0] = (15, 1)
+        game.p1_marbles[1] = (13, 1)
+        game.p1_home = game.p1_home[:2]
+        game.execute_move(1, 0, 1)
+        game.execute_move(1, 0, 2)
+        assert game.p1_end_home == [(15, 4), (None, None), (None, None), (None, None)]
+        
+        # (15, 2) is free again once the marble moved on
+        assert game.is_valid_move(1, 1, 3)
+        record = game.apply_move(1, 1, 3)
+        game.undo(record)
+        assert game.p1_end_home[0] == (15, 4)
+
+
+class TestShortcuts:
+    """Test the star hole and center hole shortcut rules."""
+    
+    def test_move_graph(self):
+        """Test the star circuit, center hub and each player's exit star."""
+        assert CENTER_HOLE in NODE_COORDS and BOARD_TEMPLATE[8][15] == SPOT
+        assert all(node < TRACK_LENGTH for node in STAR_HOLE_INDICES)
+        # The exit star is the last star before the home stretch
+        assert NODE_COORDS[PLAYER_EXIT_STAR_INDEX[1]] == (11, 6)
+        assert NODE_COORDS[PLAYER_EXIT_STAR_INDEX[2]] == (19, 6)
+        for player, graph in MOVE_GRAPH.items():
+            exit_star = PLAYER_EXIT_STAR_INDEX[player]
+            assert all(kind != EDGE_STAR for _, kind in graph[exit_star])
+            assert sorted(nxt for nxt, _ in graph[CENTER_INDEX]) == sorted(STAR_HOLE_INDICES)
+    
+    def test_shortcut_destinations(self):
+        """Test hops around the star circuit and in and out of the center."""
+        star = NODE_INDEX[STAR_HOLES[0]]
+        coords = [NODE_COORDS[node] for node in shortcut_destinations(1, star, 2)]
+        assert coords == [(23, 6), (19, 11), (11, 10), CENTER_HOLE]
+        # P1 hops at most to its exit star, then walks towards home
+        coords = [NODE_COORDS[node] for node in shortcut_destinations(1, star, 6)]
+        assert coords == [(29, 7), (19, 15), (3, 10), (11, 3)]
+        # Only a 1 leaves the center, to any star hole
+        assert shortcut_destinations(1, CENTER_INDEX, 1) == list(STAR_HOLE_INDICES)
+        assert shortcut_destinations(1, CENTER_INDEX, 2) == []
+        # Off the stars a move can only walk, or turn into the center as it
+        # passes a star with one step left
+        for player in PLAYER_STARTS:
+            for node in range(TRACK_LENGTH):
+                if node not in STAR_HOLE_INDICES:
+                    for roll in range(1, 7):
+                        dest = advance(player, node, roll)
+                        expected = [dest] if dest is not None else []
+                        if advance(player, node, roll - 1) in STAR_HOLE_INDICES:
+                            expected.append(CENTER_INDEX)
+                        assert shortcut_destinations(player, node, roll) == expected
+    
+    def test_default_rules_have_no_shortcuts(self):
+        """Test that without shortcuts a star hole move has one destination."""
+        game = AggravationGame()
+        game.p1_marbles[0] = STAR_HOLES[0]
+        game.p1_home = game.p1_home[:3]
+        assert game.get_destinations(1, 0, 1) == [NODE_INDEX[(21, 6)]]
+        with pytest.raises(ValueError):
+            game.apply_move(1, 0, 1, CENTER_INDEX)
+    
+    def test_move_options_from_star(self):
+        """Test that a marble on a star hole offers every destination."""
+        game = AggravationGame(debug=True, rules=RULE_VARIANTS['shortcuts'])
+        game.p1_marbles[0] = STAR_HOLES[0]
+        game.p1_home = game.p1_home[:3]
+        options = game.get_move_options(1, 1)
+        assert options == [(-1, PLAYER_START_INDEX[1]), (0, NODE_INDEX[(21, 6)]),
+                           (0, NODE_INDEX[STAR_HOLES[1]]), (0, CENTER_INDEX)]
+        
+        before = game.zobrist_hash
+        record = game.apply_move(1, 0, 1, CENTER_INDEX)
+        assert game.p1_marbles[0] == CENTER_HOLE
+        assert game.get_valid_moves(1, 3) == []
+        assert game.get_destinations(1, 0, 1) == list(STAR_HOLE_INDICES)
+        game.undo(record)
+        assert game.zobrist_hash == before
+        
+        result = game.execute_move(1, 0, 1, NODE_INDEX[(23, 6)])
+        assert result['success'] == False
+        assert game.execute_move(1, 0, 2, NODE_INDEX[STAR_HOLES[2]])['new_position'] == STAR_HOLES[2]
+    
+    def test_actions_carry_destinations(self):
+        """Test that get_actions() offers destinations only when the rules have shortcuts."""
+        standard = AggravationGame()
+        shortcuts = AggravationGame(rules=RULE_VARIANTS['shortcuts'])
+        for game in (standard, shortcuts):
+            game.p1_marbles[0] = STAR_HOLES[0]
+            game.p1_home = game.p1_home[:3]
+        assert standard.get_actions(1, 1) == standard.get_valid_moves(1, 1) == [-1, 0]
+        assert shortcuts.get_actions(1, 1) == shortcuts.get_move_options(1, 1)
+        
+        shortcuts.step((0, CENTER_INDEX), 1)
+        assert shortcuts.p1_marbles[0] == CENTER_HOLE
+        assert shortcuts.current_player == 2
+        with pytest.raises(ValueError):
+            standard.step((0, CENTER_INDEX), 1)
+    
+    def test_own_marbles_block_the_circuit(self):
+        """Test that a hop can't jump or land on an own marble."""
+        game = AggravationGame(rules=RULE_VARIANTS['shortcuts'])
+        game.p1_marbles[0] = STAR_HOLES[0]
+        game.p1_marbles[1] = STAR_HOLES[1]
+        game.p1_home = game.p1_home[:2]
+        destinations = game.get_destinations(1, 0, 2)
+        assert NODE_INDEX[STAR_HOLES[2]] not in destinations
+        assert CENTER_INDEX not in destinations
+        assert destinations == [NODE_INDEX[(23, 6)]]
+    
+    def test_capture_in_center(self):
+        """Test that landing on the center aggravates an opponent there."""
+        game = AggravationGame(rules=RULE_VARIANTS['shortcuts'])
+        game.p1_marbles[0] = STAR_HOLES[3]
+        game.p1_home = game.p1_home[:3]
+        game.p2_marbles[0] = CENTER_HOLE
+        game.p2_home = game.p2_home[:3]
+        assert game.is_capture(1, 0, 1, CENTER_INDEX)
+        assert not game.is_capture(1, 0, 1)
+        record = game.step(0, 1, CENTER_INDEX)
+        assert record.victim_node == CENTER_INDEX
+        assert len(game.p2_home) == 4
+    
+    def test_random_games_with_shortcuts(self):
+        """Test random games over every option keep the state consistent."""
+        rng = random.Random(11)
+        game = AggravationGame(num_players=2, debug=True, rng=rng, rules=RULE_VARIANTS['shortcuts'])
+        for _ in range(3000):
+            if game.game_over:
+                break
+            dice_roll = game.roll_dice()
+            options = game.get_move_options(game.current_player, dice_roll)
+            assert sorted({idx for idx, _ in options}) == \
+                sorted(game.get_valid_moves(game.current_player, dice_roll))
+            if not options:
+                game.step(None, dice_roll)
+                continue
+            idx, to_node = rng.choice(options)
+            before = game.clone()
+            record = game.apply_move(game.current_player, idx, dice_roll, to_node)
+            assert game.get_marble_nodes(game.current_player).count(to_node) == 1
+            game.undo(record)
+            assert game.zobrist_hash == before.zobrist_hash
+            game.step(idx, dice_roll, to_node)
+        assert game.game_over
+    
+    def test_shortcuts_survive_copies(self):
+        """Test that clones, pickles and saves keep the shortcut rules."""
+        game = AggravationGame(rules=RULE_VARIANTS['shortcuts'])
+        assert game.clone().rules.shortcuts
+        assert pickle.loads(pickle.dumps(game)).rules.shortcuts
+        assert AggravationGame.from_dict(game.to_dict()).rules.shortcuts
+        assert not AggravationGame.from_dict(AggravationGame().to_dict()).rules.shortcuts
+        pool = GamePool(1)
+        target = pool.acquire(game)
+        pool.release(target)
+        assert not pool.acquire().rules.shortcuts
+
+
+class TestRuleVariants:
+    """Test house rule variants compiled into the move tables."""
+    
+    def test_rules_compare_by_value(self):
+        """Test that equal rules share compiled tables and survive a save."""
+        rules = AggravationRules(exit_rolls=[6, 1], shortcuts=True)
+        assert rules == RULE_VARIANTS['shortcuts']
+        assert AggravationGame(rules=rules)._tables is AggravationGame(rules=RULE_VARIANTS['shortcuts'])._tables
+        assert AggravationRules.from_dict(rules.to_dict()) == rules
+        assert AggravationGame().rules == STANDARD_RULES
+        with pytest.raises(ValueError):
+            AggravationRules(exit_rolls=(0, 6))
+    
+    def test_exit_on_one(self):
+        """Test that only the exit rolls bring a marble out of home."""
+        game = AggravationGame(rules=RULE_VARIANTS['exit-on-one'])
+        assert game.get_valid_moves(1, 6) == []
+        assert game.get_valid_moves(1, 1) == [-1]
+        with pytest.raises(ValueError):
+            game.apply_move(1, -1, 6)
+        table = game.get_valid_moves_all_rolls(1)
+        assert table == [[-1], [], [], [], [], []]
+    
+    def test_overshoot_stops_on_last_home_spot(self):
+        """Test that without exact rolls a marble stops at the end of home."""
+        game = AggravationGame(rules=RULE_VARIANTS['overshoot-home'])
+        game.p1_marbles[0] = (15, 1)
+        game.p1_home = game.p1_home[:3]
+        assert game.get_destinations(1, 0, 6) == [NODE_INDEX[(15, 5)]]
+        game.execute_move(1, 0, 6)
+        assert game.p1_marbles[0] == (15, 5)
+        # Standard rules drop the overshooting roll
+        standard = AggravationGame()
+        standard.p1_marbles[0] = (15, 1)
+        standard.p1_home = standard.p1_home[:3]
+        assert not standard.is_valid_move(1, 0, 6)
+        # A marble already on the last spot has nowhere to go
+        assert game.get_valid_moves(1, 3) == []
+    
+    def test_safe_start_blocks_landing(self):
+        """Test that marbles on start spots can't be aggravated."""
+        game = AggravationGame(rules=RULE_VARIANTS['safe-start'])
+        game.p1_marbles[0] = TRACK[PLAYER_START_INDEX[2] - 2]
+        game.p1_home = game.p1_home[:3]
+        game.p2_marbles[0] = P2START
+        game.p2_home = game.p2_home[:3]
+        game.p2_start_occupied = True
+        assert not game.is_valid_move(1, 0, 2)
+        assert game.is_valid_move(1, 0, 3)  # passing over is fine
+        # An opponent sitting on your start keeps you in home
+        game.p2_marbles[0] = (None, None)
+        game.p2_home = game.p2_home + [(27, 2)]
+        game.p2_start_occupied = False
+        game.p1_marbles[1] = P2START
+        game.p1_home = game.p1_home[:2]
+        assert -1 not in game.get_valid_moves(2, 6)
+        standard = AggravationGame.from_dict(game.to_dict())
+        standard.rules = STANDARD_RULES
+        assert -1 not in standard.get_valid_moves(2, 6)  # rules are compiled at creation
+        data = game.to_dict()
+        data['game_state']['rules'] = STANDARD_RULES.to_dict()
+        assert -1 in AggravationGame.from_dict(data).get_valid_moves(2, 6)
+    
+    @pytest.mark.parametrize("name", list(RULE_VARIANTS))
+    def test_all_rolls_match_per_roll(self, name):
+        """Test that get_valid_moves_all_rolls agrees with get_valid_moves under every variant."""
+        rng = random.Random(name)
+        game = AggravationGame(num_players=4, rng=rng, rules=RULE_VARIANTS[name], debug=True)
+        for _ in range(400):
+            if game.game_over:
+                break
+            player = game.current_player
+            table = game.get_valid_moves_all_rolls(player)
+            assert table == [game.get_valid_moves(player, roll) for roll in range(1, 7)]
+            dice_roll = game.roll_dice()
+            options = game.get_move_options(player, dice_roll)
+            if options:
+                idx, to_node = rng.choice(options)
+                game.step(idx, dice_roll, to_node)
+            else:
+                game.step(None, dice_roll)
+
+
 class TestSaveLoad:
     """Test game state persistence (save/load functionality)."""
     
@@ -0,0 +1,78 @@
+"""
+Tests for game records: encoding, record files and replay.
+"""
+
+import gzip
+import pytest
+from game_records import GameRecord, GameRecordWriter, MAGIC, read_records
+from headless_simulation import run_batch_simulation, simulate_games
+
+
+class CollectingWriter:
+    """Writer that keeps a copy of every record it passes on."""
+    
+    def __init__(self, writer, records):
+        self.writer = writer
+        self.records = records
+    
+    def write(self, record):
+        self.records.append(record)
+        self.writer.write(record)
+
+
+class TestGameRecords:
+    """Test that simulated games are stored and replayed exactly."""
+    
+    def test_round_trip(self):
+        """Test that a record survives encoding unchanged."""
+        record = GameRecord('7:3', num_players=3)
+        for roll, move in [(6, -1), (3, 0), (2, None), (6, 3), (5, None)]:
+            record.add_move(roll, move)
+        record.winner = 2
+        record.captures = [1, 0, 300]
+        decoded = GameRecord.from_bytes(record.to_bytes())
+        assert decoded == record
+        assert list(decoded.iter_moves()) == [(6, -1), (3, 0), (2, None), (6, 3), (5, None)]
+    
+    @pytest.mark.parametrize("name", ["games.agr", "games.agr.gz"])
+    def test_file_round_trip(self, tmp_path, name):
+        """Test that written records read back in order, compressed or not."""
+        path = tmp_path / name
+        records = []
+        with GameRecordWriter(path, buffer_size=64) as writer:
+            simulate_games(0, 5, 11, writer=CollectingWriter(writer, records))
+        assert writer.count == 5
+        assert list(read_records(path)) == records
+        if name.endswith('.gz'):
+            with gzip.open(path, 'rb') as f:
+                assert f.read(4) == MAGIC
+    
+    def test_records_replay_to_same_result(self, tmp_path):
+        """Test that replaying each record reaches the recorded winner."""
+        path = tmp_path / "games.agr"
+        results = run_batch_simulation(6, seed=3, policy_names=['greedy', 'random', 'search', 'first'],
+                                       record_path=path)
+        records = list(read_records(path))
+        assert [record.seed for record in records] == [f"3:{i}" for i in range(6)]
+        assert sum(len(record) for record in records) == results['total_moves']
+        for record in records:
+            game = record.replay()
+            assert game.game_over
+            assert game.winner == record.winner
+    
+    @pytest.mark.slow
+    def test_worker_records_match_serial(self, tmp_path):
+        """Test that worker processes write the same file as one process."""
+        run_batch_simulation(10, workers=1, seed=4, record_path=tmp_path / "serial.agr")
+        run_batch_simulation(10, workers=2, seed=4, record_path=tmp_path / "parallel.agr")
+        assert (tmp_path / "serial.agr").read_bytes() == (tmp_path / "parallel.agr").read_bytes()
+    
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file without the record header is refused."""
+        path = tmp_path / "other.agr"
+        path.write_bytes(b"not a record file")
+        with pytest.raises(ValueError):
+            list(read_records(path))
+        with pytest.raises(ValueError):
+            GameRecordWriter(tmp_path / "x.agr", compression='lz4')
+
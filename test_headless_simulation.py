@@ -0,0 +1,89 @@
+"""
+Tests for the headless batch simulation.
+Statistics must merge associatively and not depend on the worker count.
+"""
+
+import random
+import pytest
+from game_engine import CENTER_INDEX, RULE_VARIANTS
+from game_records import GameRecord
+from headless_simulation import (
+    empty_results, merge_results, run_batch_simulation, run_variant_sweep, simulate_games,
+    simulate_single_game
+)
+
+
+class TestBatchSimulation:
+    """Test sharded simulation and statistics merging."""
+    
+    def test_merge_is_associative(self):
+        """Test that merging in any grouping gives the same statistics."""
+        a, b, c = simulate_games(0, 2, 1), simulate_games(2, 3, 1), simulate_games(5, 1, 1)
+        assert merge_results(merge_results(a, b), c) == merge_results(a, merge_results(b, c))
+        assert merge_results(empty_results(), a) == merge_results(a, empty_results())
+    
+    def test_sharding_matches_single_range(self):
+        """Test that splitting games into chunks doesn't change the totals."""
+        whole = simulate_games(0, 6, 3)
+        parts = merge_results(simulate_games(0, 4, 3), simulate_games(4, 2, 3))
+        assert parts == whole
+        assert whole['games_played'] == 6
+        assert whole['min_moves'] <= whole['avg_moves'] <= whole['max_moves']
+    
+    @pytest.mark.slow
+    def test_results_independent_of_workers(self):
+        """Test that the master seed fixes the results for any worker count."""
+        serial = run_batch_simulation(12, workers=1, seed=8)
+        parallel = run_batch_simulation(12, workers=3, seed=8)
+        assert serial == parallel
+        assert serial['seed'] == 8
+    
+    def test_per_seat_statistics(self):
+        """Test that per-seat wins and captures add up across seat policies."""
+        results = simulate_games(0, 8, 2, 4, ['greedy', 'random', 'first', 'search'])
+        assert sum(results['wins']) == results['games_completed'] == 8
+        assert len(results['captures']) == 4
+        assert sum(results['captures']) > 0
+    
+    def test_two_player_games(self):
+        """Test that only the seated players take turns and win."""
+        results = simulate_games(0, 5, 4, 2, ['random', 'greedy'])
+        assert len(results['wins']) == 2
+        assert sum(results['wins']) == 5
+    
+    def test_variant_sweep(self):
+        """Test that a sweep plays the same games as a run per variant."""
+        sweep = run_variant_sweep(3, ['standard', 'safe-start'], seed=6, num_players=2)
+        assert list(sweep) == ['standard', 'safe-start']
+        standard = simulate_games(0, 3, 6, num_players=2)
+        assert {key: sweep['standard'][key] for key in standard} == standard
+        assert sweep['safe-start']['rules'] == 'safe-start'
+        assert sweep['safe-start']['games_played'] == 3
+        empty = run_variant_sweep(0, ['standard', 'shortcuts'], seed=6, num_players=2)
+        assert empty['shortcuts']['games_played'] == 0
+    
+    def test_policies_choose_destinations(self):
+        """Test that under shortcut rules the destination a policy picks is the one played."""
+        last = []
+        centers = [0]
+        
+        def last_option(game, dice_roll, valid_moves):
+            if last:
+                player, marble_idx, to_node = last.pop()
+                assert game.get_marble_nodes(player)[marble_idx] == to_node
+            marble_idx, to_node = valid_moves[-1]
+            if marble_idx >= 0:
+                last.append((game.current_player, marble_idx, to_node))
+                centers[0] += to_node == CENTER_INDEX
+            return marble_idx, to_node
+        
+        simulate_single_game(num_players=2, seat_policies=[last_option] * 2, rng=random.Random(3),
+                             rules=RULE_VARIANTS['shortcuts'])
+        assert centers[0] > 0
+    
+    def test_records_need_standard_rules(self):
+        """Test that records can't be written for games under house rules."""
+        with pytest.raises(ValueError):
+            run_batch_simulation(1, seed=1, record_path='unused.agr', rules=RULE_VARIANTS['shortcuts'])
+        with pytest.raises(ValueError):
+            simulate_single_game(record=GameRecord('1:0', 4), rules=RULE_VARIANTS['shortcuts'])
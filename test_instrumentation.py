@@ -0,0 +1,94 @@
+"""
+Tests for the opt-in engine instrumentation.
+"""
+
+import json
+import random
+import time
+import pytest
+import instrumentation
+from game_engine import AggravationGame, RULE_VARIANTS
+from headless_simulation import simulate_single_game
+
+
+@pytest.fixture(autouse=True)
+def clean_instrumentation():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+class TestInstrumentation:
+    """Test enabling, counting, snapshots and dumps."""
+    
+    def test_disabled_methods_are_originals(self):
+        """Test that disabling leaves the class exactly as it was."""
+        before = {name: AggravationGame.__dict__[name] for name in instrumentation.INSTRUMENTED_METHODS}
+        instrumentation.enable()
+        assert instrumentation.is_enabled()
+        assert AggravationGame.__dict__['get_valid_moves'] is not before['get_valid_moves']
+        instrumentation.disable()
+        assert not instrumentation.is_enabled()
+        for name, original in before.items():
+            assert AggravationGame.__dict__[name] is original
+    
+    def test_counts_calls(self, tmp_path, monkeypatch):
+        """Test that calls are counted and timed, classmethods included."""
+        monkeypatch.setattr('game_engine.Path.home', lambda: tmp_path)
+        game = AggravationGame()
+        instrumentation.enable()
+        game.get_valid_moves(1, 6)
+        game.execute_move(1, -1, 6)
+        path = tmp_path / '.aggravation' / 'saves' / 'test.json'
+        game.save_to_file(str(path))
+        loaded = AggravationGame.load_from_file(str(path))
+        assert isinstance(loaded, AggravationGame)
+        
+        stats = instrumentation.snapshot()
+        assert stats['get_valid_moves']['calls'] == 1
+        assert stats['execute_move']['calls'] == 1
+        assert stats['load_from_file']['calls'] == 1
+        assert stats['from_dict']['calls'] == 1
+        assert stats['save_to_file']['total_seconds'] > 0
+        assert stats['save_to_file']['mean_us'] == pytest.approx(stats['save_to_file']['total_seconds'] * 1e6)
+        
+        instrumentation.disable()
+        game.get_valid_moves(1, 6)
+        assert instrumentation.snapshot()['get_valid_moves']['calls'] == 1
+        instrumentation.reset()
+        assert instrumentation.snapshot() == {}
+        
+        with pytest.raises(AttributeError):
+            instrumentation.enable(['no_such_method'])
+    
+    def test_counts_simulated_moves(self):
+        """Test that a simulated game's moves are counted on the hot path."""
+        instrumentation.enable()
+        rolls, _, _, _ = simulate_single_game(num_players=2, rng=random.Random(1))
+        simulate_single_game(num_players=2, rng=random.Random(1), rules=RULE_VARIANTS['shortcuts'])
+        stats = instrumentation.snapshot()
+        assert stats['play_turn']['calls'] > 0
+        assert 0 < stats['step']['calls'] <= stats['apply_move']['calls']
+        assert stats['get_actions']['calls'] >= rolls
+        assert stats['get_move_options']['calls'] > 0
+    
+    def test_merge_snapshots(self):
+        """Test that snapshots from several processes add up."""
+        a = {'is_valid_move': {'calls': 2, 'total_seconds': 1.0, 'mean_us': 5e5}}
+        b = {'is_valid_move': {'calls': 2, 'total_seconds': 3.0, 'mean_us': 1.5e6},
+             'to_dict': {'calls': 1, 'total_seconds': 1.0, 'mean_us': 1e6}}
+        merged = instrumentation.merge_snapshots(a, b)
+        assert merged['is_valid_move'] == {'calls': 4, 'total_seconds': 4.0, 'mean_us': 1e6}
+        assert merged['to_dict']['calls'] == 1
+    
+    def test_periodic_dump(self, tmp_path):
+        """Test that the dump thread writes snapshots as JSON."""
+        path = tmp_path / 'stats.json'
+        instrumentation.enable(['get_valid_moves'])
+        with instrumentation.PeriodicDump(str(path), interval=0.01):
+            AggravationGame().get_valid_moves(1, 1)
+            time.sleep(0.05)
+            assert path.exists()
+        data = json.loads(path.read_text())
+        assert data['methods']['get_valid_moves']['calls'] == 1
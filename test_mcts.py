@@ -0,0 +1,107 @@
+"""
+Tests for the Monte Carlo Tree Search player.
+"""
+
+import pickle
+import random
+import pytest
+from game_engine import AggravationGame, RULE_VARIANTS
+from mcts import MCTSPlayer
+from policies import POLICIES, greedy_capture, seat_policy
+from conftest import random_positions, with_rules
+
+
+def two_choice_game():
+    """Game where player 1 can bring out a marble or move one with a 6."""
+    game = AggravationGame()
+    game.remove_from_home(1)
+    game.apply_move(1, 3, 2)
+    return game
+
+
+class TestMCTS:
+    """Test MCTS move choice, limits, metrics and tree reuse."""
+    
+    def test_returns_valid_move(self):
+        """Test that searches pick legal moves and leave the game alone."""
+        player = MCTSPlayer(iterations=60, time_limit=None, seed=1)
+        for game, dice_roll, valid_moves in random_positions(40, seed=6):
+            before = game.zobrist_hash
+            assert player(game, dice_roll, valid_moves) in valid_moves
+            assert game.zobrist_hash == before
+    
+    def test_iteration_limit_and_metrics(self):
+        """Test that the iteration budget is honoured and metrics are kept."""
+        game = two_choice_game()
+        player = MCTSPlayer(iterations=200, time_limit=None, seed=2)
+        assert player.choose_move(game, 6) in (-1, 3)
+        assert player.iterations == 200
+        assert player.iterations_per_second > 0
+        assert player.total_iterations == 200
+        
+        with pytest.raises(ValueError):
+            MCTSPlayer(iterations=None, time_limit=None)
+        with pytest.raises(ValueError):
+            player.choose_move(AggravationGame(), 3)
+    
+    def test_same_seed_same_choices(self):
+        """Test that an iteration-limited search is reproducible."""
+        choices = []
+        for _ in range(2):
+            player = MCTSPlayer(iterations=80, time_limit=None, seed=5, rollout_policy=greedy_capture)
+            choices.append([player(game, roll, moves) for game, roll, moves in random_positions(30, seed=7)])
+        assert choices[0] == choices[1]
+    
+    def test_tree_reused_after_six(self):
+        """Test that the tree is re-rooted at the position after a 6."""
+        game = two_choice_game()
+        player = MCTSPlayer(iterations=600, time_limit=None, seed=3)
+        move = player.choose_move(game, 6)
+        game.step(move, 6)
+        assert game.current_player == 1
+        player.choose_move(game, 1)
+        assert player.reused_visits > 0
+        
+        fresh = MCTSPlayer(iterations=10, time_limit=None, reuse_tree=False)
+        fresh.choose_move(game, 1)
+        fresh.choose_move(game, 1)
+        assert fresh.reused_visits == 0
+    
+    def test_tree_not_reused_across_rules(self):
+        """Test that a tree grown under one set of rules is not re-rooted under another."""
+        game = two_choice_game()
+        player = MCTSPlayer(iterations=100, time_limit=None, seed=3)
+        player.choose_move(game, 6)
+        player.choose_move(game, 6)
+        assert player.reused_visits == 100
+        player.choose_move(with_rules(game, RULE_VARIANTS['safe-start']), 6)
+        assert player.reused_visits == 0
+    
+    def test_pickle_drops_tree(self):
+        """Test that a player pickles without its tree (for worker processes)."""
+        game = two_choice_game()
+        player = MCTSPlayer(iterations=20, time_limit=None, seed=4)
+        player.choose_move(game, 6)
+        restored = pickle.loads(pickle.dumps(player))
+        assert restored._root is None
+        assert restored.choose_move(game, 6) in (-1, 3)
+    
+    @pytest.mark.slow
+    def test_root_parallel_search(self):
+        """Test that worker processes' iterations are summed."""
+        game = two_choice_game()
+        player = MCTSPlayer(iterations=50, time_limit=None, workers=2, seed=6)
+        try:
+            assert player.choose_move(game, 6) in (-1, 3)
+            assert player.iterations == 100
+        finally:
+            player.close()
+    
+    def test_registered_policy(self):
+        """Test that simulated seats get their own seeded, fixed-iteration players."""
+        assert isinstance(POLICIES['mcts'], MCTSPlayer)
+        seats = [seat_policy('mcts', random.Random(9)) for _ in range(2)]
+        assert seats[0] is not seats[1]
+        assert seats[0].time_limit is None and seats[0].iterations_limit == 64
+        for game, dice_roll, valid_moves in random_positions(10, seed=9):
+            assert seats[0](game, dice_roll, valid_moves) == seats[1](game, dice_roll, valid_moves)
@@ -0,0 +1,84 @@
+"""
+Tests for the simulated player policies.
+"""
+
+import random
+import pytest
+from expectimax import ExpectimaxPlayer
+from game_engine import (
+    CENTER_INDEX, AggravationGame, NODE_INDEX, PLAYER_START_INDEX, RULE_VARIANTS, STAR_HOLES
+)
+from mcts import MCTSPlayer
+from policies import POLICIES, greedy_capture, one_ply_search, score_position
+from headless_simulation import simulate_games
+from conftest import random_positions
+
+
+class TestPolicies:
+    """Test that policies pick legal moves and play sensibly."""
+    
+    @pytest.mark.parametrize("name", sorted(POLICIES))
+    def test_policy_returns_valid_move(self, name):
+        """Test that every policy returns one of the valid moves."""
+        random.seed(1)
+        for game, dice_roll, valid_moves in random_positions(300, seed=2):
+            assert POLICIES[name](game, dice_roll, valid_moves) in valid_moves
+    
+    def test_search_leaves_game_unchanged(self):
+        """Test that one_ply_search undoes every move it tries."""
+        for game, dice_roll, valid_moves in random_positions(200, seed=3):
+            before = game.get_game_state()
+            zobrist = game.zobrist_hash
+            one_ply_search(game, dice_roll, valid_moves)
+            assert game.get_game_state() == before
+            assert game.zobrist_hash == zobrist
+    
+    def test_greedy_takes_capture(self):
+        """Test that greedy_capture aggravates when it can."""
+        game = AggravationGame(num_players=2)
+        game.p2_marbles[0] = (29, 10)
+        game.p2_home = game.p2_home[:-1]
+        game.p1_marbles = [(19, 1), (None, None), (None, None), (29, 9)]
+        game.p1_home = game.p1_home[:2]
+        game.p1_start_occupied = True
+        assert game.is_capture(1, 3, 1)
+        assert not game.is_capture(1, 0, 1)
+        assert greedy_capture(game, 1, game.get_valid_moves(1, 1)) == 3
+    
+    @pytest.mark.parametrize("variant", sorted(RULE_VARIANTS))
+    def test_search_players_under_every_variant(self, variant):
+        """Test that the search players pick legal moves under each set of house rules."""
+        players = [ExpectimaxPlayer(max_depth=2, time_limit=None),
+                   MCTSPlayer(iterations=10, time_limit=None, seed=1),
+                   one_ply_search, greedy_capture]
+        for game, dice_roll, valid_moves in random_positions(150, seed=9, rules=RULE_VARIANTS[variant]):
+            for player in players:
+                assert player(game, dice_roll, valid_moves) in valid_moves
+    
+    def test_policies_choose_shortcuts(self):
+        """Test that policies pick destinations, taking a shortcut when it gains the most ground."""
+        game = AggravationGame(rules=RULE_VARIANTS['shortcuts'])
+        game.p1_marbles[0] = STAR_HOLES[0]
+        game.p1_home = game.p1_home[:3]
+        valid_moves = game.get_actions(1, 1)
+        walk = (0, NODE_INDEX[(21, 6)])
+        assert walk in valid_moves and len(valid_moves) == 4
+        for name in sorted(POLICIES):
+            assert POLICIES[name](game, 1, valid_moves) in valid_moves
+        assert greedy_capture(game, 1, valid_moves) == (0, CENTER_INDEX)
+        assert one_ply_search(game, 1, valid_moves) not in (walk, (-1, PLAYER_START_INDEX[1]))
+    
+    def test_score_prefers_own_progress(self):
+        """Test that moving a marble forward raises its owner's score."""
+        game = AggravationGame()
+        game.remove_from_home(1)
+        before = score_position(game, 1)
+        game.execute_move(1, 3, 5)
+        assert score_position(game, 1) > before
+        assert score_position(game, 2) < 0
+    
+    @pytest.mark.slow
+    def test_search_beats_random(self):
+        """Test that the search seat wins clearly more than a fair share."""
+        results = simulate_games(0, 100, 5, 4, ['search', 'random', 'random', 'random'])
+        assert results['wins'][0] / results['games_played'] > 0.4
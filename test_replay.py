@@ -0,0 +1,66 @@
+"""
+Tests for seeking through recorded games with GameReplay.
+"""
+
+import random
+import pytest
+from game_records import GameRecord
+from headless_simulation import simulate_single_game
+from replay import GameReplay, find_record, unfinished_games
+
+
+def recorded_game(seed):
+    """Simulate one random game and return its record."""
+    record = GameRecord(str(seed))
+    simulate_single_game(rng=random.Random(seed), record=record)
+    return record
+
+
+class TestGameReplay:
+    """Test that seeking matches replaying from the start."""
+    
+    @pytest.mark.parametrize("interval", [1, 7, 64, 10000])
+    def test_seek_matches_full_replay(self, interval):
+        """Test every position against a straight replay of the moves."""
+        record = recorded_game(1)
+        replay = GameReplay(record, checkpoint_interval=interval)
+        positions = list(range(0, len(replay) + 1, 13)) + [len(replay)]
+        for position in positions:
+            expected = GameReplay.from_moves(list(record.iter_moves())[:position]).final
+            game = replay.seek(position)
+            assert game.get_game_state() == expected.get_game_state()
+            assert game.zobrist_hash == expected.zobrist_hash
+        assert replay.final.winner == record.winner
+        assert replay.seek(-1).get_game_state() == replay.final.get_game_state()
+    
+    def test_seek_returns_independent_games(self):
+        """Test that changing a sought game leaves the snapshots alone."""
+        replay = GameReplay(recorded_game(2), checkpoint_interval=8)
+        game = replay.seek(16)
+        zobrist = game.zobrist_hash
+        game.reset()
+        assert replay.seek(16).zobrist_hash == zobrist
+        with pytest.raises(IndexError):
+            replay.seek(len(replay) + 1)
+    
+    def test_turns(self):
+        """Test that turns start after every roll but a 6."""
+        replay = GameReplay.from_moves([(3, None), (6, -1), (6, 3), (2, 3), (4, None)])
+        assert replay.turn_starts == [0, 1, 4, 5]
+        assert replay.turn_of(2) == 1
+        assert replay.seek_turn(2).current_player == 3
+        assert replay.seek_turn(2).get_marble_nodes(2) == replay.final.get_marble_nodes(2)
+    
+    def test_illegal_move_raises(self):
+        """Test that a move log that doesn't fit the rules is refused."""
+        with pytest.raises(ValueError):
+            GameReplay.from_moves([(3, -1)])
+    
+    def test_find_games(self):
+        """Test looking up games by seed and finding unfinished ones."""
+        records = [recorded_game(seed) for seed in range(3)]
+        assert find_record(records, '1') is records[1]
+        assert find_record(records, '9') is None
+        stuck = GameRecord('stuck')
+        stuck.add_move(3, None)
+        assert unfinished_games(records + [stuck]) == [stuck]
@@ -0,0 +1,88 @@
+"""
+Tests for the streaming simulation statistics.
+Merged statistics must not depend on how the games were split up.
+"""
+
+import random
+import pytest
+from game_engine import CENTER_INDEX, RULE_VARIANTS
+from headless_simulation import merge_results, run_batch_simulation, simulate_games
+from simulation_stats import Histogram, SimulationStats, wilson_interval
+
+
+class TestSimulationStats:
+    """Test histograms, intervals and statistics gathered by the simulator."""
+    
+    def test_histogram_quantiles(self):
+        """Test that quantiles match sorting the values."""
+        rng = random.Random(1)
+        values = [rng.randint(0, 300) for _ in range(999)]
+        histogram = Histogram(250)
+        for value in values:
+            histogram.add(value)
+        ordered = sorted(values)
+        for q in (0.01, 0.5, 0.9, 0.99):
+            expected = ordered[max(0, -(-int(q * 1000) * len(values) // 1000) - 1)]
+            assert histogram.quantile(q) == min(expected, 251)
+        assert histogram.mean == pytest.approx(sum(values) / len(values))
+        assert Histogram().quantile(0.5) is None
+    
+    def test_merge_is_exact(self):
+        """Test that merging histograms in any grouping gives the same counts."""
+        a, b, c = Histogram(10), Histogram(10), Histogram(10)
+        for histogram, values in ((a, [1, 2, 3]), (b, [3, 40]), (c, [0])):
+            for value in values:
+                histogram.add(value)
+        assert a.merge(b).merge(c) == a.merge(b.merge(c)) == c.merge(b).merge(a)
+        assert a.merge(b).merge(c).quantile(1.0) == 11
+        with pytest.raises(ValueError):
+            a.merge(Histogram(5))
+    
+    def test_wilson_interval(self):
+        """Test that the interval brackets the rate and narrows with more trials."""
+        low, high = wilson_interval(25, 100)
+        assert low < 0.25 < high
+        assert low == pytest.approx(0.1755, abs=1e-3)
+        assert high == pytest.approx(0.3440, abs=1e-3)
+        narrow = wilson_interval(2500, 10000)
+        assert high - low > narrow[1] - narrow[0]
+        assert wilson_interval(0, 0) == (0.0, 1.0)
+    
+    def test_simulator_gathers_stats(self):
+        """Test that simulated games fill in every statistic consistently."""
+        results = simulate_games(0, 6, 2, collect_stats=True)
+        stats = results['stats']
+        assert stats.games == results['games_played'] == 6
+        assert stats.wins == results['wins']
+        assert sum(stats.slot_captures) == sum(results['captures'])
+        assert stats.lengths.sum == results['total_moves']
+        assert stats.length_quantiles([0.0, 1.0]) == [results['min_moves'], results['max_moves']]
+        assert all(h.total > 0 for h in stats.first_home_turns)
+        assert 'stats' not in simulate_games(0, 1, 2)
+    
+    def test_stats_with_shortcuts(self):
+        """Test that aggravations in the center hole are counted under the shortcut rules."""
+        results = simulate_games(0, 60, 1, collect_stats=True, rules=RULE_VARIANTS['shortcuts'])
+        stats = results['stats']
+        assert sum(stats.slot_captures) == sum(results['captures'])
+        assert stats.slot_captures[CENTER_INDEX] > 0
+    
+    def test_sharding_matches_single_range(self):
+        """Test that stats merged from chunks equal stats from one range."""
+        whole = simulate_games(0, 5, 7, collect_stats=True)
+        parts = merge_results(simulate_games(0, 2, 7, collect_stats=True),
+                              simulate_games(2, 3, 7, collect_stats=True))
+        assert parts['stats'] == whole['stats']
+        assert parts == whole
+        stats = SimulationStats()
+        assert stats.merge(whole['stats']) == whole['stats']
+        with pytest.raises(ValueError):
+            stats.merge(SimulationStats(2))
+    
+    @pytest.mark.slow
+    def test_stats_independent_of_workers(self):
+        """Test that worker processes' stats merge to the serial result."""
+        serial = run_batch_simulation(8, workers=1, seed=5, collect_stats=True)
+        parallel = run_batch_simulation(8, workers=2, seed=5, collect_stats=True)
+        assert serial['stats'] == parallel['stats']
+        assert serial['stats'].to_dict()['games'] == 8
@@ -0,0 +1,66 @@
+"""
+Tests for the transposition table.
+"""
+
+import pytest
+from transposition import ENTRY_BYTES, EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+
+
+class TestTranspositionTable:
+    """Test lookups, the replacement policy, counters and the size bound."""
+    
+    def test_store_and_lookup(self):
+        """Test that stored entries come back and unknown keys miss."""
+        table = TranspositionTable(0.01)
+        table.store(12345, 1.5, 3, LOWER, -1)
+        assert table.lookup(12345) == (1.5, 3, -1, LOWER)
+        assert table.lookup(12345 + table.buckets) is None
+        assert table.best_move(12345) == -1
+        assert table.best_move(99) == NO_MOVE
+        assert (table.probes, table.hits) == (4, 2)
+        assert table.hit_rate == 0.5
+    
+    def test_size_is_bounded(self):
+        """Test that the table never grows past its budget."""
+        table = TranspositionTable(0.01)
+        assert table.size_bytes <= 0.01 * 2 ** 20
+        assert table.capacity == table.size_bytes // ENTRY_BYTES
+        for key in range(10 * table.capacity):
+            table.store(key * 2654435761 % 2 ** 64, key, key % 5)
+        assert len(table) == table.capacity
+        assert table.replacements > 0
+        with pytest.raises(ValueError):
+            TranspositionTable(0)
+    
+    def test_depth_preferred_and_always_replace(self):
+        """Test that deep entries survive shallow ones in the same bucket."""
+        table = TranspositionTable(0.001)
+        deep, shallow, other = 7, 7 + table.buckets, 7 + 2 * table.buckets
+        table.store(deep, 1.0, 5)
+        table.store(shallow, 2.0, 1)
+        table.store(other, 3.0, 2)
+        assert table.lookup(deep) == (1.0, 5, NO_MOVE, EXACT)
+        assert table.lookup(shallow) is None
+        assert table.lookup(other) == (3.0, 2, NO_MOVE, EXACT)
+        assert table.replacements == 1
+        
+        # A deeper search takes the depth-preferred slot and demotes the old entry
+        table.store(other, 4.0, 6, UPPER)
+        assert table.lookup(other) == (4.0, 6, NO_MOVE, UPPER)
+        assert table.lookup(deep) == (1.0, 5, NO_MOVE, EXACT)
+        assert len(table) == 2
+    
+    def test_new_search_ages_entries(self):
+        """Test that entries from an earlier search give way to shallower ones."""
+        table = TranspositionTable(0.001)
+        old, new = 3, 3 + table.buckets
+        table.store(old, 1.0, 9)
+        table.new_search()
+        table.store(new, 2.0, 1)
+        table.store(new + table.buckets, 3.0, 1)
+        assert table.lookup(new) == (2.0, 1, NO_MOVE, EXACT)
+        assert table.lookup(old) is None
+        
+        table.clear()
+        assert len(table) == 0 and table.probes == 0
+        assert table.lookup(new) is None
@@ -0,0 +1,170 @@
+"""
+Fixed-size transposition table for the search players.
+
+Entries live in parallel arrays, two to a bucket: the first slot of a
+bucket is depth-preferred (it keeps the deepest search of the current
+generation) and the second is always replaced. The table is sized once
+from a memory budget in MB and never grows.
+"""
+
+from array import array
+from typing import Optional, Tuple
+
+# Entry flags: how the stored value relates to the true value.
+# Empty slots have flag 0.
+EXACT = 1
+LOWER = 2           # true value >= stored value (the search failed high)
+UPPER = 3           # true value <= stored value (the search failed low)
+
+# Stored as the best move when there is none (chance nodes, passes)
+NO_MOVE = -2
+
+# Bytes per entry: key (8), value (8), depth, move, flag and generation (1 each)
+ENTRY_BYTES = 20
+
+
+class TranspositionTable:
+    """
+    Bounded table of search results keyed by a 64-bit position hash.
+    
+    lookup() and store() count probes, hits, stores and replacements
+    (stores that evicted a different position); hit_rate is hits / probes.
+    Call new_search() before each search so entries from earlier searches
+    give way to new ones in the depth-preferred slots.
+    """
+    
+    def __init__(self, size_mb: float = 16):
+        """
+        Create an empty table.
+        
+        Args:
+            size_mb: Memory budget for the entries, in MB
+        
+        Raises:
+            ValueError: If the budget can't hold a single bucket
+        """
+        buckets = int(size_mb * 2 ** 20) // (2 * ENTRY_BYTES)
+        if buckets < 1:
+            raise ValueError(f"A {size_mb} MB transposition table can't hold any entries")
+        self.buckets = buckets
+        slots = 2 * buckets
+        self._keys = array('Q', bytes(8 * slots))
+        self._values = array('d', bytes(8 * slots))
+        self._depths = array('b', bytes(slots))
+        self._moves = array('b', bytes(slots))
+        self._flags = array('b', bytes(slots))
+        self._generations = array('B', bytes(slots))
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+    
+    def __len__(self) -> int:
+        """Number of slots in use."""
+        return len(self._flags) - self._flags.count(0)
+    
+    @property
+    def capacity(self) -> int:
+        """Number of entries the table can hold."""
+        return 2 * self.buckets
+    
+    @property
+    def size_bytes(self) -> int:
+        """Memory held by the entry arrays."""
+        return self.capacity * ENTRY_BYTES
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that found their position."""
+        return self.hits / self.probes if self.probes else 0.0
+    
+    def new_search(self):
+        """Start a new generation; older entries become replaceable."""
+        self.generation = (self.generation + 1) & 0xFF
+    
+    def clear(self):
+        """Empty the table and reset the counters."""
+        slots = self.capacity
+        self._flags = array('b', bytes(slots))
+        self._generations = array('B', bytes(slots))
+        self.generation = 0
+        self.probes = self.hits = self.stores = self.replacements = 0
+    
+    def lookup(self, key: int) -> Optional[Tuple[float, int, int, int]]:
+        """
+        Find a position.
+        
+        Args:
+            key: 64-bit position hash
+        
+        Returns:
+            (value, depth, move, flag) or None if the position isn't stored
+        """
+        self.probes += 1
+        slot = 2 * (key % self.buckets)
+        keys = self._keys
+        flags = self._flags
+        if keys[slot] != key or not flags[slot]:
+            slot += 1
+            if keys[slot] != key or not flags[slot]:
+                return None
+        self.hits += 1
+        return self._values[slot], self._depths[slot], self._moves[slot], flags[slot]
+    
+    def best_move(self, key: int) -> int:
+        """Stored best move for a position, or NO_MOVE."""
+        entry = self.lookup(key)
+        return NO_MOVE if entry is None else entry[2]
+    
+    def store(self, key: int, value: float, depth: int, flag: int = EXACT, move: int = NO_MOVE):
+        """
+        Store a search result.
+        
+        The depth-preferred slot takes the entry if it is empty, holds the
+        same position, comes from an older search or was searched no
+        deeper; its previous entry then moves to the always-replace slot.
+        Otherwise the always-replace slot takes the entry.
+        
+        Args:
+            key: 64-bit position hash
+            value: Search value
+            depth: Remaining search depth the value is for
+            flag: EXACT, LOWER or UPPER
+            move: Best move found, or NO_MOVE
+        """
+        self.stores += 1
+        slot = 2 * (key % self.buckets)
+        flags = self._flags
+        keys = self._keys
+        if flags[slot] and keys[slot] != key and self._generations[slot] == self.generation \
+                and self._depths[slot] > depth:
+            slot += 1
+        elif flags[slot] and keys[slot] != key:
+            # Demote the depth-preferred entry unless the other slot holds
+            # this position (which is about to move up anyway)
+            other = slot + 1
+            if flags[other] and keys[other] != key:
+                self.replacements += 1
+            self._copy(slot, other)
+        else:
+            other = slot + 1
+            if flags[other] and keys[other] == key:
+                # Drop a stale copy of this position from the other slot
+                flags[other] = 0
+        if slot & 1 and flags[slot] and keys[slot] != key:
+            self.replacements += 1
+        keys[slot] = key
+        self._values[slot] = value
+        self._depths[slot] = depth
+        self._moves[slot] = move
+        flags[slot] = flag
+        self._generations[slot] = self.generation
+    
+    def _copy(self, source: int, dest: int):
+        self._keys[dest] = self._keys[source]
+        self._values[dest] = self._values[source]
+        self._depths[dest] = self._depths[source]
+        self._moves[dest] = self._moves[source]
+        self._flags[dest] = self._flags[source]
+        self._generations[dest] = self._generations[source]